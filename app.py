@@ -4,13 +4,14 @@ import time
 import os
 import matplotlib.pyplot as plt
 import seaborn as sns
-from src.inference import CSATInference
+from src.model_manager import ModelManager
 
-# Import EDA functions to generate plots on the fly if needed
-try:
-    from perform_eda import perform_eda
-except ImportError:
-    pass
+from src.aggregate_cube import AggregateCube, DIMENSIONS
+from src.model_insights import ModelInsights
+
+# Pre-aggregated dashboard statistics, built by `python -m src.aggregate_cube`
+CUBE_PATH = os.path.join("data", "csat_cube.npz")
+INSIGHTS_PATH = os.path.join("models", ModelInsights.SIDECAR_FILE)
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(
@@ -161,12 +162,27 @@ load_css()
 @st.cache_resource
 def get_model():
     try:
-        return CSATInference()
+        # Single form submissions go through the compiled scorer, which skips pandas;
+        # the memory-mapped artifact keeps cold starts short, and resubmitted forms hit the cache.
+        # The manager swaps in retrained models (warmed up) without restarting the app.
+        return ModelManager(poll_interval=10.0, compiled=True, use_artifact=True,
+                            cache_size=1024, cache_ttl=3600).start()
     except Exception:
         return None
 
 engine = get_model()
 
+@st.cache_data
+def load_insights(path, mtimes):
+    # Small JSON sidecar written by training next to csat_model.pkl; mtimes of both files
+    # key the cache so a replaced model re-evaluates the 'stale' flag
+    return ModelInsights(os.path.dirname(path)).load()
+
+@st.cache_data
+def load_cube_cells(path, mtime):
+    # mtime is part of the cache key, so an updated cube file is picked up on the next run
+    return AggregateCube.load(path).cells
+
 # --- SIDEBAR NAVIGATION ---
 with st.sidebar:
     st.markdown("### 🧭 Navigation")
@@ -183,6 +199,8 @@ with st.sidebar:
             <p style="font-size: 0.8rem; opacity: 0.8;">v2.5 Ocean Release</p>
         </div>
     """, unsafe_allow_html=True)
+    if engine is not None:
+        st.caption(f"Serving model {engine.active_version}")
 
 # --- HEADER ---
 st.markdown('<div class="floating-element">', unsafe_allow_html=True)
@@ -294,6 +312,17 @@ if selected_page == "Prediction Engine":
                         </div>
                     """, unsafe_allow_html=True)
 
+                    try:
+                        drivers = engine.explain_batch(input_data, top_k=5).top[0]
+                    except ValueError:
+                        # Only forest models can be explained
+                        drivers = None
+                    if drivers:
+                        st.markdown("#### What drove this forecast")
+                        st.caption("Change in the predicted score's probability contributed by each input.")
+                        st.dataframe(pd.DataFrame(drivers, columns=['Driver', 'Contribution']),
+                                     hide_index=True, use_container_width=True)
+
                 except Exception as e:
                     st.error(f"Error: {e}")
 
@@ -302,23 +331,63 @@ if selected_page == "Prediction Engine":
 # ==========================================
 elif selected_page == "Analytics Dashboard":
     st.markdown("### 📊 Visual Analytics & Notebook Insights")
-    
-    # Check if plots exist, otherwise offer to run EDA
-    if not os.path.exists("plots"):
-        st.warning("No cached visualizations found.")
-        if st.button("🚀 Run EDA Analysis Now"):
-            with st.spinner("Generating insights..."):
-                try:
-                    perform_eda()
-                    st.success("Analysis complete! Reloading...")
-                    st.rerun()
-                except Exception as e:
-                    st.error(f"Could not run EDA: {e}")
-            
-    # Display Plots in a Grid
+
+    if not os.path.exists(CUBE_PATH):
+        st.warning("No aggregate cube found. Build it once from the export, then update it as new data arrives:")
+        st.code(f"python -m src.aggregate_cube build data/_e_Commerce_Customer_support_data.csv --cube {CUBE_PATH}")
+    else:
+        cube = AggregateCube(load_cube_cells(CUBE_PATH, os.path.getmtime(CUBE_PATH)))
+        cells = cube.cells
+
+        # --- Filters ---
+        st.markdown('<div class="glass-card">', unsafe_allow_html=True)
+        f1, f2, f3 = st.columns(3)
+        filters = {}
+        for i, dim in enumerate(DIMENSIONS[:-1]):
+            with (f1, f2, f3)[i % 3]:
+                filters[dim] = st.multiselect(dim.replace('_', ' ').title(), sorted(cells[dim].astype(str).unique()))
+        with (f1, f2, f3)[(len(DIMENSIONS) - 1) % 3]:
+            days = cells['day'].dropna()
+            date_range = st.date_input("Survey Date", (days.min().date(), days.max().date())) if len(days) else ()
+        st.markdown('</div>', unsafe_allow_html=True)
+
+        start, end = (date_range + (None, None))[:2] if isinstance(date_range, tuple) else (date_range, date_range)
+        selected = cube.filter(filters, start=start, end=end)
+        overall = AggregateCube.summarize(selected).iloc[0]
+
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Tickets", f"{int(overall['tickets']):,}")
+        m2.metric("Avg CSAT", f"{overall['csat_mean']:.2f}" if pd.notna(overall['csat_mean']) else "–")
+        m3.metric("5-Star Share", f"{overall['share_5']:.0%}" if pd.notna(overall['share_5']) else "–")
+        m4.metric("Median Response", f"{overall['rt_p50']:.0f} min" if pd.notna(overall['rt_p50']) else "–")
+
+        # --- Breakdown by one dimension ---
+        by = st.selectbox("Break down by", DIMENSIONS[:-1], format_func=lambda d: d.replace('_', ' ').title())
+        breakdown = AggregateCube.summarize(selected, by=by).sort_values('tickets', ascending=False)
+        c1, c2 = st.columns(2)
+        with c1:
+            st.markdown(f"**Average CSAT by {by}**")
+            st.bar_chart(breakdown['csat_mean'])
+        with c2:
+            st.markdown(f"**Response time percentiles (minutes) by {by}**")
+            st.bar_chart(breakdown[['rt_p50', 'rt_p90']])
+        st.dataframe(breakdown.style.format({'csat_mean': '{:.2f}', 'share_1': '{:.1%}', 'share_5': '{:.1%}',
+                                             'rt_p50': '{:.0f}', 'rt_p90': '{:.0f}', 'rt_p99': '{:.0f}'}),
+                     use_container_width=True)
+
+        # --- Daily trend ---
+        daily = AggregateCube.summarize(selected, by='day')
+        st.markdown("**Daily volume and CSAT**")
+        t1, t2 = st.columns(2)
+        with t1:
+            st.line_chart(daily['tickets'])
+        with t2:
+            st.line_chart(daily['csat_mean'])
+
+    # Static notebook plots, when they have been exported
     if os.path.exists("plots"):
         plots = sorted(os.listdir("plots"))
-        
+
         col1, col2 = st.columns(2)
         for i, plot in enumerate(plots):
             if plot.endswith(".png"):
@@ -342,13 +411,50 @@ elif selected_page == "Model Insights":
     """)
     st.markdown('</div>', unsafe_allow_html=True)
 
+    try:
+        model_path = os.path.join(os.path.dirname(INSIGHTS_PATH), 'csat_model.pkl')
+        insights = load_insights(INSIGHTS_PATH, (os.path.getmtime(INSIGHTS_PATH), os.path.getmtime(model_path)))
+    except (FileNotFoundError, OSError):
+        insights = None
+
     st.markdown('<div class="glass-card">', unsafe_allow_html=True)
     st.markdown("### 📈 Performance Metrics")
-    c1, c2, c3 = st.columns(3)
-    with c1:
-        st.metric("Accuracy", "85%", "+2.1%")
-    with c2:
-        st.metric("Precision", "83%", "+1.5%")
-    with c3:
-        st.metric("Recall", "81%", "+3.0%")
-    st.markdown('</div>', unsafe_allow_html=True)
\ No newline at end of file
+    if insights is None:
+        st.info("No model insights found. Run `python main.py` to train the model and compute them.")
+    else:
+        if insights['stale']:
+            st.warning("The model was replaced after these insights were computed; retrain to refresh them.")
+        c1, c2, c3, c4 = st.columns(4)
+        with c1:
+            st.metric("Accuracy", f"{insights['accuracy']:.1%}")
+        with c2:
+            st.metric("Precision (macro)", f"{insights['macro_avg']['precision']:.1%}")
+        with c3:
+            st.metric("Recall (macro)", f"{insights['macro_avg']['recall']:.1%}")
+        with c4:
+            st.metric("F1 (weighted)", f"{insights['weighted_avg']['f1-score']:.1%}")
+        st.caption(f"Held-out test set of {insights['test_rows']:,} tickets, computed {insights['computed_at']}")
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    if insights is not None:
+        col_imp, col_cm = st.columns(2, gap="large")
+        with col_imp:
+            st.markdown('<div class="glass-card">', unsafe_allow_html=True)
+            st.markdown("### 🔑 Feature Importance")
+            importance = pd.DataFrame(insights['permutation_importance']).T
+            if len(importance):
+                st.bar_chart(importance['mean'])
+                st.caption("Accuracy lost when the column is shuffled (permutation importance)")
+            else:
+                st.info("Permutation importance was not computed; train with `python main.py --insights` "
+                        "or run `python -m src.model_insights` to add it.")
+            st.markdown('</div>', unsafe_allow_html=True)
+        with col_cm:
+            st.markdown('<div class="glass-card">', unsafe_allow_html=True)
+            st.markdown("### 🧮 Confusion Matrix")
+            cm = insights['confusion_matrix']
+            st.dataframe(pd.DataFrame(cm['matrix'], index=[f"true {l}" for l in cm['labels']],
+                                      columns=[f"pred {l}" for l in cm['labels']]), use_container_width=True)
+            st.markdown("### 📋 Per-Class Report")
+            st.dataframe(pd.DataFrame(insights['per_class']).T.round(3), use_container_width=True)
+            st.markdown('</div>', unsafe_allow_html=True)
\ No newline at end of file
@@ -0,0 +1,215 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import warnings
+import joblib
+import numpy as np
+import sklearn
+from benchmarks.synthetic_data import SyntheticTicketGenerator
+from src.compiled_scorer import CompiledScorer
+from src.csat_pipelining import CSATPredictor, TARGET_COL
+from src.inference import CSATInference
+from src.profiling import rss_mb
+
+class PeakMemory:
+    """Samples this process's RSS in a background thread and keeps the peak (in MB)."""
+    INTERVAL = 0.01
+
+    def __init__(self):
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    rss_mb = staticmethod(rss_mb)
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, self.rss_mb())
+            self._stop.wait(self.INTERVAL)
+
+    def __enter__(self):
+        self.peak_mb = self.rss_mb()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, self.rss_mb())
+
+class BenchmarkSuite:
+    """
+    Times the training and inference stages on a synthetic export of the given size and
+    records latency percentiles, throughput and peak RSS for each stage.
+    """
+
+    def __init__(self, rows=100_000, seed=0, batch_sizes=(1, 64, 1024), repeats=50, fit_rows=None, work_dir=None):
+        self.rows = rows
+        self.seed = seed
+        self.batch_sizes = batch_sizes
+        self.repeats = repeats
+        # Forest fitting is the slowest stage; cap its rows for the 10M-row scales
+        self.fit_rows = fit_rows
+        self.work_dir = work_dir
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.INFO)
+
+    def _stage(self, results, name, fn, rows):
+        with PeakMemory() as memory:
+            start = time.perf_counter()
+            value = fn()
+            seconds = time.perf_counter() - start
+        results[name] = {
+            'seconds': seconds,
+            'rows': rows,
+            'throughput_rows_s': rows / seconds if seconds else None,
+            'peak_rss_mb': memory.peak_mb,
+        }
+        self.logger.info(f"{name:<22} {seconds:8.2f}s  peak {memory.peak_mb:8.1f} MB")
+        return value
+
+    def run(self):
+        with tempfile.TemporaryDirectory(dir=self.work_dir) as tmp:
+            data_path = os.path.join(tmp, 'synthetic.csv')
+            self.logger.info(f"Generating {self.rows:,} synthetic tickets...")
+            SyntheticTicketGenerator(seed=self.seed).write_csv(data_path, self.rows)
+
+            results = {}
+            predictor = CSATPredictor(data_path, model_dir=os.path.join(tmp, 'models'))
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', UserWarning)
+                df = self._stage(results, 'load_data', predictor.load_data, self.rows)
+                df = self._stage(results, 'feature_engineering', lambda: predictor.feature_engineering(df), self.rows)
+
+            df = df.dropna(subset=[TARGET_COL])
+            train = df if self.fit_rows is None else df.sample(min(self.fit_rows, len(df)), random_state=self.seed)
+            pipeline = predictor.build_pipeline()
+            self._stage(results, 'fit', lambda: pipeline.fit(train, train[TARGET_COL]), len(train))
+
+            os.makedirs(predictor.model_dir, exist_ok=True)
+            joblib.dump(pipeline, predictor.model_path)
+            engine = CSATInference(model_dir=predictor.model_dir)
+            results['predict'] = {f'batch_{b}': self._latency(engine, df, b) for b in self.batch_sizes}
+            results['compiled_single'] = self._compiled_latency(pipeline, df)
+
+        return {'meta': self._meta(), 'stages': results}
+
+    def _latency(self, engine, df, batch_size):
+        rng = np.random.default_rng(self.seed)
+        timings = []
+        with PeakMemory() as memory:
+            for _ in range(self.repeats):
+                start_row = int(rng.integers(0, max(len(df) - batch_size, 1)))
+                batch = df.iloc[start_row:start_row + batch_size]
+                start = time.perf_counter()
+                engine.predict(batch)
+                timings.append(time.perf_counter() - start)
+        timings = np.array(timings) * 1000.0
+        p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+        stats = {
+            'p50_ms': float(p50),
+            'p95_ms': float(p95),
+            'p99_ms': float(p99),
+            'throughput_rows_s': batch_size * len(timings) / (timings.sum() / 1000.0),
+            'peak_rss_mb': memory.peak_mb,
+        }
+        self.logger.info(f"predict batch={batch_size:<6} p50 {p50:7.2f} ms  p99 {p99:7.2f} ms  "
+                         f"{stats['throughput_rows_s']:10.0f} rows/s")
+        return stats
+
+    def _compiled_latency(self, pipeline, df):
+        """Single-record latency of the compiled scorer, the serving path for one dict record."""
+        records = df.sample(min(self.repeats, len(df)), random_state=self.seed).to_dict('records')
+        stats = CompiledScorer(pipeline).latency(records)
+        self.logger.info(f"compiled single        p50 {stats['p50_ms']:7.2f} ms  p99 {stats['p99_ms']:7.2f} ms")
+        return stats
+
+    def _meta(self):
+        return {
+            'rows': self.rows,
+            'seed': self.seed,
+            'fit_rows': self.fit_rows,
+            'repeats': self.repeats,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'sklearn': sklearn.__version__,
+            'cpu_count': os.cpu_count(),
+            'machine': platform.machine(),
+        }
+
+# Metric name suffixes where a larger value is better; everything else is a cost
+HIGHER_IS_BETTER = ('throughput_rows_s',)
+COMPARED = ('seconds', 'p50_ms', 'p95_ms', 'p99_ms', 'peak_rss_mb') + HIGHER_IS_BETTER
+
+def _flatten(stages, prefix=''):
+    flat = {}
+    for key, value in stages.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        elif key in COMPARED and value is not None:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+def compare(baseline, candidate, threshold=0.10):
+    """
+    Compares two result files metric by metric. Returns a list of rows; a row is a
+    regression when the candidate is worse than the baseline by more than threshold.
+    """
+    old, new = _flatten(baseline['stages']), _flatten(candidate['stages'])
+    rows = []
+    for metric in sorted(old.keys() & new.keys()):
+        before, after = old[metric], new[metric]
+        change = (after - before) / before if before else 0.0
+        worse = -change if metric.endswith(HIGHER_IS_BETTER) else change
+        rows.append({'metric': metric, 'baseline': before, 'candidate': after,
+                     'change': change, 'regression': worse > threshold})
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="DeepCSAT performance benchmarks.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help="run the suite and write results as JSON")
+    run.add_argument('--rows', type=int, default=100_000)
+    run.add_argument('--seed', type=int, default=0)
+    run.add_argument('--fit-rows', type=int, default=None, help="cap the rows used for fitting")
+    run.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 64, 1024])
+    run.add_argument('--repeats', type=int, default=50)
+    run.add_argument('--output', default='benchmark_results.json')
+
+    cmp = sub.add_parser('compare', help="flag regressions between two result files")
+    cmp.add_argument('baseline')
+    cmp.add_argument('candidate')
+    cmp.add_argument('--threshold', type=float, default=0.10, help="relative change counted as a regression")
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        suite = BenchmarkSuite(rows=args.rows, seed=args.seed, batch_sizes=tuple(args.batch_sizes),
+                               repeats=args.repeats, fit_rows=args.fit_rows)
+        results = suite.run()
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    rows = compare(baseline, candidate, args.threshold)
+    for row in rows:
+        flag = 'REGRESSION' if row['regression'] else ''
+        print(f"{row['metric']:<40} {row['baseline']:>12.3f} -> {row['candidate']:>12.3f}  {row['change']:+7.1%}  {flag}")
+    if any(row['regression'] for row in rows):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main()
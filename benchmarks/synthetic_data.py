@@ -0,0 +1,125 @@
+import argparse
+import logging
+import numpy as np
+import pandas as pd
+
+# Cardinalities and levels follow the DeepCSAT support export
+CHANNELS = ['Inbound', 'Outcall', 'Email']
+CATEGORIES = ['Returns', 'Order Related', 'Refund Related', 'Product Queries', 'Shopzilla Related',
+              'Payments related', 'Feedback', 'Cancellation', 'Offers & Cashback', 'Others',
+              'App/website', 'Onboarding related']
+SUB_CATEGORIES = ['Reverse Pickup Enquiry', 'Delayed', 'Order status enquiry', 'Product Specific Information',
+                  'Installation/demo', 'Refund Enquiry', 'Return request', 'Wrong', 'Missing',
+                  'Not Needed', 'Life Insurance', 'Fraudulent User', 'Exchange / Replacement',
+                  'Invoice request', 'UnProfessional Behaviour'] + [f'Sub-category {i}' for i in range(15, 57)]
+PRODUCT_CATEGORIES = ['Electronics', 'LifeStyle', 'Books & General merchandise', 'Mobile', 'Home',
+                      'Home Appliences', 'Furniture', 'Affiliates', 'GiftCard']
+CITIES = ['HYDERABAD', 'NEW DELHI', 'PUNE', 'MUMBAI', 'BANGALORE', 'CHENNAI', 'KOLKATA', 'LUCKNOW']
+MANAGERS = ['John Smith', 'Michael Lee', 'Jennifer Nguyen', 'Emily Chen', 'William Kim', 'Olivia Tan']
+TENURE_BUCKETS = ['On Job Training', '>90', '0-30', '31-60', '61-90']
+SHIFTS = ['Morning', 'Evening', 'Split', 'Afternoon', 'Night']
+N_AGENTS = 1371
+N_SUPERVISORS = 40
+
+# Remark fragments; tickets that score low draw from the negative pool more often
+POSITIVE = ['good', 'very good', 'thank you', 'excellent service', 'nice', 'helpful agent',
+            'issue resolved quickly', 'great support', 'satisfied', 'thanks for the quick help']
+NEGATIVE = ['very bad', 'not resolved', 'worst service', 'no response from the team', 'poor',
+            'agent was rude', 'still waiting for refund', 'useless', 'pathetic experience',
+            'my issue is not solved even after many calls']
+
+# Share of missing values per column in the real export
+MISSING = {
+    'Customer Remarks': 0.66,
+    'order_date_time': 0.80,
+    'Customer_City': 0.80,
+    'Product_category': 0.80,
+    'Item_price': 0.80,
+    'connected_handling_time': 0.97,
+}
+CSAT_LEVELS = np.array([1, 2, 3, 4, 5])
+CSAT_PROBS = np.array([0.13, 0.015, 0.03, 0.13, 0.695])
+
+class SyntheticTicketGenerator:
+    """
+    Seeded generator for tickets with exactly the columns CSATPredictor reads from the
+    DeepCSAT export. Rows are produced in blocks so that multi-million-row files can be
+    written with bounded memory. CSAT Score is correlated with the remark sentiment and
+    the response delay so that models have some signal to learn.
+    """
+
+    def __init__(self, seed=0, start='2023-07-28', days=40):
+        self.seed = seed
+        self.start = pd.Timestamp(start)
+        self.days = days
+
+    def generate(self, n_rows, offset=0):
+        """Returns rows [offset, offset + n_rows) as a DataFrame; the same offset gives the same rows."""
+        rng = np.random.default_rng([self.seed, offset])
+        ids = np.arange(offset, offset + n_rows)
+
+        csat = rng.choice(CSAT_LEVELS, n_rows, p=CSAT_PROBS)
+        unhappy = csat <= 2
+
+        reported = self.start + pd.to_timedelta(rng.integers(0, self.days * 1440, n_rows), unit='m')
+        # Unhappy customers tend to have waited longer for a response
+        delay = rng.exponential(np.where(unhappy, 900.0, 120.0)).astype(np.int64)
+        responded = reported + pd.to_timedelta(delay, unit='m')
+        ordered = reported - pd.to_timedelta(rng.integers(1, 30 * 1440, n_rows), unit='m')
+
+        df = pd.DataFrame({
+            'Unique id': [f'{self.seed:04x}-{i:012x}' for i in ids],
+            'channel_name': rng.choice(CHANNELS, n_rows, p=[0.79, 0.17, 0.04]),
+            'category': rng.choice(CATEGORIES, n_rows),
+            'Sub-category': rng.choice(SUB_CATEGORIES, n_rows),
+            'Customer Remarks': self._remarks(rng, unhappy),
+            'Order_id': [f'{i:08d}-ord' for i in ids],
+            'order_date_time': ordered.strftime('%d/%m/%Y %H:%M'),
+            'Issue_reported at': reported.strftime('%d/%m/%Y %H:%M'),
+            'issue_responded': responded.strftime('%d/%m/%Y %H:%M'),
+            'Survey_response_Date': responded.strftime('%d-%b-%y'),
+            'Customer_City': rng.choice(CITIES, n_rows),
+            'Product_category': rng.choice(PRODUCT_CATEGORIES, n_rows),
+            'Item_price': rng.lognormal(7.5, 1.3, n_rows).round(),
+            'connected_handling_time': rng.normal(460, 120, n_rows).clip(0).round(),
+            'Agent_name': [f'Agent {i}' for i in rng.integers(0, N_AGENTS, n_rows)],
+            'Supervisor': [f'Supervisor {i}' for i in rng.integers(0, N_SUPERVISORS, n_rows)],
+            'Manager': rng.choice(MANAGERS, n_rows),
+            'Tenure Bucket': rng.choice(TENURE_BUCKETS, n_rows),
+            'Agent Shift': rng.choice(SHIFTS, n_rows),
+            'CSAT Score': csat,
+        })
+        for col, share in MISSING.items():
+            df[col] = df[col].mask(rng.random(n_rows) < share)
+        return df
+
+    @staticmethod
+    def _remarks(rng, unhappy):
+        n_rows = len(unhappy)
+        negative = rng.random(n_rows) < np.where(unhappy, 0.8, 0.1)
+        first = np.where(negative, rng.choice(NEGATIVE, n_rows), rng.choice(POSITIVE, n_rows))
+        # About a third of remarks are two fragments long
+        second = np.where(negative, rng.choice(NEGATIVE, n_rows), rng.choice(POSITIVE, n_rows))
+        longer = rng.random(n_rows) < 0.35
+        return pd.Series(np.where(longer, np.char.add(np.char.add(first.astype(str), ', '), second.astype(str)), first),
+                         dtype=object)
+
+    def write_csv(self, path, n_rows, block_rows=250_000):
+        """Writes n_rows tickets to path in blocks of block_rows."""
+        for offset in range(0, n_rows, block_rows):
+            block = self.generate(min(block_rows, n_rows - offset), offset)
+            block.to_csv(path, mode='w' if offset == 0 else 'a', header=offset == 0, index=False)
+        return path
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic DeepCSAT support export.")
+    parser.add_argument('output')
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    SyntheticTicketGenerator(seed=args.seed).write_csv(args.output, args.rows)
+    logging.info(f"Wrote {args.rows:,} synthetic tickets to {args.output}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main()
@@ -1,14 +1,50 @@
+import argparse
 import logging
 import os
+import numpy as np
+from src.backend_comparison import BackendComparison
 from src.csat_pipelining import CSATPredictor
+from src.cross_validation import CrossValidator
+from src.profiling import PROFILER
 
 # Configure global logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the DeepCSAT model.")
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help="stream the CSV in chunks of this many rows and engineer them in parallel")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes for chunked feature engineering")
+    parser.add_argument('--sparse', action='store_true', help="keep one-hot and TF-IDF features sparse (CSR) end to end")
+    parser.add_argument('--float32', action='store_true', help="build the feature matrix in float32")
+    parser.add_argument('--backend', choices=list(CSATPredictor.BACKENDS), default='forest',
+                        help="'hist_gb' boosts on native categoricals; 'streaming' trains a hashing + SGD model out of core in chunks")
+    parser.add_argument('--compare-backends', action='store_true',
+                        help="train 'forest' and 'hist_gb' on one split and print fit time, size, latency and accuracy")
+    parser.add_argument('--memory-budget', type=float, default=None, metavar='MB',
+                        help="train from compact float32 data and cap per-tree bootstrap samples to fit this many MB")
+    parser.add_argument('--cv', choices=['stratified', 'temporal'], default=None,
+                        help="cross-validate over --folds folds in parallel instead of training")
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--profile', action='store_true',
+                        help="record per-stage wall time and peak memory; written to --profile-dir")
+    parser.add_argument('--profile-dir', default='profiles')
+    parser.add_argument('--insights', action='store_true',
+                        help="also compute permutation importance for the Model Insights page (slower)")
+    parser.add_argument('--matrix-report', action='store_true',
+                        help="print feature matrix sizes for dense and sparse mode instead of training")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    if args.profile:
+        PROFILER.enable()
+
     # Define paths relative to the root directory
     DATA_PATH = os.path.join("data", "_e_Commerce_Customer_support_data.csv")
     MODEL_DIR = "models"
+    # Engineered features are cached here and rebuilt only when the CSV changes
+    CACHE_DIR = os.path.join("data", "cache")
 
     print("------------------------------------------------")
     print("      DeepCSAT Pipeline Execution Setup")
@@ -22,8 +58,37 @@ def main():
         return
 
     # Initialize and run predictor
-    predictor = CSATPredictor(data_path=DATA_PATH, model_dir=MODEL_DIR)
+    predictor = CSATPredictor(data_path=DATA_PATH, model_dir=MODEL_DIR, cache_dir=CACHE_DIR,
+                              chunk_size=args.chunk_size, n_workers=args.workers,
+                              sparse=args.sparse, dtype=np.float32 if args.float32 else np.float64,
+                              backend=args.backend, memory_budget_mb=args.memory_budget, insights=args.insights)
+    if args.matrix_report:
+        for row in predictor.matrix_report(predictor.load_features()):
+            print(f"{row['mode']:>6} {row['dtype']:>7}  shape={row['shape']}  nnz={row['nnz']}  {row['bytes'] / 1e6:.2f} MB")
+        return
+    if args.compare_backends:
+        for r in BackendComparison(DATA_PATH, model_dir=MODEL_DIR, cache_dir=CACHE_DIR, n_workers=args.workers).run():
+            print(f"{r['backend']:>8}: accuracy {r['accuracy']:.4f}  fit {r['fit_seconds']:.1f}s  "
+                  f"pickle {r['pickle_mb']:.2f} MB  artifact {r['artifact_mb']:.2f} MB  "
+                  f"single p50 {r['single_p50_ms']:.2f} ms  batch {r['batch_us_per_row']:.0f} us/row")
+        return
+    if args.cv:
+        if args.backend == 'streaming':
+            print("ERROR: --cv needs an in-memory backend; the 'streaming' backend cannot be cross-validated.")
+            return
+        if args.memory_budget is not None:
+            logging.warning("--cv trains each fold in float32 but does not cap bootstrap samples to the memory budget")
+        report = CrossValidator(predictor.load_features(), n_splits=args.folds, n_workers=args.workers,
+                                backend=predictor.backend, sparse=predictor.sparse, dtype=predictor.dtype).run(args.cv)
+        for fold in report['folds']:
+            print(f"fold {fold['fold']}: accuracy {fold['accuracy']:.4f}  {fold['seconds']:.1f}s")
+        print(f"{args.cv}: accuracy {report['accuracy_mean']:.4f} +/- {report['accuracy_std']:.4f}")
+        return
     predictor.run()
+    if args.profile:
+        PROFILER.export(os.path.join(args.profile_dir, 'train_profile.json'),
+                        os.path.join(args.profile_dir, 'train_profile.prom'))
+        print(f"Profile written to '{args.profile_dir}'")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,14 +1,41 @@
 from src.inference import CSATInference
+import argparse
+import logging
 import pandas as pd
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Score tickets with the trained DeepCSAT model.")
+    parser.add_argument('--input', help="CSV of raw tickets to score in bulk (omit to score the built-in sample)")
+    parser.add_argument('--output', default='scored.csv', help="predictions file (.csv, or .parquet with pyarrow)")
+    parser.add_argument('--workers', type=int, default=None, help="scoring processes (default: all cores)")
+    parser.add_argument('--chunk-size', type=int, default=100_000, help="rows read and scored per chunk")
+    parser.add_argument('--model-dir', default='models')
+    parser.add_argument('--use-artifact', action='store_true',
+                        help="score with the memory-mapped model artifact (shared across workers)")
+    return parser.parse_args()
+
+def bulk(args):
+    from src.bulk_scoring import BulkScorer
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    try:
+        BulkScorer(args.input, args.output, model_dir=args.model_dir,
+                   n_workers=args.workers, chunk_size=args.chunk_size, use_artifact=args.use_artifact).run()
+    except FileNotFoundError as e:
+        print(f"Error: {e}. Run 'python main.py' to train it first.")
+
 def main():
+    args = parse_args()
+    if args.input:
+        bulk(args)
+        return
+
     print("------------------------------------------------")
     print("      DeepCSAT Inference Test")
     print("------------------------------------------------")
 
     # 1. Initialize Inference Engine
     try:
-        engine = CSATInference()
+        engine = CSATInference(model_dir=args.model_dir)
     except FileNotFoundError:
         print("Error: Model not found. Run 'python main.py' to train it first.")
         return
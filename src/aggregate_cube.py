@@ -0,0 +1,206 @@
+import argparse
+import json
+import logging
+import os
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from src.chunked_features import ChunkedFeatureEngine
+from src.csat_pipelining import SURVEY_DATE_COL, TARGET_COL
+from src.feature_cache import FeatureCache
+
+DIMENSIONS = ['channel_name', 'category', 'Manager', 'Agent Shift', 'Tenure Bucket', 'day']
+CSAT_LEVELS = [1, 2, 3, 4, 5]
+# Response-time histogram: bin 0 holds negative delays, the last bin everything past 60 days.
+# Log spacing keeps percentile error within one bin (about 9%) at any scale.
+RT_EDGES = np.concatenate([[0.0], np.geomspace(1.0, 60 * 1440.0, 127)])
+RT_BINS = [f'rt_{i:03d}' for i in range(len(RT_EDGES) + 1)]
+MEASURES = ['tickets', 'rated', 'csat_sum'] + [f'csat_{c}' for c in CSAT_LEVELS] + RT_BINS
+
+class AggregateCube:
+    """
+    Pre-aggregated ticket statistics for the Analytics Dashboard.
+
+    One row per combination of DIMENSIONS that occurs in the data. Every measure is
+    additive: ticket counts, CSAT sums and per-score counts, and a fixed log-binned
+    histogram of response times. Any filter or regrouping is therefore a sum over cells,
+    percentiles come from the summed histogram, and new data merges in without revisiting
+    old rows. The cube is stored as a compressed .npz of columns, with dimensions
+    dictionary-encoded.
+    """
+
+    def __init__(self, cells=None, sources=None):
+        self.cells = cells if cells is not None else pd.DataFrame(columns=DIMENSIONS + MEASURES)
+        # Content hashes of the CSVs already folded in, so an update is never counted twice
+        self.sources = sources or []
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.INFO)
+
+    @staticmethod
+    def aggregate(df):
+        """Builds the cells for an engineered frame in one vectorised group-by."""
+        n = len(df)
+        keys = pd.DataFrame({dim: df[dim].astype(object).where(df[dim].notna(), 'Unknown')
+                             for dim in DIMENSIONS if dim != 'day'})
+        keys['day'] = pd.to_datetime(df[SURVEY_DATE_COL]).dt.normalize().to_numpy()
+
+        csat = pd.to_numeric(df[TARGET_COL], errors='coerce').to_numpy()
+        measures = np.zeros((n, len(MEASURES)), dtype=np.int64)
+        measures[:, 0] = 1
+        rated = ~np.isnan(csat)
+        measures[:, 1] = rated
+        measures[:, 2] = np.where(rated, csat, 0)
+        for j, level in enumerate(CSAT_LEVELS):
+            measures[:, 3 + j] = csat == level
+
+        minutes = df['response_time_minutes'].to_numpy(dtype=np.float64)
+        timed = ~np.isnan(minutes)
+        bins = np.searchsorted(RT_EDGES, minutes[timed], side='right')
+        measures[np.flatnonzero(timed), 3 + len(CSAT_LEVELS) + bins] = 1
+
+        frame = pd.concat([keys.reset_index(drop=True), pd.DataFrame(measures, columns=MEASURES)], axis=1)
+        return frame.groupby(DIMENSIONS, dropna=False, observed=True, sort=False).sum().reset_index()
+
+    def add(self, df, source=None):
+        """Folds an engineered frame into the cube. Returns False if source was already added."""
+        if source is not None and source in self.sources:
+            self.logger.info(f"Source {source[:12]} is already in the cube; skipping.")
+            return False
+        cells = self.aggregate(df)
+        if len(self.cells):
+            cells = pd.concat([self.cells, cells], ignore_index=True)
+            cells = cells.groupby(DIMENSIONS, dropna=False, observed=True, sort=False).sum().reset_index()
+        self.cells = cells
+        if source is not None:
+            self.sources.append(source)
+        self.logger.info(f"Cube has {len(self.cells):,} cells after adding {len(df):,} tickets")
+        return True
+
+    def add_csv(self, data_path, chunk_size=200_000, n_workers=None):
+        """Streams a raw CSV through the chunked feature engine into the cube."""
+        source = FeatureCache(cache_dir=None, version=0).source_hash(data_path)
+        if source in self.sources:
+            self.logger.info(f"{data_path} is already in the cube; skipping.")
+            return False
+        engine = ChunkedFeatureEngine(data_path, chunk_size=chunk_size, n_workers=n_workers,
+                                      columns=DIMENSIONS[:-1] + [SURVEY_DATE_COL, TARGET_COL, 'response_time_minutes'])
+        for chunk in engine.iter_chunks():
+            self.add(chunk)
+        self.sources.append(source)
+        return True
+
+    def save(self, path):
+        """Writes the cube as a compressed .npz, replacing path atomically."""
+        columns = {}
+        for i, dim in enumerate(DIMENSIONS):
+            if dim == 'day':
+                columns[f'dim_{i}'] = self.cells[dim].to_numpy(dtype='datetime64[ns]').view(np.int64)
+                continue
+            codes, uniques = pd.factorize(self.cells[dim])
+            columns[f'dim_{i}'] = codes.astype(np.int32)
+            columns[f'dim_{i}_values'] = np.array([str(u) for u in uniques])
+        for name in MEASURES:
+            # Histogram counts are small; the smallest integer dtype keeps the file compact
+            columns[name] = pd.to_numeric(self.cells[name], downcast='unsigned').to_numpy()
+        meta = {'dimensions': DIMENSIONS, 'rt_edges': RT_EDGES.tolist(), 'sources': self.sources,
+                'built_at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        columns['meta'] = np.array(json.dumps(meta))
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp-{os.getpid()}.npz"
+        np.savez_compressed(tmp_path, **columns)
+        os.replace(tmp_path, path)
+        self.logger.info(f"Cube saved to '{path}' ({os.path.getsize(path) / 1e6:.2f} MB, {len(self.cells):,} cells)")
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Aggregate cube not found at {path}")
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            if meta['dimensions'] != DIMENSIONS or not np.allclose(meta['rt_edges'], RT_EDGES):
+                raise ValueError(f"Cube at {path} was built with a different layout; rebuild it.")
+            columns = {}
+            for i, dim in enumerate(DIMENSIONS):
+                if dim == 'day':
+                    columns[dim] = data[f'dim_{i}'].view('datetime64[ns]')
+                else:
+                    columns[dim] = pd.Categorical.from_codes(data[f'dim_{i}'], categories=data[f'dim_{i}_values'])
+            for name in MEASURES:
+                columns[name] = data[name].astype(np.int64)
+        return cls(pd.DataFrame(columns), meta['sources'])
+
+    def filter(self, filters=None, start=None, end=None):
+        """Cells whose dimensions take one of the listed values, e.g. {'Agent Shift': ['Night']}, between start and end days."""
+        mask = np.ones(len(self.cells), dtype=bool)
+        for dim, wanted in (filters or {}).items():
+            if wanted:
+                mask &= self.cells[dim].isin(wanted).to_numpy()
+        if start is not None:
+            mask &= (self.cells['day'] >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            mask &= (self.cells['day'] <= pd.Timestamp(end)).to_numpy()
+        return self.cells[mask]
+
+    @staticmethod
+    def summarize(cells, by=None, percentiles=(50, 90, 99)):
+        """
+        Sums cells per value of the by dimension(s), or overall when by is None, and derives
+        the CSAT mean, score shares and response-time percentiles in minutes.
+        """
+        if by is None:
+            totals = cells[MEASURES].sum().to_frame().T
+        else:
+            totals = cells.groupby(by, observed=True)[MEASURES].sum()
+        rated = totals['rated'].replace(0, np.nan)
+        summary = pd.DataFrame({'tickets': totals['tickets'], 'csat_mean': totals['csat_sum'] / rated})
+        for level in CSAT_LEVELS:
+            summary[f'share_{level}'] = totals[f'csat_{level}'] / rated
+        hist = totals[RT_BINS].to_numpy(dtype=np.float64)
+        for q, values in zip(percentiles, histogram_percentiles(hist, percentiles).T):
+            summary[f'rt_p{q}'] = values
+        return summary
+
+def histogram_percentiles(hist, percentiles):
+    """Percentiles (in minutes) per row of a RT_BINS histogram matrix, interpolated inside the bin."""
+    # Bin i spans [lower[i], upper[i]); the open-ended outer bins are pinned to their finite edge
+    lower = np.concatenate([[RT_EDGES[0]], RT_EDGES])
+    upper = np.concatenate([RT_EDGES, [RT_EDGES[-1]]])
+    cumulative = np.cumsum(hist, axis=1)
+    totals = cumulative[:, -1:]
+    out = np.full((len(hist), len(percentiles)), np.nan)
+    for j, q in enumerate(percentiles):
+        target = totals[:, 0] * q / 100.0
+        idx = np.minimum((cumulative < target[:, None]).sum(axis=1), hist.shape[1] - 1)
+        rows = np.arange(len(hist))
+        before = np.where(idx > 0, cumulative[rows, idx - 1], 0.0)
+        inside = hist[rows, idx]
+        frac = np.divide(target - before, inside, out=np.zeros(len(hist)), where=inside > 0)
+        values = lower[idx] + frac * (upper[idx] - lower[idx])
+        out[:, j] = np.where(totals[:, 0] > 0, values, np.nan)
+    return out
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or update the dashboard aggregate cube.")
+    parser.add_argument('command', choices=['build', 'update'],
+                        help="'build' starts a new cube; 'update' folds new CSVs into the existing one")
+    parser.add_argument('data_paths', nargs='+')
+    parser.add_argument('--cube', default=os.path.join("data", "csat_cube.npz"))
+    parser.add_argument('--chunk-size', type=int, default=200_000)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    cube = AggregateCube.load(args.cube) if args.command == 'update' else AggregateCube()
+    start = time.perf_counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        for path in args.data_paths:
+            cube.add_csv(path, chunk_size=args.chunk_size, n_workers=args.workers)
+    cube.save(args.cube)
+    logging.info(f"Cube {args.command} finished in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main()
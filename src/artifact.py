@@ -0,0 +1,215 @@
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import os
+import shutil
+import time
+import uuid
+import joblib
+import numpy as np
+import sklearn
+from sklearn.pipeline import Pipeline
+from src.forest_engine import FlatForest
+
+# Bump whenever the on-disk layout changes; older artifacts are rejected on load.
+ARTIFACT_VERSION = 1
+
+class StaleArtifactError(ValueError):
+    """Raised when an artifact was written by an incompatible layout, feature or library version."""
+
+class ModelArtifact:
+    """
+    Fast-loading model format. A forest is stored as the flattened FlatForest arrays,
+    one uncompressed .npy file each, and loaded with mmap_mode='r' so every worker
+    process maps the same page-cache copy. Other classifiers (the gradient-boosting and
+    streaming backends, a few MB at most) are stored as a joblib file instead. The fitted
+    preprocessor (imputers, encoder categories, TF-IDF idf) is a few KB and stays a joblib
+    file. meta.json records the classifier format and the versions and schema the
+    artifact was built against.
+    """
+    META_FILE = 'meta.json'
+    PREPROCESSOR_FILE = 'preprocessor.joblib'
+    CLASSIFIER_FILE = 'classifier.joblib'
+
+    def __init__(self, artifact_dir):
+        self.artifact_dir = artifact_dir
+        self.meta = None
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.INFO)
+
+    @staticmethod
+    def dir_for(model_path):
+        """models/csat_model.pkl -> models/csat_model"""
+        return os.path.splitext(model_path)[0]
+
+    @staticmethod
+    def _schema():
+        from src.csat_pipelining import FEATURE_VERSION, NUMERIC_FEATURES, CATEGORICAL_FEATURES, TEXT_FEATURE
+        return {
+            'feature_version': FEATURE_VERSION,
+            'numeric': NUMERIC_FEATURES,
+            'categorical': CATEGORICAL_FEATURES,
+            'text': TEXT_FEATURE,
+        }
+
+    @staticmethod
+    def _sklearn_series():
+        return '.'.join(sklearn.__version__.split('.')[:2])
+
+    @staticmethod
+    def is_forest(classifier):
+        return hasattr(classifier, 'estimators_') and all(hasattr(e, 'tree_') for e in classifier.estimators_)
+
+    def save(self, pipeline):
+        """Writes the pipeline as an artifact; forests as memory-mappable arrays, other classifiers via joblib."""
+        classifier = pipeline[-1]
+        tmp_dir = f"{self.artifact_dir}.tmp-{os.getpid()}"
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        arrays = {}
+        if self.is_forest(classifier):
+            forest = FlatForest(classifier)
+            for name, values in forest.to_arrays().items():
+                values = np.ascontiguousarray(values)
+                np.save(os.path.join(tmp_dir, f"{name}.npy"), values)
+                arrays[name] = {'dtype': values.dtype.str, 'shape': list(values.shape)}
+            kind, size_mb = 'flat_forest', forest.nbytes / 1e6
+        else:
+            classifier_path = os.path.join(tmp_dir, self.CLASSIFIER_FILE)
+            joblib.dump(classifier, classifier_path)
+            kind, size_mb = 'joblib', os.path.getsize(classifier_path) / 1e6
+        joblib.dump(pipeline[:-1], os.path.join(tmp_dir, self.PREPROCESSOR_FILE))
+
+        self.meta = {
+            'artifact_version': ARTIFACT_VERSION,
+            'model_id': uuid.uuid4().hex,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'sklearn_version': sklearn.__version__,
+            'classifier': kind,
+            'classifier_type': type(classifier).__name__,
+            'n_features': int(classifier.n_features_in_),
+            'schema': self._schema(),
+            'arrays': arrays,
+        }
+        with open(os.path.join(tmp_dir, self.META_FILE), 'w') as f:
+            json.dump(self.meta, f, indent=2)
+
+        # Workers that still map the old files keep them alive until they reload
+        shutil.rmtree(self.artifact_dir, ignore_errors=True)
+        os.replace(tmp_dir, self.artifact_dir)
+        self.logger.info(f"Model artifact saved to '{self.artifact_dir}' "
+                         f"({type(classifier).__name__}, {size_mb:.1f} MB as {kind})")
+        return True
+
+    def read_meta(self):
+        """Reads and validates meta.json. Raises StaleArtifactError if the artifact cannot be used."""
+        meta_path = os.path.join(self.artifact_dir, self.META_FILE)
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"Model artifact not found at {self.artifact_dir}")
+        with open(meta_path) as f:
+            meta = json.load(f)
+
+        if meta.get('artifact_version') != ARTIFACT_VERSION:
+            raise StaleArtifactError(f"Artifact version {meta.get('artifact_version')} != {ARTIFACT_VERSION}")
+        if meta.get('schema') != self._schema():
+            raise StaleArtifactError("Artifact was built for a different feature schema or FEATURE_VERSION")
+        saved_series = '.'.join(str(meta.get('sklearn_version', '')).split('.')[:2])
+        if saved_series != self._sklearn_series():
+            raise StaleArtifactError(f"Artifact was built with scikit-learn {meta.get('sklearn_version')}, "
+                                     f"running {sklearn.__version__}")
+        self.meta = meta
+        return meta
+
+    def load(self):
+        """Returns the Pipeline; a forest classifier comes back as a FlatForest over memory-mapped arrays."""
+        meta = self.read_meta()
+        preprocessor = joblib.load(os.path.join(self.artifact_dir, self.PREPROCESSOR_FILE))
+        # Artifacts written before other backends existed hold forests only
+        if meta.get('classifier', 'flat_forest') == 'joblib':
+            classifier = joblib.load(os.path.join(self.artifact_dir, self.CLASSIFIER_FILE))
+            return Pipeline(preprocessor.steps + [('classifier', classifier)])
+
+        arrays = {}
+        for name, spec in meta['arrays'].items():
+            values = np.load(os.path.join(self.artifact_dir, f"{name}.npy"), mmap_mode='r', allow_pickle=False)
+            if values.dtype.str != spec['dtype'] or list(values.shape) != spec['shape']:
+                raise StaleArtifactError(f"Array '{name}' does not match the artifact header")
+            arrays[name] = values
+        # classes_ is tiny and is used for label lookups; keep an ordinary in-memory copy
+        arrays['classes_'] = np.array(arrays['classes_'])
+
+        forest = FlatForest.from_arrays(arrays, meta['n_features'])
+        return Pipeline(preprocessor.steps + [('classifier', forest)])
+
+def _memory_kb():
+    """RSS, PSS and private memory of this process in kB (PSS/private need Linux smaps_rollup)."""
+    usage = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty'):
+                    usage[key] = int(value.split()[0])
+        usage['Private'] = usage.pop('Private_Clean', 0) + usage.pop('Private_Dirty', 0)
+    except OSError:
+        import resource
+        usage['Rss'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage
+
+def _benchmark_worker(fmt, model_path, barrier, results):
+    start = time.perf_counter()
+    if fmt == 'pickle':
+        pipeline = joblib.load(model_path)
+    else:
+        pipeline = ModelArtifact(ModelArtifact.dir_for(model_path)).load()
+    load_s = time.perf_counter() - start
+
+    # Touch every tree node once so the whole model is resident
+    classifier = pipeline[-1]
+    if isinstance(classifier, FlatForest):
+        for name in FlatForest.ARRAYS:
+            np.asarray(getattr(classifier, name)).sum()
+    barrier.wait()
+    results.put({'format': fmt, 'load_s': load_s, **_memory_kb()})
+    barrier.wait()
+
+def benchmark(model_path, workers=4):
+    """Loads the model in `workers` concurrent processes per format and reports load time and memory."""
+    ctx = mp.get_context('spawn')
+    report = []
+    for fmt in ('pickle', 'artifact'):
+        barrier, results = ctx.Barrier(workers), ctx.Queue()
+        procs = [ctx.Process(target=_benchmark_worker, args=(fmt, model_path, barrier, results)) for _ in range(workers)]
+        for p in procs:
+            p.start()
+        rows = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+        summary = {
+            'format': fmt,
+            'workers': workers,
+            'load_s_mean': float(np.mean([r['load_s'] for r in rows])),
+            'rss_mb_per_worker': float(np.mean([r['Rss'] for r in rows])) / 1024,
+            'pss_mb_per_worker': float(np.mean([r.get('Pss', r['Rss']) for r in rows])) / 1024,
+            'private_mb_per_worker': float(np.mean([r.get('Private', r['Rss']) for r in rows])) / 1024,
+        }
+        report.append(summary)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or benchmark the memory-mappable model artifact.")
+    parser.add_argument('command', choices=['build', 'benchmark'])
+    parser.add_argument('--model', default=os.path.join('models', 'csat_model.pkl'))
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        ModelArtifact(ModelArtifact.dir_for(args.model)).save(joblib.load(args.model))
+    else:
+        for row in benchmark(args.model, args.workers):
+            print(json.dumps(row))
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,117 @@
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+import warnings
+import numpy as np
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+from src.artifact import ModelArtifact
+from src.csat_pipelining import CSATPredictor, NUMERIC_FEATURES, CATEGORICAL_FEATURES, TEXT_FEATURE, TARGET_COL
+from src.inference import CSATInference
+
+def _dir_bytes(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+class BackendComparison:
+    """
+    Trains each in-memory backend of CSATPredictor on the same split and measures what
+    it costs to serve: fit time, accuracy, pickle and artifact size, and latency through
+    CSATInference exactly as serving loads it (memory-mapped artifact, compiled single-row
+    scoring). Models are saved to a temporary directory; only the comparison itself is
+    written to model_dir, as REPORT_FILE.
+    """
+    REPORT_FILE = 'csat_model.backends.json'
+
+    def __init__(self, data_path, model_dir='models', cache_dir=None, backends=('forest', 'hist_gb'), n_single=500,
+                 batch_rows=5_000, n_workers=None):
+        self.predictor = CSATPredictor(data_path, model_dir=model_dir, cache_dir=cache_dir, n_workers=n_workers)
+        self.backends = backends
+        self.n_single = n_single
+        self.batch_rows = batch_rows
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.INFO)
+
+    def measure(self, backend, X_train, X_test):
+        """Fits, saves and serves one backend; returns its row of the comparison."""
+        predictor = CSATPredictor(self.predictor.data_path, backend=backend)
+        pipeline = predictor.build_pipeline()
+        start = time.perf_counter()
+        pipeline.fit(X_train, X_train[TARGET_COL])
+        fit_seconds = time.perf_counter() - start
+        accuracy = accuracy_score(X_test[TARGET_COL], pipeline.predict(X_test))
+
+        with tempfile.TemporaryDirectory() as model_dir:
+            predictor.model_dir = model_dir
+            predictor.model_path = os.path.join(model_dir, 'csat_model.pkl')
+            predictor.model = pipeline
+            predictor.save_model()
+            pickle_bytes = os.path.getsize(predictor.model_path)
+            artifact_bytes = _dir_bytes(ModelArtifact.dir_for(predictor.model_path))
+
+            engine = CSATInference(model_dir=model_dir, use_artifact=True, compiled=True)
+            records = X_test[NUMERIC_FEATURES + CATEGORICAL_FEATURES + [TEXT_FEATURE]].head(self.n_single).to_dict('records')
+            for record in records[:20]:
+                engine.predict(record)
+            latencies = []
+            for record in records:
+                start = time.perf_counter()
+                engine.predict(record)
+                latencies.append(time.perf_counter() - start)
+            batch = X_test.head(self.batch_rows)
+            start = time.perf_counter()
+            engine.predict_batch(batch)
+            batch_seconds = time.perf_counter() - start
+
+        result = {
+            'backend': backend,
+            'fit_seconds': fit_seconds,
+            'accuracy': accuracy,
+            'pickle_mb': pickle_bytes / 1e6,
+            'artifact_mb': artifact_bytes / 1e6,
+            'compiled': engine.scorer is not None,
+            'single_p50_ms': float(np.percentile(latencies, 50)) * 1e3,
+            'single_p99_ms': float(np.percentile(latencies, 99)) * 1e3,
+            'batch_us_per_row': batch_seconds / len(batch) * 1e6,
+        }
+        self.logger.info(f"{backend}: accuracy {accuracy:.4f}, fit {fit_seconds:.1f}s, "
+                         f"single p50 {result['single_p50_ms']:.2f} ms, batch {result['batch_us_per_row']:.0f} us/row")
+        return result
+
+    def run(self):
+        """Splits like CSATPredictor.run(), measures every backend on that split and saves the report."""
+        df = self.predictor.load_features().dropna(subset=[TARGET_COL])
+        X_train, X_test = train_test_split(df, test_size=0.2, random_state=42)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            results = [self.measure(backend, X_train, X_test) for backend in self.backends]
+        os.makedirs(self.predictor.model_dir, exist_ok=True)
+        with open(os.path.join(self.predictor.model_dir, self.REPORT_FILE), 'w') as f:
+            json.dump(results, f, indent=2)
+        return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare CSAT model backends on one train/test split.")
+    parser.add_argument('--data', default=os.path.join("data", "_e_Commerce_Customer_support_data.csv"))
+    parser.add_argument('--model-dir', default='models', help="where the comparison report is written")
+    parser.add_argument('--cache-dir', default=os.path.join("data", "cache"))
+    parser.add_argument('--backends', nargs='+', default=['forest', 'hist_gb'], choices=['forest', 'hist_gb'])
+    parser.add_argument('--single', type=int, default=500, help="records scored one at a time for latency")
+    parser.add_argument('--batch-rows', type=int, default=5_000)
+    args = parser.parse_args()
+
+    comparison = BackendComparison(args.data, model_dir=args.model_dir, cache_dir=args.cache_dir, backends=args.backends,
+                                   n_single=args.single, batch_rows=args.batch_rows)
+    results = comparison.run()
+    print(f"{'backend':>8} {'accuracy':>8} {'fit s':>7} {'pickle MB':>9} {'artifact MB':>11} "
+          f"{'p50 ms':>7} {'p99 ms':>7} {'batch us/row':>12}")
+    for r in results:
+        print(f"{r['backend']:>8} {r['accuracy']:>8.4f} {r['fit_seconds']:>7.1f} {r['pickle_mb']:>9.2f} "
+              f"{r['artifact_mb']:>11.2f} {r['single_p50_ms']:>7.2f} {r['single_p99_ms']:>7.2f} "
+              f"{r['batch_us_per_row']:>12.0f}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main()
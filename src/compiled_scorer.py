@@ -0,0 +1,227 @@
+import argparse
+import logging
+import math
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OrdinalEncoder
+from src.forest_engine import FlatBooster, FlatForest
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value)) or value is pd.NA
+
+def _to_float(value):
+    """Scalar equivalent of pd.to_numeric(errors='coerce')."""
+    if _is_missing(value):
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+class CompiledScorer:
+    """
+    Scores single records against a fitted CSAT pipeline without pandas or the
+    ColumnTransformer. The fitted state (imputer medians, scaler mean/scale, one-hot or
+    ordinal category maps, TF-IDF vocabulary and idf) is copied into plain arrays and
+    dicts, and forests are walked by FlatForest in one compiled call. Works for pipelines
+    produced by CSATPredictor.build_pipeline for the 'forest' and 'hist_gb' backends;
+    other classifiers are scored through predict_proba.
+    """
+
+    def __init__(self, pipeline):
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.INFO)
+
+        preprocessor = pipeline.named_steps['preprocessor']
+        classifier = pipeline.named_steps['classifier']
+        num = preprocessor.named_transformers_.get('num')
+        passthrough = dict((name, t) for name, t, _ in preprocessor.transformers).get('num') == 'passthrough'
+        if not passthrough and (not isinstance(num, Pipeline) or 'imputer' not in num.named_steps):
+            raise ValueError("Preprocessor was not built by CSATPredictor.build_pipeline; cannot compile it")
+        self.classes_ = classifier.classes_
+        self.classifier = classifier
+
+        self.numeric_cols = list(self._columns(preprocessor, 'num'))
+        # Passed-through numerics ('hist_gb') keep their missing values and scale
+        self.medians = None
+        if not passthrough:
+            self.medians = num.named_steps['imputer'].statistics_.astype(np.float64)
+            scaler = num.named_steps['scaler']
+            self.mean = scaler.mean_ if scaler.with_mean else np.zeros(len(self.numeric_cols))
+            self.scale = scaler.scale_ if scaler.with_std else np.ones(len(self.numeric_cols))
+
+        cat = preprocessor.named_transformers_['cat']
+        self.categorical_cols = list(self._columns(preprocessor, 'cat'))
+        offset = len(self.numeric_cols)
+        self.category_index = []
+        self.category_codes = None
+        self.fill_value = cat.named_steps['imputer'].fill_value
+        if isinstance(cat[-1], OrdinalEncoder):
+            # One feature per column holding the category's code; unknown categories are NaN
+            self.category_codes = self._ordinal_codes(cat[-1], self.categorical_cols)
+            offset += len(self.categorical_cols)
+        else:
+            # One dict per column mapping category -> absolute index in the feature vector
+            for categories in cat.named_steps['onehot'].categories_:
+                self.category_index.append({value: offset + i for i, value in enumerate(categories)})
+                offset += len(categories)
+
+        tfidf = preprocessor.named_transformers_['txt']
+        self.text_col = self._columns(preprocessor, 'txt')
+        self.analyzer = tfidf.build_analyzer()
+        self.vocabulary = {term: offset + i for term, i in tfidf.vocabulary_.items()}
+        self.idf = np.zeros(offset + len(tfidf.vocabulary_))
+        self.idf[offset:] = tfidf.idf_
+        self.sublinear_tf = tfidf.sublinear_tf
+        self.norm = tfidf.norm
+        self.text_offset = offset
+        self.n_features = offset + len(tfidf.vocabulary_)
+
+        self.forest = None
+        if hasattr(classifier, 'estimators_') and all(hasattr(e, 'tree_') for e in classifier.estimators_):
+            # One Tree.apply call for the whole forest instead of one per tree
+            self.forest = FlatForest(classifier)
+            # Scoring a blank row builds the forest's router now rather than on the first record
+            self.forest.predict_proba_one(np.zeros(self.n_features))
+        elif isinstance(classifier, HistGradientBoostingClassifier):
+            # sklearn dispatches one OpenMP loop per tree and class, about 25 us each for one row
+            self.classifier = FlatBooster(classifier)
+
+    @classmethod
+    def from_file(cls, model_path):
+        return cls(joblib.load(model_path))
+
+    @staticmethod
+    def _columns(preprocessor, name):
+        for transformer_name, _, columns in preprocessor.transformers_:
+            if transformer_name == name:
+                return columns
+        raise KeyError(f"Transformer '{name}' not found in the preprocessor")
+
+    @staticmethod
+    def _ordinal_codes(encoder, columns):
+        """Per column, category -> code as the encoder assigns it (infrequent categories share one)."""
+        known = [list(categories) for categories in encoder.categories_]
+        longest = max(len(k) for k in known)
+        # Pad every column to the same length with its first category to transform them in one call
+        frame = pd.DataFrame({col: k + k[:1] * (longest - len(k)) for col, k in zip(columns, known)})
+        # Behind the imputer the encoder was fitted on a bare array, without column names
+        codes = encoder.transform(frame.to_numpy(dtype=object) if not hasattr(encoder, 'feature_names_in_') else frame)
+        return [dict(zip(k, codes[:len(k), j].tolist())) for j, k in enumerate(known)]
+
+    def vectorize(self, record):
+        """Turns a raw record dict into the (1, n_features) row the classifier was trained on."""
+        x = np.zeros(self.n_features)
+
+        # 1. Numeric: coerce, impute with the training median, standardise
+        raw = np.array([_to_float(record.get(col)) for col in self.numeric_cols])
+        if self.medians is not None:
+            raw = (np.where(np.isnan(raw), self.medians, raw) - self.mean) / self.scale
+        x[:len(self.numeric_cols)] = raw
+
+        # 2. Categorical: unknown categories stay all-zero, as with handle_unknown='ignore'
+        if self.category_codes is not None:
+            for j, (col, codes) in enumerate(zip(self.categorical_cols, self.category_codes), len(self.numeric_cols)):
+                value = record.get(col)
+                x[j] = codes.get(self.fill_value if _is_missing(value) else value, math.nan)
+        for col, index in zip(self.categorical_cols, self.category_index):
+            value = record.get(col)
+            j = index.get(self.fill_value if _is_missing(value) else value)
+            if j is not None:
+                x[j] = 1.0
+
+        # 3. Text: term counts -> tf-idf -> l2 norm
+        text = record.get(self.text_col)
+        if not _is_missing(text):
+            for term in self.analyzer(str(text)):
+                j = self.vocabulary.get(term)
+                if j is not None:
+                    x[j] += 1.0
+            block = x[self.text_offset:]
+            if self.sublinear_tf:
+                np.log(block, out=block, where=block > 0)
+                block[block > 0] += 1.0
+            block *= self.idf[self.text_offset:]
+            if self.norm == 'l2':
+                length = math.sqrt(np.dot(block, block))
+            elif self.norm == 'l1':
+                length = np.abs(block).sum()
+            else:
+                length = 0.0
+            if length > 0:
+                block /= length
+        return x.reshape(1, -1)
+
+    def predict_proba(self, record):
+        """Class probabilities for one record, ordered like classes_."""
+        x = self.vectorize(record)
+        if self.forest is not None:
+            return self.forest.predict_proba_one(x)
+        return self.classifier.predict_proba(x)[0]
+
+    def predict_proba_adaptive(self, record, block_size=10, confidence=None):
+        """
+        predict_proba with early exit for forests (see FlatForest.predict_proba_adaptive).
+        Returns (proba, trees_used); trees_used is None for classifiers without early exit.
+        Without a confidence bound the label always matches predict_proba.
+        """
+        x = self.vectorize(record)
+        engine = self.forest if self.forest is not None else self.classifier
+        adaptive = getattr(engine, 'predict_proba_adaptive', None)
+        if adaptive is None:
+            return self.classifier.predict_proba(x)[0], None
+        proba, used = adaptive(x, block_size, confidence)
+        return proba[0], int(used[0])
+
+    def predict(self, record):
+        """Returns (label, confidence) for one record."""
+        proba = self.predict_proba(record)
+        best = int(proba.argmax())
+        return self.classes_[best], proba[best]
+
+    def verify(self, pipeline, df, atol=1e-9):
+        """Checks labels and probabilities against the sklearn pipeline on the rows of df."""
+        expected = pipeline.predict_proba(df)
+        actual = np.vstack([self.predict_proba(r) for r in df.to_dict('records')])
+        max_diff = float(np.abs(expected - actual).max()) if len(df) else 0.0
+        labels_match = bool((expected.argmax(axis=1) == actual.argmax(axis=1)).all())
+        if not labels_match or max_diff > atol:
+            raise AssertionError(f"Compiled scorer diverges from the pipeline (max |dp|={max_diff:.3g})")
+        self.logger.info(f"Compiled scorer matches the pipeline on {len(df)} rows (max |dp|={max_diff:.3g})")
+        return max_diff
+
+    def latency(self, records, repeats=3):
+        """Per-record latency percentiles in milliseconds."""
+        timings = []
+        for _ in range(repeats):
+            for record in records:
+                start = time.perf_counter()
+                self.predict(record)
+                timings.append((time.perf_counter() - start) * 1000.0)
+        p50, p99 = np.percentile(timings, [50, 99])
+        return {'records': len(timings), 'p50_ms': float(p50), 'p99_ms': float(p99)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify and time the compiled single-record scorer.")
+    parser.add_argument('data_path', help="CSV of raw tickets to score")
+    parser.add_argument('--model', default='models/csat_model.pkl')
+    parser.add_argument('--rows', type=int, default=1000)
+    args = parser.parse_args()
+
+    # Imported here so the scorer itself does not depend on the training module
+    from src.csat_pipelining import CSATPredictor
+    predictor = CSATPredictor(args.data_path)
+    df = predictor.feature_engineering(pd.read_csv(args.data_path, nrows=args.rows))
+
+    pipeline = joblib.load(args.model)
+    scorer = CompiledScorer(pipeline)
+    scorer.verify(pipeline, df)
+    print(scorer.latency(df.to_dict('records')))
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main()
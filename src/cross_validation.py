@@ -0,0 +1,163 @@
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import os
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, classification_report
+from sklearn.model_selection import StratifiedKFold
+from src.csat_pipelining import CSATPredictor, SURVEY_DATE_COL, TARGET_COL
+
+# The engineered frame; set by _init_worker in the parent before the pool starts, so
+# forked workers share it copy-on-write instead of receiving a pickled copy per fold
+_frame = None
+
+def _init_worker(frame):
+    global _frame
+    _frame = frame
+
+def _run_fold(fold, train_idx, test_idx, n_jobs, settings):
+    """Worker entry point: fits a fresh pipeline on one fold and scores its test rows."""
+    start = time.perf_counter()
+    train, test = _frame.iloc[train_idx], _frame.iloc[test_idx]
+    pipeline = CSATPredictor(data_path=None, **settings).build_pipeline()
+    if 'n_jobs' in pipeline[-1].get_params():
+        pipeline.set_params(classifier__n_jobs=n_jobs)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        pipeline.fit(train, train[TARGET_COL])
+        y_pred = pipeline.predict(test)
+    y_true = test[TARGET_COL].to_numpy()
+    return {
+        'fold': fold,
+        'train_rows': int(len(train_idx)),
+        'test_rows': int(len(test_idx)),
+        'accuracy': accuracy_score(y_true, y_pred),
+        'report': classification_report(y_true, y_pred, output_dict=True, zero_division=0),
+        'seconds': time.perf_counter() - start,
+        'y_true': y_true,
+        'y_pred': y_pred,
+    }
+
+class CrossValidator:
+    """
+    Evaluates build_pipeline over several folds instead of one train/test split.
+
+    'stratified' is a shuffled StratifiedKFold on CSAT Score. 'temporal' is a rolling-origin
+    backtest on SURVEY_DATE_COL: the survey days are cut into n_splits + 1 consecutive
+    blocks, and fold k trains on every day before block k and tests on block k. Rows
+    without a survey date are left out of temporal folds.
+
+    Folds run concurrently in a process pool. The engineered frame is shared with workers
+    through fork, and each forest gets an equal share of the cores. backend, sparse and
+    dtype are passed to CSATPredictor.build_pipeline as for training; the out-of-core
+    'streaming' backend has no in-memory pipeline to cross-validate.
+    """
+    SCHEMES = ('stratified', 'temporal')
+
+    def __init__(self, df, n_splits=5, n_workers=None, date_col=SURVEY_DATE_COL, random_state=42,
+                 backend='forest', sparse=False, dtype=np.float64):
+        if backend == 'streaming':
+            raise ValueError("The 'streaming' backend trains out of core and cannot be cross-validated")
+        self.settings = {'backend': backend, 'sparse': sparse, 'dtype': dtype}
+        self.df = df.dropna(subset=[TARGET_COL]).reset_index(drop=True)
+        self.n_splits = n_splits
+        self.n_workers = n_workers or min(n_splits, os.cpu_count())
+        self.date_col = date_col
+        self.random_state = random_state
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.INFO)
+
+    def stratified_folds(self):
+        splitter = StratifiedKFold(n_splits=self.n_splits, shuffle=True, random_state=self.random_state)
+        for train_idx, test_idx in splitter.split(self.df, self.df[TARGET_COL]):
+            yield train_idx, test_idx, {}
+
+    def temporal_folds(self):
+        if self.date_col not in self.df.columns:
+            raise ValueError(f"Temporal folds need the '{self.date_col}' column in the engineered frame")
+        days = pd.to_datetime(self.df[self.date_col]).dt.normalize().to_numpy()
+        dated = ~np.isnat(days)
+        blocks = np.array_split(np.unique(days[dated]), self.n_splits + 1)
+        if any(len(b) == 0 for b in blocks):
+            raise ValueError(f"Only {len(np.unique(days[dated]))} distinct survey days; "
+                             f"too few for {self.n_splits} temporal folds")
+        for block in blocks[1:]:
+            train_idx = np.flatnonzero(dated & (days < block[0]))
+            test_idx = np.flatnonzero(dated & (days >= block[0]) & (days <= block[-1]))
+            yield train_idx, test_idx, {'train_until': str(block[0])[:10],
+                                        'test_from': str(block[0])[:10], 'test_to': str(block[-1])[:10]}
+
+    def run(self, scheme='stratified'):
+        """Runs every fold of scheme and returns the aggregated report."""
+        if scheme not in self.SCHEMES:
+            raise ValueError(f"Unknown scheme '{scheme}'. Expected one of {self.SCHEMES}.")
+        folds = list(self.stratified_folds() if scheme == 'stratified' else self.temporal_folds())
+        n_jobs = max(os.cpu_count() // self.n_workers, 1)
+
+        start = time.perf_counter()
+        _init_worker(self.df)
+        context = mp.get_context('fork') if 'fork' in mp.get_all_start_methods() else mp.get_context('spawn')
+        with context.Pool(self.n_workers, initializer=_init_worker, initargs=(self.df,)) as pool:
+            results = pool.starmap(_run_fold, [(i, train_idx, test_idx, n_jobs, self.settings)
+                                               for i, (train_idx, test_idx, _) in enumerate(folds)])
+        wall_seconds = time.perf_counter() - start
+
+        for result, (_, _, period) in zip(results, folds):
+            result.update(period)
+            self.logger.info(f"{scheme} fold {result['fold']}: accuracy {result['accuracy']:.4f} "
+                             f"({result['train_rows']:,} train / {result['test_rows']:,} test rows, "
+                             f"{result['seconds']:.1f}s)")
+        y_true = np.concatenate([r.pop('y_true') for r in results])
+        y_pred = np.concatenate([r.pop('y_pred') for r in results])
+        accuracies = np.array([r['accuracy'] for r in results])
+        report = {
+            'scheme': scheme,
+            'backend': self.settings['backend'],
+            'n_splits': self.n_splits,
+            'accuracy_mean': float(accuracies.mean()),
+            'accuracy_std': float(accuracies.std()),
+            'pooled_report': classification_report(y_true, y_pred, output_dict=True, zero_division=0),
+            'wall_seconds': wall_seconds,
+            'fold_seconds_total': float(sum(r['seconds'] for r in results)),
+            'folds': results,
+        }
+        self.logger.info(f"{scheme}: accuracy {report['accuracy_mean']:.4f} +/- {report['accuracy_std']:.4f}, "
+                         f"{wall_seconds:.1f}s wall for {report['fold_seconds_total']:.1f}s of fold time")
+        return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-validate the CSAT pipeline.")
+    parser.add_argument('--data', default=os.path.join("data", "_e_Commerce_Customer_support_data.csv"))
+    parser.add_argument('--cache-dir', default=os.path.join("data", "cache"))
+    parser.add_argument('--scheme', choices=CrossValidator.SCHEMES + ('both',), default='both')
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--backend', choices=['forest', 'hist_gb'], default='forest')
+    parser.add_argument('--sparse', action='store_true', help="keep one-hot and TF-IDF features sparse (CSR)")
+    parser.add_argument('--float32', action='store_true', help="build the feature matrix in float32")
+    parser.add_argument('--output', help="write the full report as JSON")
+    args = parser.parse_args()
+
+    df = CSATPredictor(args.data, cache_dir=args.cache_dir).load_features()
+    validator = CrossValidator(df, n_splits=args.folds, n_workers=args.workers, backend=args.backend,
+                               sparse=args.sparse, dtype=np.float32 if args.float32 else np.float64)
+    schemes = CrossValidator.SCHEMES if args.scheme == 'both' else (args.scheme,)
+    reports = [validator.run(scheme) for scheme in schemes]
+    for report in reports:
+        print(f"\n{report['scheme']} ({report['n_splits']} folds): "
+              f"accuracy {report['accuracy_mean']:.4f} +/- {report['accuracy_std']:.4f}")
+        for fold in report['folds']:
+            period = f"  {fold['test_from']}..{fold['test_to']}" if 'test_from' in fold else ''
+            print(f"  fold {fold['fold']}: {fold['accuracy']:.4f}  {fold['seconds']:6.1f}s{period}")
+        print(f"  wall {report['wall_seconds']:.1f}s for {report['fold_seconds_total']:.1f}s of fold time")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(reports, f, indent=2)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main()
@@ -4,18 +4,146 @@ from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
-from sklearn.preprocessing import StandardScaler, OneHotEncoder
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler, OneHotEncoder, OrdinalEncoder, FunctionTransformer
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
 from sklearn.metrics import classification_report, accuracy_score
 import joblib
 import logging
 import os
+import scipy.sparse as sp
+from src.feature_cache import FeatureCache
+from src.artifact import ModelArtifact
+from src.profiling import PROFILER, peak_rss_mb, rss_mb
+from src.text_features import DedupTfidfVectorizer
+
+# Columns consumed by build_pipeline. Anything else is dropped by the ColumnTransformer.
+NUMERIC_FEATURES = ['Item_price', 'connected_handling_time', 'response_time_minutes']
+CATEGORICAL_FEATURES = ['channel_name', 'category', 'Sub-category', 'Product_category', 'Tenure Bucket', 'Agent Shift', 'Manager']
+TEXT_FEATURE = 'Customer Remarks'
+TARGET_COL = 'CSAT Score'
+
+DATE_COLUMNS = ['order_date_time', 'Issue_reported at', 'issue_responded', 'Survey_response_Date']
+# Not a model input; kept in the engineered frame for temporal evaluation
+SURVEY_DATE_COL = 'Survey_response_Date'
+
+# Raw CSV columns engineer_features needs to produce the model inputs, target and survey date
+SOURCE_COLUMNS = ['Item_price', 'connected_handling_time', 'Issue_reported at', 'issue_responded'] + \
+    CATEGORICAL_FEATURES + [TEXT_FEATURE, TARGET_COL, SURVEY_DATE_COL]
+
+# Bump whenever feature_engineering changes its output so cached frames are rebuilt.
+FEATURE_VERSION = 1
+
+def parse_dates(series, fmt=None, fallback=False):
+    """
+    Parses a date column. With fmt=None pandas infers the format from the first value.
+    With fallback=True, values that do not match fmt are re-parsed without a format.
+    """
+    parsed = pd.to_datetime(series, format=fmt, errors='coerce')
+    if fmt is not None and fallback:
+        missed = parsed.isna() & series.notna()
+        if missed.any():
+            parsed[missed] = pd.to_datetime(series[missed], errors='coerce')
+    return parsed
+
+def engineer_features(df, date_formats=None, fallback_cols=()):
+    """
+    Row-independent feature engineering shared by CSATPredictor and the chunked engine.
+    date_formats maps date columns to explicit strptime formats; columns listed in
+    fallback_cols re-parse values that do not match their format.
+    """
+    date_formats = date_formats or {}
+
+    # 1. Date Time Conversions
+    with PROFILER.stage('features.dates'):
+        for col in DATE_COLUMNS:
+            if col in df.columns:
+                df[col] = parse_dates(df[col], date_formats.get(col), col in fallback_cols)
+
+    # 2. Calculate Response Time (in minutes)
+    with PROFILER.stage('features.response_time'):
+        if 'issue_responded' in df.columns and 'Issue_reported at' in df.columns:
+            df['response_time_minutes'] = (df['issue_responded'] - df['Issue_reported at']).dt.total_seconds() / 60.0
+        else:
+            df['response_time_minutes'] = np.nan
+
+    # 3. Clean Item Price
+    with PROFILER.stage('features.item_price'):
+        if 'Item_price' in df.columns:
+            df['Item_price'] = pd.to_numeric(df['Item_price'], errors='coerce')
+
+    # 4. Clean Text Data (Fill NaNs here to avoid pipeline dimension issues)
+    with PROFILER.stage('features.text'):
+        if TEXT_FEATURE in df.columns:
+            df[TEXT_FEATURE] = df[TEXT_FEATURE].fillna('').astype(str)
+
+    return df
+
+def compact_frame(df):
+    """
+    Keeps only the columns training reads, with categoricals as pandas categories and
+    numerics as float32. The pipeline encodes both exactly as the object/float64 originals.
+    """
+    columns = {}
+    for col in NUMERIC_FEATURES:
+        columns[col] = df[col].astype(np.float32)
+    for col in CATEGORICAL_FEATURES:
+        columns[col] = df[col].astype('category')
+    for col in (TEXT_FEATURE, TARGET_COL, SURVEY_DATE_COL):
+        if col in df.columns:
+            columns[col] = df[col]
+    return pd.DataFrame(columns, index=df.index)
+
+def category_encoder(preprocessor):
+    """The fitted encoder of the 'cat' branch: OneHotEncoder for 'forest', OrdinalEncoder for 'hist_gb'."""
+    cat = preprocessor.named_transformers_['cat']
+    # Look through the profiler's timing wrapper (see Profiler.time_branches)
+    cat = getattr(cat, 'transformer', cat)
+    return cat[-1] if isinstance(cat, Pipeline) else cat
+
+def matrix_nbytes(X):
+    """Memory held by a dense or sparse feature matrix."""
+    if sp.issparse(X):
+        X = X.tocsr()
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    return np.asarray(X).nbytes
 
 class CSATPredictor:
-    def __init__(self, data_path, model_dir='models'):
+    # Forest size estimate for the memory budget: a fully grown tree has at most about one
+    # node per bootstrap draw, and each node costs its sklearn record plus one class-value
+    # row, then roughly as much again while save_model flattens the forest into the artifact
+    NODES_PER_SAMPLE = 1.1
+    NODE_BYTES = 64
+    # Floor for the budgeted bootstrap size; below this the trees are too small to be useful
+    MIN_MAX_SAMPLES = 1_000
+    # 'forest' and 'hist_gb' train in memory through build_pipeline; 'streaming' trains out of core
+    BACKENDS = ('forest', 'hist_gb', 'streaming')
+    # HistGradientBoosting bins every feature into at most 255 bins, categories included
+    HGB_MAX_CATEGORIES = 255
+
+    def __init__(self, data_path, model_dir='models', cache_dir=None, chunk_size=None, n_workers=None,
+                 sparse=False, dtype=np.float64, backend='forest', memory_budget_mb=None, insights=False):
         self.data_path = data_path
         self.model_dir = model_dir
+        self.cache_dir = cache_dir
+        # When chunk_size is set, feature engineering streams the CSV through ChunkedFeatureEngine
+        self.chunk_size = chunk_size
+        self.n_workers = n_workers
+        # sparse=True keeps the one-hot and TF-IDF blocks in CSR all the way into the classifier
+        self.sparse = sparse
+        self.dtype = dtype
+        # 'forest' (one-hot + random forest) and 'hist_gb' (native categoricals + histogram
+        # gradient boosting) train in memory; 'streaming' trains out of core via StreamingTrainer
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}'. Expected one of {self.BACKENDS}.")
+        self.backend = backend
+        # memory_budget_mb trains from a compact frame in float32 and caps each tree's
+        # bootstrap sample so the forest fits in what is left of the budget
+        self.memory_budget_mb = memory_budget_mb
+        if memory_budget_mb is not None:
+            self.dtype = np.float32
+        # insights=True adds permutation importance to the Model Insights sidecar; it re-scores
+        # the test set once per input column and repeat, so training skips it by default
+        self.insights = insights
         self.model_path = os.path.join(model_dir, 'csat_model.pkl')
         self.model = None
         self.preprocessor = None
@@ -32,7 +160,13 @@ class CSATPredictor:
         """Loads data from CSV."""
         self.logger.info(f"Loading data from {self.data_path}...")
         try:
-            df = pd.read_csv(self.data_path)
+            with PROFILER.stage('load_data'):
+                if self.memory_budget_mb is None:
+                    df = pd.read_csv(self.data_path)
+                else:
+                    # Skip unused columns and read categoricals as categories from the start
+                    df = pd.read_csv(self.data_path, usecols=lambda col: col in SOURCE_COLUMNS,
+                                     dtype={col: 'category' for col in CATEGORICAL_FEATURES})
             self.logger.info(f"Data loaded successfully. Shape: {df.shape}")
             return df
         except FileNotFoundError:
@@ -47,52 +181,72 @@ class CSATPredictor:
         Performs custom feature engineering.
         """
         self.logger.info("Starting feature engineering...")
-        
-        # 1. Date Time Conversions
-        date_cols = ['order_date_time', 'Issue_reported at', 'issue_responded', 'Survey_response_Date']
-        for col in date_cols:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce')
+        df = engineer_features(df)
+        self.logger.info("Feature engineering completed.")
+        return df
 
-        # 2. Calculate Response Time (in minutes)
-        if 'issue_responded' in df.columns and 'Issue_reported at' in df.columns:
-            df['response_time_minutes'] = (df['issue_responded'] - df['Issue_reported at']).dt.total_seconds() / 60.0
-        else:
-            df['response_time_minutes'] = np.nan
+    def load_features(self):
+        """
+        Returns the engineered frame, served from the feature cache when cache_dir is set.
+        The cache is rebuilt only when the source CSV or FEATURE_VERSION changes.
+        """
+        if self.cache_dir is None:
+            return self._engineer_source()
 
-        # 3. Clean Item Price
-        if 'Item_price' in df.columns:
-            df['Item_price'] = pd.to_numeric(df['Item_price'], errors='coerce')
+        cache = FeatureCache(self.cache_dir, version=FEATURE_VERSION)
+        columns = NUMERIC_FEATURES + CATEGORICAL_FEATURES + [TEXT_FEATURE, TARGET_COL, SURVEY_DATE_COL]
+        df = cache.load(self.data_path, columns)
+        if df is not None:
+            self.logger.info(f"Loaded engineered features from cache. Shape: {df.shape}")
+            return df
 
-        # 4. Clean Text Data (Fill NaNs here to avoid pipeline dimension issues)
-        if 'Customer Remarks' in df.columns:
-            df['Customer Remarks'] = df['Customer Remarks'].fillna('').astype(str)
+        df = self._engineer_source(columns)
+        return cache.save(self.data_path, df, columns)
 
-        self.logger.info("Feature engineering completed.")
-        return df
+    def _engineer_source(self, columns=None):
+        """Loads and engineers the source CSV, in parallel chunks when chunk_size is set."""
+        if self.chunk_size is None:
+            return self.feature_engineering(self.load_data())
+        if columns is None and self.memory_budget_mb is not None:
+            columns = NUMERIC_FEATURES + CATEGORICAL_FEATURES + [TEXT_FEATURE, TARGET_COL, SURVEY_DATE_COL]
+
+        # Imported here because the chunked engine itself builds on this module
+        from src.chunked_features import ChunkedFeatureEngine
+        engine = ChunkedFeatureEngine(self.data_path, chunk_size=self.chunk_size, n_workers=self.n_workers, columns=columns)
+        return engine.transform()
 
-    def build_pipeline(self):
+    def build_pipeline(self, sparse=None, dtype=None):
         """
         Constructs the sklearn preprocessing and modeling pipeline.
+        sparse and dtype default to the values given to the constructor.
         """
-        numeric_features = ['Item_price', 'connected_handling_time', 'response_time_minutes']
-        categorical_features = ['channel_name', 'category', 'Sub-category', 'Product_category', 'Tenure Bucket', 'Agent Shift', 'Manager']
+        sparse = self.sparse if sparse is None else sparse
+        dtype = self.dtype if dtype is None else dtype
+        if self.backend == 'hist_gb':
+            return self._build_hist_gb_pipeline(dtype)
+
+        numeric_features = NUMERIC_FEATURES
+        categorical_features = CATEGORICAL_FEATURES
         # Note: Passing this as a string ensures TfidfVectorizer receives a Series (1D), which it expects.
-        text_features = 'Customer Remarks'
+        text_features = TEXT_FEATURE
 
-        numeric_transformer = Pipeline(steps=[
+        numeric_steps = [
             ('imputer', SimpleImputer(strategy='median')),
             ('scaler', StandardScaler())
-        ])
+        ]
+        if np.dtype(dtype) != np.float64:
+            # Otherwise the float64 numeric block would upcast the whole stacked matrix
+            numeric_steps.append(('cast', FunctionTransformer(np.asarray, kw_args={'dtype': dtype})))
+        numeric_transformer = Pipeline(steps=numeric_steps)
 
         categorical_transformer = Pipeline(steps=[
             ('imputer', SimpleImputer(strategy='constant', fill_value='missing')),
-            ('onehot', OneHotEncoder(handle_unknown='ignore', sparse_output=False))
+            ('onehot', OneHotEncoder(handle_unknown='ignore', sparse_output=sparse, dtype=dtype))
         ])
 
         # REMOVED SimpleImputer from here. We handled NaNs in feature_engineering.
-        # TfidfVectorizer works directly on the pandas Series.
-        text_transformer = TfidfVectorizer(max_features=100, stop_words='english')
+        # TfidfVectorizer works directly on the pandas Series; this one tokenizes each distinct remark once.
+        text_transformer = DedupTfidfVectorizer(max_features=100, stop_words='english', dtype=dtype)
 
         self.preprocessor = ColumnTransformer(
             transformers=[
@@ -100,7 +254,9 @@ class CSATPredictor:
                 ('cat', categorical_transformer, categorical_features),
                 ('txt', text_transformer, text_features)
             ],
-            remainder='drop'
+            remainder='drop',
+            # 1.0 always stacks to CSR and the numeric block joins as sparse columns; 0.3 is the sklearn default
+            sparse_threshold=1.0 if sparse else 0.3
         )
 
         pipeline = Pipeline(steps=[
@@ -110,37 +266,225 @@ class CSATPredictor:
 
         return pipeline
 
+    def _build_hist_gb_pipeline(self, dtype):
+        """
+        Histogram gradient boosting on native categoricals. Each categorical column becomes
+        one ordinal-coded feature instead of a one-hot block, numerics pass through unscaled
+        with their missing values (the booster bins them and learns where NaN goes), and the
+        remarks get the same TF-IDF terms as the forest. Missing categories become 'missing'
+        as for the forest; unknown ones encode as NaN, the booster's missing value, much as
+        the forest's one-hot encoder zeroes them out.
+        """
+        categorical_transformer = Pipeline(steps=[
+            ('imputer', SimpleImputer(strategy='constant', fill_value='missing')),
+            ('ordinal', OrdinalEncoder(handle_unknown='use_encoded_value', unknown_value=np.nan,
+                                       max_categories=self.HGB_MAX_CATEGORIES))
+        ])
+        text_transformer = DedupTfidfVectorizer(max_features=100, stop_words='english', dtype=dtype)
+
+        self.preprocessor = ColumnTransformer(
+            transformers=[
+                ('num', 'passthrough', NUMERIC_FEATURES),
+                ('cat', categorical_transformer, CATEGORICAL_FEATURES),
+                ('txt', text_transformer, TEXT_FEATURE)
+            ],
+            remainder='drop',
+            # The booster needs a dense matrix; with one column per categorical it stays small
+            sparse_threshold=0.0
+        )
+
+        n_numeric = len(NUMERIC_FEATURES)
+        categorical = list(range(n_numeric, n_numeric + len(CATEGORICAL_FEATURES)))
+        pipeline = Pipeline(steps=[
+            ('preprocessor', self.preprocessor),
+            ('classifier', HistGradientBoostingClassifier(categorical_features=categorical, max_iter=200,
+                                                          early_stopping=True, random_state=42))
+        ])
+
+        return pipeline
+
+    def log_matrix_size(self, X):
+        """Logs the shape and footprint of a transformed feature matrix."""
+        kind = 'sparse' if sp.issparse(X) else 'dense'
+        nnz = X.nnz if sp.issparse(X) else np.count_nonzero(X)
+        self.logger.info(f"Feature matrix ({kind}, {X.dtype}): shape={X.shape}, nnz={nnz}, "
+                         f"{matrix_nbytes(X) / 1e6:.2f} MB")
+
+    def matrix_report(self, df):
+        """
+        Fits the preprocessor in dense float64 and sparse float32 mode on df and
+        returns the resulting matrix sizes, for choosing a mode on a given export.
+        """
+        report = []
+        for sparse, dtype in [(False, np.float64), (True, np.float32)]:
+            X = self.build_pipeline(sparse=sparse, dtype=dtype)[:-1].fit_transform(df)
+            self.log_matrix_size(X)
+            report.append({
+                'mode': 'sparse' if sparse else 'dense',
+                'dtype': np.dtype(dtype).name,
+                'shape': X.shape,
+                'nnz': int(X.nnz if sp.issparse(X) else np.count_nonzero(X)),
+                'bytes': int(matrix_nbytes(X)),
+            })
+        # build_pipeline stores the last preprocessor; restore the configured one
+        self.build_pipeline()
+        return report
+
     def run(self):
         """
         Executes the full pipeline: Load -> Process -> Train -> Evaluate.
         """
-        df = self.load_data()
-        df = self.feature_engineering(df)
+        if self.backend == 'streaming':
+            return self._run_streaming()
 
-        target_col = 'CSAT Score'
-        
-        # Drop rows where target is missing
-        df = df.dropna(subset=[target_col])
-        
-        X = df
-        y = df[target_col]
+        with PROFILER.stage('load_features'):
+            df = self.load_features()
+
+        if self.memory_budget_mb is not None:
+            with PROFILER.stage('split'):
+                self._split_compact(df)
+            del df
+        else:
+            target_col = TARGET_COL
+
+            # Drop rows where target is missing
+            df = df.dropna(subset=[target_col])
+
+            X = df
+            y = df[target_col]
 
-        self.X_train, self.X_test, self.y_train, self.y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+            with PROFILER.stage('split'):
+                self.X_train, self.X_test, self.y_train, self.y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
         self.logger.info("Building model...")
         self.model = self.build_pipeline()
         
         self.logger.info("Training model...")
-        self.model.fit(self.X_train, self.y_train)
+        # Same steps as Pipeline.fit, split so the preprocessor and the forest are timed separately
+        with PROFILER.stage('fit.preprocessor'), PROFILER.timed_branches(self.model[0], 'fit.preprocessor'):
+            X_train_t = self.model[:-1].fit_transform(self.X_train, self.y_train)
+        if self.memory_budget_mb is not None and self.backend == 'forest':
+            self._apply_memory_budget(X_train_t.shape[0])
+        with PROFILER.stage('fit.classifier'):
+            self.model[-1].fit(X_train_t, self.y_train)
+        del X_train_t
+        classifier = self.model[-1]
+        if hasattr(classifier, 'estimators_'):
+            nodes = sum(tree.tree_.node_count for tree in classifier.estimators_)
+            self.logger.info(f"Forest has {nodes:,} nodes")
+        else:
+            self.logger.info(f"Booster stopped after {classifier.n_iter_} iterations")
+        self.log_matrix_size(self.model[:-1].transform(self.X_test.head(10_000)))
 
         self.logger.info("Evaluating model...")
-        y_pred = self.model.predict(self.X_test)
+        with PROFILER.stage('predict'):
+            y_pred = self.model.predict(self.X_test)
         
         acc = accuracy_score(self.y_test, y_pred)
         self.logger.info(f"Model Accuracy: {acc:.4f}")
         print("\nClassification Report:\n" + classification_report(self.y_test, y_pred))
 
-        # Save model to the models/ directory
+        with PROFILER.stage('save_model'):
+            self.save_model()
+        self.save_sidecars(self.X_train, self.X_test, self.y_test, y_pred)
+
+        budget = f" (budget {self.memory_budget_mb:,.0f} MB)" if self.memory_budget_mb is not None else ""
+        self.logger.info(f"Peak RSS: {peak_rss_mb():,.0f} MB{budget}")
+
+    def _split_compact(self, df):
+        """
+        Same split as train_test_split on the labelled rows, taken from a compact copy of
+        df by row position, so neither a dropna copy nor the unused columns are kept.
+        """
+        df = compact_frame(df)
+        labelled = np.flatnonzero(df[TARGET_COL].notna().to_numpy())
+        train_idx, test_idx = train_test_split(labelled, test_size=0.2, random_state=42)
+        self.X_test = df.take(test_idx)
+        self.X_train = df.take(train_idx)
+        self.y_train = self.X_train[TARGET_COL]
+        self.y_test = self.X_test[TARGET_COL]
+        self.logger.info(f"Compact training frame: {self.X_train.memory_usage(deep=True).sum() / 1e6:.1f} MB "
+                         f"train, {self.X_test.memory_usage(deep=True).sum() / 1e6:.1f} MB test")
+
+    def _apply_memory_budget(self, n_train):
+        """Caps the forest's bootstrap sample size so the estimated forest fits in the remaining budget."""
+        forest = self.model[-1]
+        available = (self.memory_budget_mb - rss_mb()) * 1e6
+        per_sample = 2 * forest.n_estimators * self.NODES_PER_SAMPLE * \
+            (self.NODE_BYTES + 8 * self.y_train.nunique())
+        max_samples = int(available / per_sample)
+        if max_samples >= n_train:
+            self.logger.info(f"Forest fits the memory budget with full bootstrap samples ({n_train:,} rows)")
+            return
+        if max_samples < self.MIN_MAX_SAMPLES:
+            self.logger.warning(f"Memory budget of {self.memory_budget_mb:,.0f} MB leaves room for only "
+                                f"{max(max_samples, 0):,} samples per tree; using {self.MIN_MAX_SAMPLES:,}")
+            max_samples = self.MIN_MAX_SAMPLES
+        forest.set_params(max_samples=max_samples)
+        self.logger.info(f"Bootstrap sample capped at {max_samples:,} of {n_train:,} rows per tree "
+                         f"to fit the {self.memory_budget_mb:,.0f} MB budget")
+
+    def _run_streaming(self):
+        """Trains the hashing + SGD backend chunk by chunk, so the CSV is never fully in memory."""
+        # Imported here because the streaming backend itself builds on this module
+        from src.streaming_backend import StreamingTrainer
+        trainer = StreamingTrainer(self.data_path, chunk_size=self.chunk_size or 100_000, n_workers=self.n_workers or 1)
+
+        self.logger.info("Training streaming model...")
+        self.model = trainer.fit()
+
+        self.logger.info("Evaluating model...")
+        acc, report = trainer.evaluate(self.model)
+        self.logger.info(f"Model Accuracy: {acc:.4f}")
+        print("\nClassification Report:\n" + report)
+
+        self.save_model()
+        # The training frame is never held in memory, so there is nothing to profile
+        self.save_sidecars()
+
+    def save_sidecars(self, X_train=None, X_test=None, y_test=None, y_pred=None):
+        """
+        Refreshes what is stored next to the just-saved model: the Model Insights summary,
+        from held-out X_test/y_test (y_pred: the model's predictions on X_test), and the
+        drift reference, from the training frame X_train. Every writer of csat_model.pkl
+        calls this after save_model. Without X_test the old insights stay and are flagged
+        stale; a drift reference that cannot be rebuilt is deleted rather than left to be
+        compared against traffic for a different model.
+        """
+        # Imported here because both sidecar modules themselves build on this module
+        from src.drift_monitor import DriftMonitor
+        from src.model_insights import ModelInsights
+        if X_test is not None:
+            y_pred = self.model.predict(X_test) if y_pred is None else y_pred
+            with PROFILER.stage('insights'):
+                insights = ModelInsights(self.model_dir, n_repeats=ModelInsights.N_REPEATS if self.insights else 0,
+                                         n_workers=self.n_workers)
+                insights.save(insights.compute(self.model, X_test, y_test, y_pred))
+        else:
+            self.logger.info("No held-out rows; model insights are left as they are and shown as stale.")
+
+        reference = None
+        if X_train is not None:
+            # Prediction shares come from held-out rows when there are any
+            predictions = y_pred if X_test is not None else self.model.predict(X_train)
+            try:
+                with PROFILER.stage('drift_reference'):
+                    reference = DriftMonitor.build_reference(self.model, X_train, predictions)
+            except (AttributeError, KeyError, TypeError) as e:
+                self.logger.warning(f"Cannot profile this model for drift monitoring: {e}")
+        if reference is not None:
+            DriftMonitor.save_reference(reference, self.model_path)
+        elif os.path.exists(DriftMonitor.sidecar_for(self.model_path)):
+            os.remove(DriftMonitor.sidecar_for(self.model_path))
+            self.logger.info("Removed the previous model's drift reference; drift monitoring is off for this model.")
+
+    def save_model(self):
+        """Saves self.model to the models/ directory, as a pickle and as a memory-mappable artifact."""
         os.makedirs(self.model_dir, exist_ok=True)
-        joblib.dump(self.model, self.model_path)
-        self.logger.info(f"Model saved to '{self.model_path}'")
\ No newline at end of file
+        # Written aside and renamed so a watching ModelManager never reads a half-written pickle
+        tmp_path = f"{self.model_path}.tmp-{os.getpid()}"
+        joblib.dump(self.model, tmp_path)
+        os.replace(tmp_path, self.model_path)
+        self.logger.info(f"Model saved to '{self.model_path}'")
+        # Memory-mappable copy for fast, shared loading in worker processes
+        ModelArtifact(ModelArtifact.dir_for(self.model_path)).save(self.model)
\ No newline at end of file
@@ -0,0 +1,431 @@
+import argparse
+import bisect
+import json
+import logging
+import math
+import os
+import threading
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from src.csat_pipelining import NUMERIC_FEATURES, CATEGORICAL_FEATURES, category_encoder
+
+# What SimpleImputer(strategy='constant') turns a missing category into before encoding
+MISSING_CATEGORY = 'missing'
+# Up to this many rows, scalar updates per value beat vectorized pandas work per column
+SMALL_BATCH = 64
+
+def psi(expected, actual, floor=1e-4):
+    """Population stability index between two share vectors over the same bins."""
+    expected = np.maximum(np.asarray(expected, dtype=np.float64), floor)
+    actual = np.maximum(np.asarray(actual, dtype=np.float64), floor)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+def _shares(counts):
+    total = counts.sum()
+    return counts / total if total else np.zeros(len(counts))
+
+class CountMinSketch:
+    """
+    Fixed-size frequency sketch for values with no bound on how many distinct ones arrive.
+    Estimates never undercount; with width w they overcount by at most about 2/w of
+    the total with high probability.
+    """
+
+    def __init__(self, width=1024, depth=4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self._rows = np.arange(depth)
+
+    def _slots(self, value):
+        # Double hashing: depth independent-enough slots from one 64-bit hash
+        h = hash(value) & 0xFFFFFFFFFFFFFFFF
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return (h1 + self._rows * h2) % self.width
+
+    def add(self, value, count=1):
+        """Adds count occurrences of value and returns its new estimate."""
+        slots = self._slots(value)
+        self.table[self._rows, slots] += count
+        return int(self.table[self._rows, slots].min())
+
+    def estimate(self, value):
+        return int(self.table[self._rows, self._slots(value)].min())
+
+class _NumericSketch:
+    """Counts over the reference's equal-mass bins, plus missing, out-of-range and min/max."""
+
+    def __init__(self, reference):
+        self.reference = reference
+        self.edges = np.asarray(reference['edges'], dtype=np.float64)
+        self.edge_list = self.edges.tolist()
+        self.ref_min, self.ref_max = reference['min'], reference['max']
+        self.counts = np.zeros(len(self.edges) + 1, dtype=np.int64)
+        self.missing = 0
+        self.below = 0
+        self.above = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe_values(self, values):
+        try:
+            values = np.asarray(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            # Raw input with numbers as strings; prepared frames are numeric already
+            values = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=np.float64)
+        present = values[~np.isnan(values)]
+        self.missing += len(values) - len(present)
+        if not len(present):
+            return
+        self.counts += np.bincount(np.searchsorted(self.edges, present, side='right'), minlength=len(self.counts))
+        self.below += int(np.count_nonzero(present < self.ref_min))
+        self.above += int(np.count_nonzero(present > self.ref_max))
+        self.min = min(self.min, float(present.min()))
+        self.max = max(self.max, float(present.max()))
+
+    def observe_value(self, value):
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            value = math.nan
+        if value != value:
+            self.missing += 1
+            return
+        self.counts[bisect.bisect_right(self.edge_list, value)] += 1
+        if value < self.ref_min:
+            self.below += 1
+        elif value > self.ref_max:
+            self.above += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def quantiles(self, qs):
+        """Quantile estimates, interpolated linearly within the bins."""
+        total = self.counts.sum()
+        if not total:
+            return [None] * len(qs)
+        bounds = np.clip(np.concatenate([[self.min], self.edges, [self.max]]), self.min, self.max)
+        bounds = np.maximum.accumulate(bounds)
+        cdf = np.concatenate([[0.0], np.cumsum(self.counts) / total])
+        return [float(v) for v in np.interp(qs, cdf, bounds)]
+
+    def report(self):
+        present = int(self.counts.sum())
+        rows = present + self.missing
+        live = self.quantiles(DriftMonitor.QUANTILES)
+        return {
+            'psi': psi(self.reference['shares'], _shares(self.counts)) if present else None,
+            'present': present,
+            'missing_rate': self.missing / rows if rows else None,
+            'reference_missing_rate': self.reference['missing_rate'],
+            'quantiles': dict(zip(DriftMonitor.QUANTILE_NAMES, live)),
+            'reference_quantiles': self.reference['quantiles'],
+            'below_range_rate': self.below / present if present else None,
+            'above_range_rate': self.above / present if present else None,
+        }
+
+class _CategoricalSketch:
+    """
+    Exact counts for the categories the encoder was fitted on (a fixed set) and, for
+    values it has never seen, a count-min sketch plus the top_k most frequent ones.
+    """
+
+    def __init__(self, reference, top_k=20, cms_width=1024, cms_depth=4):
+        self.reference = reference
+        categories = reference['categories']
+        self.index = pd.Index(categories)
+        self.codes = {category: i for i, category in enumerate(categories)}
+        # Last slot collects every unknown value
+        self.counts = np.zeros(len(categories) + 1, dtype=np.int64)
+        self.unknown = CountMinSketch(cms_width, cms_depth)
+        self.top_k = top_k
+        self.top_unknown = {}
+
+    def _add_unknown(self, value, count):
+        estimate = self.unknown.add(value, count)
+        if value in self.top_unknown or len(self.top_unknown) < self.top_k:
+            self.top_unknown[value] = estimate
+            return
+        weakest = min(self.top_unknown, key=self.top_unknown.get)
+        if estimate > self.top_unknown[weakest]:
+            del self.top_unknown[weakest]
+            self.top_unknown[value] = estimate
+
+    def observe_values(self, values):
+        values = np.array(values, dtype=object)
+        values[pd.isna(values)] = MISSING_CATEGORY
+        codes = self.index.get_indexer(values)
+        unknown = codes < 0
+        codes[unknown] = len(self.counts) - 1
+        self.counts += np.bincount(codes, minlength=len(self.counts))
+        if unknown.any():
+            # Few distinct unseen values per batch; each updates the sketch once
+            unseen, counts = np.unique(values[unknown].astype(str), return_counts=True)
+            for value, count in zip(unseen, counts):
+                self._add_unknown(str(value), int(count))
+
+    def observe_value(self, value):
+        if value is None or value != value:
+            value = MISSING_CATEGORY
+        code = self.codes.get(value)
+        if code is None:
+            self.counts[-1] += 1
+            self._add_unknown(str(value), 1)
+        else:
+            self.counts[code] += 1
+
+    def report(self):
+        rows = int(self.counts.sum())
+        # The reference has no unknown values by construction: the encoder learned them all
+        expected = list(self.reference['shares']) + [0.0]
+        top = sorted(self.top_unknown.items(), key=lambda item: item[1], reverse=True)
+        return {
+            'psi': psi(expected, _shares(self.counts)) if rows else None,
+            'unknown_rate': int(self.counts[-1]) / rows if rows else None,
+            'top_unknown': [[value, count] for value, count in top],
+        }
+
+class DriftMonitor:
+    """
+    Constant-memory input and prediction drift monitor for inference traffic.
+
+    Every scored row updates one sketch per input column, whose size depends only on
+    the reference profile, never on traffic volume:
+      - numeric columns: counts over the equal-mass bins of the training distribution
+        (a fixed-bin quantile sketch), plus missing and out-of-range counts;
+      - categorical columns: exact counts for the categories the one-hot encoder knows,
+        and a count-min sketch with the top_k heavy hitters for values it silently
+        zeroes out (handle_unknown='ignore');
+      - the predicted class histogram.
+    report() compares them with the reference profile that CSATPredictor.run saves next
+    to the model (csat_model.drift.json) using the population stability index.
+    """
+    SIDECAR_SUFFIX = '.drift.json'
+    N_BINS = 20
+    QUANTILES = (0.05, 0.5, 0.95)
+    QUANTILE_NAMES = ('p05', 'p50', 'p95')
+    # Usual PSI reading: below 0.1 stable, 0.1-0.25 moderate shift, above 0.25 significant
+    PSI_ALERT = 0.25
+    UNKNOWN_ALERT = 0.01
+
+    def __init__(self, reference, top_k=20, cms_width=1024, cms_depth=4):
+        self.reference = reference
+        self.top_k = top_k
+        self.cms_width = cms_width
+        self.cms_depth = cms_depth
+        self.classes = reference['predictions']['classes']
+        self.class_codes = {label: i for i, label in enumerate(self.classes)}
+        self.class_index = pd.Index(self.classes)
+        self.columns = list(reference['numeric']) + list(reference['categorical'])
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.INFO)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Starts a new observation window against the same reference."""
+        with self._lock:
+            self.numeric = {column: _NumericSketch(ref) for column, ref in self.reference['numeric'].items()}
+            self.categorical = {column: _CategoricalSketch(ref, self.top_k, self.cms_width, self.cms_depth)
+                                for column, ref in self.reference['categorical'].items()}
+            self._sketches = list(self.numeric.values()) + list(self.categorical.values())
+            # Last slot counts labels the reference never predicted
+            self.class_counts = np.zeros(len(self.classes) + 1, dtype=np.int64)
+            self.rows = 0
+            self.started_at = time.time()
+
+    @staticmethod
+    def sidecar_for(model_path):
+        """models/csat_model.pkl -> models/csat_model.drift.json"""
+        return os.path.splitext(model_path)[0] + DriftMonitor.SIDECAR_SUFFIX
+
+    @staticmethod
+    def _signature(model_path):
+        if not os.path.exists(model_path):
+            return None
+        stat = os.stat(model_path)
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    @classmethod
+    def build_reference(cls, pipeline, X, predictions, n_bins=None):
+        """
+        Reference profile from the training frame X and the model's predictions on held-out
+        rows. Categories are taken from the fitted category encoder, so anything outside them
+        is exactly what the encoder treats as unknown. Returns a JSON-serializable dict.
+        """
+        n_bins = n_bins or cls.N_BINS
+        categories = category_encoder(pipeline[0]).categories_
+        profile = {'rows': int(len(X)), 'numeric': {}, 'categorical': {}}
+        for column in NUMERIC_FEATURES:
+            values = pd.to_numeric(X[column], errors='coerce').to_numpy(dtype=np.float64)
+            present = values[~np.isnan(values)]
+            if not len(present):
+                continue
+            edges = np.unique(np.quantile(present, np.arange(1, n_bins) / n_bins))
+            counts = np.bincount(np.searchsorted(edges, present, side='right'), minlength=len(edges) + 1)
+            profile['numeric'][column] = {
+                'edges': edges.tolist(),
+                'shares': _shares(counts).tolist(),
+                'min': float(present.min()),
+                'max': float(present.max()),
+                'missing_rate': 1.0 - len(present) / len(values),
+                'quantiles': dict(zip(cls.QUANTILE_NAMES, np.quantile(present, cls.QUANTILES).tolist())),
+            }
+        for column, known in zip(CATEGORICAL_FEATURES, categories):
+            values = X[column].astype(object)
+            values = values.where(values.notna(), MISSING_CATEGORY)
+            counts = pd.Index(known).get_indexer(values)
+            counts = np.bincount(counts[counts >= 0], minlength=len(known))
+            profile['categorical'][column] = {'categories': known.tolist(), 'shares': _shares(counts).tolist()}
+        classes = pipeline[-1].classes_
+        counts = np.bincount(pd.Index(classes).get_indexer(np.asarray(predictions)), minlength=len(classes))
+        profile['predictions'] = {'classes': classes.tolist(), 'shares': _shares(counts).tolist()}
+        return profile
+
+    @classmethod
+    def save_reference(cls, profile, model_path):
+        """Writes the profile next to the model, tagged with the saved pickle's signature."""
+        path = cls.sidecar_for(model_path)
+        profile = dict(profile, model_signature=cls._signature(model_path),
+                       computed_at=time.strftime('%Y-%m-%dT%H:%M:%S'))
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        with open(tmp_path, 'w') as f:
+            json.dump(profile, f)
+        os.replace(tmp_path, path)
+        logging.getLogger(__name__).info(f"Drift reference profile saved to '{path}'")
+        return path
+
+    @classmethod
+    def for_model(cls, model_path, **kwargs):
+        """Monitor against the profile saved with model_path. Raises FileNotFoundError without one."""
+        path = cls.sidecar_for(model_path)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Drift reference profile not found at {path}. Please train the model first.")
+        with open(path) as f:
+            reference = json.load(f)
+        monitor = cls(reference, **kwargs)
+        if reference.get('model_signature') != cls._signature(model_path):
+            monitor.logger.warning(f"Drift reference {path} was computed for a different version of {model_path}")
+        return monitor
+
+    def observe_frame(self, df, labels):
+        """Adds a scored batch: a frame with the input columns and its predicted labels."""
+        if len(df) <= SMALL_BATCH:
+            # Plain lists per column, then the scalar path row by row
+            values = [df[column].tolist() if column in df.columns else [None] * len(df) for column in self.columns]
+            rows = zip(*values)
+            with self._lock:
+                for row, label in zip(rows, labels):
+                    self._observe_row(row, label)
+            return
+        with self._lock:
+            for column, sketch in self.numeric.items():
+                if column in df.columns:
+                    sketch.observe_values(df[column])
+                else:
+                    sketch.missing += len(df)
+            for column, sketch in self.categorical.items():
+                sketch.observe_values(df[column] if column in df.columns else [None] * len(df))
+            codes = self.class_index.get_indexer(np.asarray(labels))
+            codes[codes < 0] = len(self.classes)
+            self.class_counts += np.bincount(codes, minlength=len(self.class_counts))
+            self.rows += len(df)
+
+    def observe_record(self, record, label):
+        """Adds one scored dict record; plain scalar updates, no pandas."""
+        row = [record.get(column) for column in self.columns]
+        with self._lock:
+            self._observe_row(row, label)
+
+    def _observe_row(self, row, label):
+        # row holds the values of self.columns: numeric ones first, then categorical
+        for sketch, value in zip(self._sketches, row):
+            sketch.observe_value(value)
+        self.class_counts[self.class_codes.get(label, len(self.classes))] += 1
+        self.rows += 1
+
+    def observe(self, data, labels):
+        """Adds a scored batch in any input form CSATInference accepts."""
+        if isinstance(data, dict):
+            self.observe_record(data, labels[0])
+        elif isinstance(data, list):
+            rows = [[record.get(column) for column in self.columns] for record in data]
+            with self._lock:
+                for row, label in zip(rows, labels):
+                    self._observe_row(row, label)
+        elif isinstance(data, pd.DataFrame):
+            self.observe_frame(data, labels)
+        else:
+            self.observe_frame(pd.DataFrame.from_records(data), labels)
+
+    def report(self, min_rows=500):
+        """
+        Drift per input column and for the predictions, against the reference profile.
+        'drifted' lists what crossed PSI_ALERT (or UNKNOWN_ALERT for unseen categories);
+        it stays empty until min_rows rows have been observed. A numeric column's PSI is
+        computed over its present values only, so it needs min_rows of those itself.
+        """
+        with self._lock:
+            numeric = {column: sketch.report() for column, sketch in self.numeric.items()}
+            categorical = {column: sketch.report() for column, sketch in self.categorical.items()}
+            counts = self.class_counts.copy()
+            rows = self.rows
+        expected = list(self.reference['predictions']['shares']) + [0.0]
+        shares = _shares(counts)
+        predictions = {
+            'psi': psi(expected, shares) if rows else None,
+            'shares': {str(label): float(share) for label, share in zip(self.classes, shares)},
+            'reference_shares': {str(label): share for label, share in
+                                 zip(self.classes, self.reference['predictions']['shares'])},
+        }
+        drifted = []
+        if rows >= min_rows:
+            for column, stats in numeric.items():
+                if stats['present'] >= min_rows and stats['psi'] >= self.PSI_ALERT:
+                    drifted.append(column)
+            for column, stats in categorical.items():
+                if stats['psi'] is not None and stats['psi'] >= self.PSI_ALERT:
+                    drifted.append(column)
+                elif stats['unknown_rate'] is not None and stats['unknown_rate'] >= self.UNKNOWN_ALERT:
+                    drifted.append(column)
+            if predictions['psi'] >= self.PSI_ALERT:
+                drifted.append('predictions')
+        return {
+            'rows': rows,
+            'since': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+            'reference_rows': self.reference['rows'],
+            'reference_computed_at': self.reference.get('computed_at'),
+            'ready': rows >= min_rows,
+            'drifted': drifted,
+            'numeric': numeric,
+            'categorical': categorical,
+            'predictions': predictions,
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a CSV through the model with drift monitoring and print the report.")
+    parser.add_argument('data_path', help="CSV of raw tickets to replay")
+    parser.add_argument('--model-dir', default='models')
+    parser.add_argument('--rows', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=256)
+    args = parser.parse_args()
+
+    from src.csat_pipelining import engineer_features
+    from src.inference import CSATInference
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        df = engineer_features(pd.read_csv(args.data_path, nrows=args.rows))
+    engine = CSATInference(model_dir=args.model_dir, monitor_drift=True)
+    start = time.perf_counter()
+    for offset in range(0, len(df), args.batch_size):
+        engine.predict_batch(df.iloc[offset:offset + args.batch_size])
+    logging.info(f"Scored {len(df):,} rows in {time.perf_counter() - start:.1f}s")
+    print(json.dumps(engine.drift_report(), indent=2))
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,159 @@
+import argparse
+import logging
+import time
+import warnings
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from src.csat_pipelining import NUMERIC_FEATURES, CATEGORICAL_FEATURES, TEXT_FEATURE
+from src.forest_engine import FlatForest
+from src.model_insights import column_slices
+
+class ForestExplainer:
+    """
+    Per-prediction explanations for a CSATPredictor forest pipeline.
+
+    Contributions come from the trees' decision paths (the "treeinterpreter" split):
+    the forest's average root value is the bias, and each split a row passes through
+    credits its feature with the change in node value. Bias plus contributions equals
+    the prediction exactly. All rows and trees of a block are walked together through
+    FlatForest, one level at a time. Transformed features are then summed back to their
+    input: one entry per numeric and categorical column and one per TF-IDF term.
+
+    target='predicted' explains the probability of each row's predicted class;
+    target='expected' explains the expected CSAT score, sum(class * probability).
+    """
+    TARGETS = ('predicted', 'expected')
+
+    def __init__(self, pipeline):
+        classifier = pipeline[-1]
+        # sklearn's compiled apply() finds the leaves fastest; FlatForest holds the node arrays
+        self.forest = None
+        if isinstance(classifier, FlatForest):
+            self.engine = classifier
+        elif hasattr(classifier, 'estimators_') and hasattr(classifier, 'predict_proba'):
+            self.forest = classifier
+            self.engine = FlatForest(classifier)
+        else:
+            raise ValueError(f"Explanations need a tree forest classifier, not {type(classifier).__name__}")
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.INFO)
+        self.features, self.kinds, self.columns, grouping = self._units(pipeline[0], self.engine.n_features)
+        # Transformed feature behind each unit, used to tell present from absent terms
+        self.feature_of = np.zeros(len(self.features), dtype=np.int64)
+        self.feature_of[grouping] = np.arange(len(grouping))
+        # Sums transformed-feature contributions into per-unit ones with a single sparse product
+        self.grouping = sp.csr_matrix((np.ones(len(grouping)), (np.arange(len(grouping)), grouping)),
+                                      shape=(len(grouping), len(self.features)))
+
+    @staticmethod
+    def _units(preprocessor, n_features):
+        """Returns (names, kinds, input columns, unit index per transformed feature)."""
+        slices = column_slices(preprocessor)
+        if slices is None:
+            # Unknown layout: explain the transformed features themselves
+            names = [str(n) for n in preprocessor.get_feature_names_out()]
+            return names, ['feature'] * n_features, [None] * n_features, np.arange(n_features)
+
+        names, kinds, columns = [], [], []
+        grouping = np.empty(n_features, dtype=np.int64)
+        for column in NUMERIC_FEATURES + CATEGORICAL_FEATURES:
+            grouping[slices[column]] = len(names)
+            names.append(column)
+            kinds.append('numeric' if column in NUMERIC_FEATURES else 'categorical')
+            columns.append(column)
+        terms = preprocessor.named_transformers_['txt'].get_feature_names_out()
+        grouping[slices[TEXT_FEATURE]] = len(names) + np.arange(len(terms))
+        names.extend(f"{TEXT_FEATURE}: {term}" for term in terms)
+        kinds.extend(['term'] * len(terms))
+        columns.extend(terms)
+        return names, kinds, columns, grouping
+
+    def target_weights(self, proba, target):
+        """Class weights per row for the chosen target."""
+        if target == 'predicted':
+            weights = np.zeros_like(proba)
+            weights[np.arange(len(proba)), proba.argmax(axis=1)] = 1.0
+            return weights
+        if target == 'expected':
+            return np.tile(self.engine.classes_.astype(np.float64), (len(proba), 1))
+        raise ValueError(f"Unknown target '{target}'. Use one of {self.TARGETS}.")
+
+    def explain(self, df, features, top_k=5, target='predicted'):
+        """
+        Explains a prepared batch given its transformed features. The probabilities come
+        from the same leaves the contributions are walked from, so the forest runs once.
+        Returns (proba, bias, contributions, top): contributions has one column per entry
+        of self.features, and top lists each row's top_k (label, contribution) pairs by
+        absolute size, or is None when top_k is falsy.
+        """
+        X = self.engine._prepare(features)
+        if self.forest is not None:
+            leaves = self.forest.apply(X) + self.engine.roots
+        else:
+            leaves = self.engine.apply(X)
+        proba = self.engine.value[leaves].sum(axis=1) / self.engine.n_trees
+        bias, raw = self.engine.contributions(X, self.target_weights(proba, target), leaves)
+        contributions = np.asarray(raw @ self.grouping)
+        top = self.top(df, X, contributions, top_k) if top_k else None
+        return proba, bias, contributions, top
+
+    def top(self, df, X, contributions, k):
+        k = min(k, contributions.shape[1])
+        order = np.argpartition(-np.abs(contributions), k - 1, axis=1)[:, :k]
+        rows = np.arange(len(contributions))[:, None]
+        order = np.take_along_axis(order, np.argsort(-np.abs(contributions[rows, order]), axis=1), axis=1)
+        values = contributions[rows, order]
+
+        inputs = {column: df[column].to_numpy() for column in NUMERIC_FEATURES + CATEGORICAL_FEATURES
+                  if column in df.columns}
+        return [[(self._label(i, int(unit), inputs, X), float(value)) for unit, value in zip(order[i], values[i])]
+                for i in range(len(order))]
+
+    def _label(self, row, unit, inputs, X):
+        kind, column = self.kinds[unit], self.columns[unit]
+        if kind == 'term':
+            # A term also matters when it is absent, since the trees split on it either way
+            present = X[row, self.feature_of[unit]] > 0
+            return f"{TEXT_FEATURE} {'contains' if present else 'lacks'} '{column}'"
+        if kind in ('numeric', 'categorical'):
+            value = inputs[column][row] if column in inputs else None
+            return f"{column}={'missing' if pd.isna(value) else value}"
+        return self.features[unit]
+
+def main():
+    parser = argparse.ArgumentParser(description="Explain batch predictions and time the overhead over plain scoring.")
+    parser.add_argument('data_path', help="CSV of raw tickets to explain")
+    parser.add_argument('--model-dir', default='models')
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--target', choices=ForestExplainer.TARGETS, default='predicted')
+    parser.add_argument('--show', type=int, default=5, help="number of explained rows to print")
+    args = parser.parse_args()
+
+    from src.csat_pipelining import engineer_features
+    from src.inference import CSATInference
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        df = engineer_features(pd.read_csv(args.data_path, nrows=args.rows))
+    engine = CSATInference(model_dir=args.model_dir)
+
+    start = time.perf_counter()
+    result = engine.predict_batch(df, return_proba=True)
+    plain = time.perf_counter() - start
+    start = time.perf_counter()
+    explanation = engine.explain_batch(df, top_k=args.top_k, target=args.target)
+    explained = time.perf_counter() - start
+
+    weights = engine.explainer.target_weights(result.probabilities, args.target)
+    error = np.abs(explanation.bias + explanation.contributions.sum(axis=1)
+                   - (result.probabilities * weights).sum(axis=1)).max()
+    logging.info(f"{len(df):,} rows: plain scoring {plain:.2f}s, with explanations {explained:.2f}s "
+                 f"(x{explained / plain:.1f}); max additivity error {error:.1e}")
+    for i in range(min(args.show, len(df))):
+        drivers = ', '.join(f"{label} ({value:+.3f})" for label, value in explanation.top[i])
+        print(f"row {i}: CSAT {result.labels[i]} (bias {explanation.bias[i]:.3f}) <- {drivers}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+class FeatureCache:
+    """
+    Persists the engineered training frame as a columnar NumPy layout:
+    one .npy file per column plus a small JSON header. Numeric columns are stored
+    as float32 (or the smallest integer type when they have no gaps), dates as int64
+    nanoseconds, and string columns as int32 codes into a UTF-8 blob of their unique values.
+    """
+    META_FILE = 'meta.json'
+    HASH_BLOCK_SIZE = 8 * 1024 * 1024
+
+    def __init__(self, cache_dir, version):
+        self.cache_dir = cache_dir
+        self.version = version
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.INFO)
+
+    def source_hash(self, source_path):
+        """Hashes the raw bytes of the source file."""
+        digest = hashlib.blake2b(digest_size=16)
+        with open(source_path, 'rb') as f:
+            for block in iter(lambda: f.read(self.HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def entry_dir(self, source_path, columns):
+        """Cache entry directory for this source content, feature version and column set."""
+        key = hashlib.blake2b(digest_size=8)
+        key.update(self.source_hash(source_path).encode())
+        key.update(f"v{self.version}".encode())
+        key.update(json.dumps(list(columns)).encode())
+        name = os.path.splitext(os.path.basename(source_path))[0]
+        return os.path.join(self.cache_dir, f"{name}-{key.hexdigest()}")
+
+    def load(self, source_path, columns):
+        """Returns the cached frame, or None when no valid entry exists."""
+        entry = self.entry_dir(source_path, columns)
+        meta_path = os.path.join(entry, self.META_FILE)
+        if not os.path.exists(meta_path):
+            return None
+
+        with open(meta_path) as f:
+            meta = json.load(f)
+
+        data = {}
+        for i, col in enumerate(meta['columns']):
+            values = np.load(os.path.join(entry, f"{i}.npy"), mmap_mode='r')
+            if col['kind'] == 'numeric':
+                data[col['name']] = np.asarray(values)
+            elif col['kind'] == 'datetime':
+                data[col['name']] = np.asarray(values).view('datetime64[ns]')
+            else:
+                categories = self._read_strings(entry, i)
+                data[col['name']] = pd.Categorical.from_codes(values, categories=categories)
+        return pd.DataFrame(data, columns=[c['name'] for c in meta['columns']])
+
+    def save(self, source_path, df, columns):
+        """
+        Writes the selected columns of df to a new cache entry and returns the compacted frame.
+        Older entries built from the same source file are removed.
+        """
+        entry = self.entry_dir(source_path, columns)
+        source = os.path.abspath(source_path)
+        self._prune(source)
+        tmp_dir = f"{entry}.tmp-{os.getpid()}"
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        compact = self.compact(df, columns)
+        meta = {'source': source, 'version': self.version, 'rows': len(compact), 'columns': []}
+        for i, name in enumerate(compact.columns):
+            series = compact[name]
+            if pd.api.types.is_datetime64_any_dtype(series.dtype):
+                # int64 nanoseconds; NaT round-trips as the int64 minimum
+                np.save(os.path.join(tmp_dir, f"{i}.npy"), series.to_numpy(dtype='datetime64[ns]').view(np.int64))
+                meta['columns'].append({'name': name, 'kind': 'datetime'})
+            elif isinstance(series.dtype, pd.CategoricalDtype):
+                np.save(os.path.join(tmp_dir, f"{i}.npy"), series.cat.codes.to_numpy(dtype=np.int32))
+                self._write_strings(tmp_dir, i, series.cat.categories)
+                meta['columns'].append({'name': name, 'kind': 'categorical'})
+            else:
+                np.save(os.path.join(tmp_dir, f"{i}.npy"), series.to_numpy())
+                meta['columns'].append({'name': name, 'kind': 'numeric', 'dtype': str(series.dtype)})
+
+        with open(os.path.join(tmp_dir, self.META_FILE), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp_dir, entry)
+        self.logger.info(f"Feature cache written to {entry} ({len(compact)} rows)")
+        return compact
+
+    @staticmethod
+    def compact(df, columns):
+        """Keeps only the requested columns and downcasts them to compact dtypes."""
+        data = {}
+        for name in columns:
+            if name not in df.columns:
+                continue
+            series = df[name]
+            if pd.api.types.is_datetime64_any_dtype(series.dtype):
+                data[name] = series
+            elif pd.api.types.is_numeric_dtype(series.dtype):
+                values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+                if not np.isnan(values).any() and np.array_equal(values, np.round(values)):
+                    data[name] = pd.to_numeric(series, downcast='integer').to_numpy()
+                else:
+                    data[name] = values.astype(np.float32)
+            else:
+                data[name] = pd.Categorical(series.astype(object).where(series.notna(), None))
+        return pd.DataFrame(data, index=df.index)
+
+    def _write_strings(self, entry, i, values):
+        encoded = [str(v).encode('utf-8') for v in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(b) for b in encoded])
+        np.save(os.path.join(entry, f"{i}.offsets.npy"), offsets)
+        with open(os.path.join(entry, f"{i}.strings.bin"), 'wb') as f:
+            f.write(b''.join(encoded))
+
+    def _read_strings(self, entry, i):
+        offsets = np.load(os.path.join(entry, f"{i}.offsets.npy"))
+        with open(os.path.join(entry, f"{i}.strings.bin"), 'rb') as f:
+            blob = f.read()
+        return [blob[offsets[j]:offsets[j + 1]].decode('utf-8') for j in range(len(offsets) - 1)]
+
+    def _prune(self, source):
+        """Removes stale entries that were built from the same source path."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            meta_path = os.path.join(self.cache_dir, name, self.META_FILE)
+            if not os.path.exists(meta_path):
+                continue
+            try:
+                with open(meta_path) as f:
+                    stale = json.load(f).get('source') == source
+            except (OSError, ValueError):
+                stale = True
+            if stale:
+                shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
@@ -0,0 +1,684 @@
+import argparse
+import logging
+import time
+from statistics import NormalDist
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.model_selection import train_test_split
+from sklearn.tree._tree import Tree
+
+def settled(totals, used, n_trees, squares=None, z=None):
+    """
+    Early-exit rule for soft-voting forests, per row of totals (summed per-tree class
+    distributions after `used` of `n_trees` trees). Every tree adds a distribution summing
+    to 1, so it moves the gap between two classes' totals by at most 1: once the lead over
+    the runner-up exceeds the number of trees left, the full forest is certain to predict
+    the same class. With z (a normal quantile) and squares (summed per-tree outer products)
+    a row also settles once the final lead is positive at that confidence, treating the
+    remaining trees as further draws of the per-tree margins seen so far.
+    """
+    remaining = n_trees - used
+    ranked = np.argsort(totals, axis=1)
+    leader, runner_up = ranked[:, -1], ranked[:, -2]
+    rows = np.arange(len(totals))
+    lead = totals[rows, leader] - totals[rows, runner_up]
+    done = lead > remaining
+    if z is not None and used > 1:
+        # Per-tree margin d = p[leader] - p[runner_up]: mean and sample variance so far
+        mean = lead / used
+        second_moment = (squares[rows, leader, leader] - 2 * squares[rows, leader, runner_up]
+                         + squares[rows, runner_up, runner_up]) / used
+        variance = np.maximum(second_moment - mean ** 2, 0.0) * used / (used - 1)
+        # Spread of the remaining trees' sum, widened because the mean itself is estimated
+        spread = np.sqrt(remaining * variance * n_trees / used)
+        done |= lead + remaining * mean - z * spread > 0
+    return done
+
+def confidence_quantile(confidence):
+    """Normal quantile for settled(), or None without a confidence bound."""
+    if confidence is None:
+        return None
+    if not 0.5 < confidence < 1:
+        raise ValueError("confidence must be between 0.5 and 1")
+    return NormalDist().inv_cdf(confidence)
+
+class FlatForest(ClassifierMixin, BaseEstimator):
+    """
+    Array-backed inference for a fitted RandomForestClassifier (or ExtraTreesClassifier).
+    All trees are flattened into one set of contiguous node arrays and a batch is
+    scored by advancing every (row, tree) pair one level at a time, so there is no
+    per-tree Python loop and no joblib dispatch.
+
+    Thresholds can be stored as float32; they are rounded down so that comparisons
+    against float32 features give exactly the same splits as sklearn.
+    """
+    BLOCK_ROWS = 4096
+    LEVELS_PER_CHECK = 4
+    # Node records for the leaf-to-root walk in contributions(); see path_table
+    PATH_DTYPE = [('parent', np.int32), ('feature', np.int32)]
+
+    # Arrays that fully describe the engine; see to_arrays/from_arrays
+    ARRAYS = ('roots', 'feature', 'threshold', 'children', 'is_leaf', 'value', 'classes_')
+
+    def __init__(self, forest, float32_thresholds=False):
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.INFO)
+
+        self.classes_ = forest.classes_
+        n_classes = len(self.classes_)
+        trees = [e.tree_ for e in forest.estimators_]
+        self.n_trees = len(trees)
+        self.n_features = forest.n_features_in_
+        self.n_features_in_ = self.n_features
+
+        sizes = np.array([t.node_count for t in trees])
+        self.roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int32)
+
+        features, thresholds, left, right, values = [], [], [], [], []
+        for root, tree in zip(self.roots, trees):
+            is_leaf = tree.children_left == -1
+            nodes = np.arange(tree.node_count) + root
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(tree.threshold.astype(np.float64))
+            # Leaves point to themselves so finished (row, tree) pairs can keep stepping harmlessly
+            left.append(np.where(is_leaf, nodes, tree.children_left + root))
+            right.append(np.where(is_leaf, nodes, tree.children_right + root))
+            node_values = tree.value[:, 0, :n_classes].astype(np.float64)
+            sums = node_values.sum(axis=1, keepdims=True)
+            if not np.allclose(sums, 1.0):
+                sums[sums == 0] = 1.0
+                node_values = node_values / sums
+            values.append(node_values)
+
+        self.feature = np.concatenate(features)
+        self.threshold = np.concatenate(thresholds)
+        if float32_thresholds:
+            self.threshold = self._round_down_float32(self.threshold)
+        # children[2 * node] is the left child, children[2 * node + 1] the right one
+        self.children = np.column_stack([np.concatenate(left), np.concatenate(right)]).ravel().astype(np.int32)
+        self.is_leaf = self.children[0::2] == np.arange(len(self.feature))
+        self.value = np.concatenate(values)
+        self._routed = None
+
+    def to_arrays(self):
+        return {name: np.asarray(getattr(self, name)) for name in self.ARRAYS}
+
+    @classmethod
+    def from_arrays(cls, arrays, n_features):
+        """Rebuilds an engine from to_arrays() output, e.g. read-only memory-mapped .npy files."""
+        engine = cls.__new__(cls)
+        engine.logger = logging.getLogger(__name__)
+        for name in cls.ARRAYS:
+            setattr(engine, name, arrays[name])
+        engine.n_trees = len(engine.roots)
+        engine.n_features = n_features
+        engine.n_features_in_ = n_features
+        engine._routed = None
+        return engine
+
+    def get_params(self, deep=True):
+        # Built from a forest rather than from hyperparameters, so there is nothing to clone
+        return {}
+
+    def fit(self, X, y):
+        raise NotImplementedError("FlatForest is built from a fitted forest; it cannot be trained")
+
+    def __sklearn_is_fitted__(self):
+        # Lets a FlatForest stand in as the final step of a fitted sklearn Pipeline
+        return True
+
+    @staticmethod
+    def _round_down_float32(threshold):
+        """Largest float32 <= each threshold, so x32 <= t32 exactly when x32 <= t."""
+        t32 = threshold.astype(np.float32)
+        over = t32.astype(np.float64) > threshold
+        t32[over] = np.nextafter(t32[over], np.float32(-np.inf))
+        return t32
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.children, self.value))
+
+    def _prepare(self, X):
+        if sp.issparse(X):
+            X = X.toarray()
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def apply(self, X):
+        """Leaf node index (into the flattened arrays) per row and tree, shape (n_rows, n_trees)."""
+        X = self._prepare(X)
+        n_rows = X.shape[0]
+        leaves = np.empty((n_rows, self.n_trees), dtype=np.int32)
+        for start in range(0, n_rows, self.BLOCK_ROWS):
+            block = X[start:start + self.BLOCK_ROWS]
+            leaves[start:start + len(block)] = self._traverse(block)
+        return leaves
+
+    def _traverse(self, X, roots=None):
+        """Leaves of every row in the trees starting at roots (default: all trees), shape (n_rows, n_roots)."""
+        roots = self.roots if roots is None else roots
+        n_rows = X.shape[0]
+        flat_X = X.ravel()
+        node = np.tile(roots, n_rows)
+        # Offset of each pair's row in flat_X, so a feature lookup is a single gather
+        row_offset = np.repeat(np.arange(n_rows, dtype=np.int64) * X.shape[1], len(roots))
+        pair = np.arange(len(node))
+        leaves = np.empty(len(node), dtype=self.children.dtype)
+        while True:
+            # Leaves point to themselves, so a few levels can run without checking for them
+            for _ in range(self.LEVELS_PER_CHECK):
+                went_right = flat_X[row_offset + self.feature[node]] > self.threshold[node]
+                node = self.children[2 * node + went_right]
+            done = self.is_leaf[node]
+            if done.all():
+                leaves[pair] = node
+                break
+            # Drop finished pairs once they are a sizeable share of the active set
+            if done.sum() * 4 > len(node):
+                leaves[pair[done]] = node[done]
+                keep = ~done
+                node, row_offset, pair = node[keep], row_offset[keep], pair[keep]
+        return leaves.reshape(n_rows, len(roots))
+
+    def _router(self):
+        """
+        The whole forest as one sklearn Tree, so _walk_one takes a single compiled apply()
+        call however many trees it walks. Extra feature n_features holds a tree number, and
+        a balanced block of router nodes in front sends each row to that tree's root; below
+        them every node keeps its flattened index, shifted by the router size. Built on first
+        use (predict_proba_one, or single-row early exit); costs another 64 bytes per node.
+        """
+        if self._routed is not None:
+            return self._routed
+        n_router = self.n_trees - 1
+        left = np.empty(n_router, dtype=np.int64)
+        right = np.empty(n_router, dtype=np.int64)
+        threshold = np.empty(n_router)
+        # Router node i splits the trees in ranges[i] in half on the tree-number feature
+        ranges = [(0, self.n_trees)] if n_router else []
+        for i, (first, stop) in enumerate(ranges):
+            middle = (first + stop) // 2
+            threshold[i] = middle - 0.5
+            for side, (lo, hi) in ((left, (first, middle)), (right, (middle, stop))):
+                if hi - lo == 1:
+                    side[i] = n_router + self.roots[lo]
+                else:
+                    side[i] = len(ranges)
+                    ranges.append((lo, hi))
+
+        tree = Tree(self.n_features + 1, np.ones(1, dtype=np.intp), 1)
+        nodes = np.zeros(n_router + len(self.feature), dtype=tree.__getstate__()['nodes'].dtype)
+        is_leaf = np.asarray(self.is_leaf)
+        children = np.asarray(self.children, dtype=np.int64) + n_router
+        nodes['left_child'] = np.concatenate([left, np.where(is_leaf, -1, children[0::2])])
+        nodes['right_child'] = np.concatenate([right, np.where(is_leaf, -1, children[1::2])])
+        nodes['feature'] = np.concatenate([np.full(n_router, self.n_features), np.where(is_leaf, -2, self.feature)])
+        nodes['threshold'] = np.concatenate([threshold, np.where(is_leaf, -2.0, self.threshold)])
+        if 'missing_go_to_left' in nodes.dtype.names:
+            # NaN > threshold is False, so _traverse sends missing values left
+            nodes['missing_go_to_left'] = 1
+        nodes['n_node_samples'] = 1
+        nodes['weighted_n_node_samples'] = 1.0
+        # Leaf values live in self.value; the Tree only needs a placeholder per node
+        tree.__setstate__({'max_depth': 0, 'node_count': len(nodes), 'nodes': nodes,
+                           'values': np.zeros((len(nodes), 1, 1))})
+        self._routed = (tree, n_router)
+        return self._routed
+
+    def _walk_one(self, x, roots):
+        """
+        Leaves of one row in the trees starting at roots, shape (1, n_roots). The row is
+        repeated once per tree with that tree's number and walked by sklearn's compiled
+        Tree.apply through _router: a few microseconds for the whole forest, where a call
+        per tree or a numpy pass per level costs far more for a single row.
+        """
+        tree, n_router = self._router()
+        rows = np.empty((len(roots), self.n_features + 1), dtype=np.float32)
+        rows[:, :-1] = x
+        rows[:, -1] = np.searchsorted(self.roots, roots)
+        return (tree.apply(rows) - n_router).reshape(1, -1)
+
+    def predict_proba(self, X):
+        """Mean of the per-tree class distributions, as RandomForestClassifier.predict_proba."""
+        X = self._prepare(X)
+        proba = np.empty((X.shape[0], len(self.classes_)))
+        for start in range(0, X.shape[0], self.BLOCK_ROWS):
+            leaves = self._traverse(X[start:start + self.BLOCK_ROWS])
+            proba[start:start + len(leaves)] = self.value[leaves].sum(axis=1) / self.n_trees
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(self.predict_proba(X).argmax(axis=1))
+
+    def predict_proba_one(self, x):
+        """
+        predict_proba for a single row, as a 1-D array, through _walk_one. Much faster than
+        the level-by-level pass for one row, but the first call builds the router, a private
+        in-memory copy of the forest even when the arrays are memory-mapped.
+        """
+        x = self._prepare(x.reshape(1, -1) if isinstance(x, np.ndarray) else x)[0]
+        return self.value[self._walk_one(x, self.roots)[0]].sum(axis=0) / self.n_trees
+
+    def predict_proba_adaptive(self, X, block_size=10, confidence=None):
+        """
+        Early-exit scoring: trees are evaluated in blocks of block_size and a row stops once
+        its leading class can no longer be overturned, or is safe at the given confidence
+        (e.g. 0.99); see settled(). Without a confidence bound the labels always match
+        predict. Returns (proba, trees_used); proba is the mean over the trees each row
+        used, so it equals predict_proba for rows that used all of them.
+
+        Exact mode saves trees on batches only. No row can settle before n_trees // 2 + 1
+        trees have voted, and for a single row the block-by-block walks cost more than the
+        trees they skip, so a single row without a confidence bound takes the one-call
+        full walk of predict_proba_one and reports every tree as used.
+        """
+        X = self._prepare(X)
+        if X.shape[0] == 1 and confidence is None:
+            proba = self.value[self._walk_one(X[0], self.roots)[0]].sum(axis=0) / self.n_trees
+            return proba[None, :], np.full(1, self.n_trees, dtype=np.int32)
+        n_classes = len(self.classes_)
+        proba = np.empty((X.shape[0], n_classes))
+        trees_used = np.empty(X.shape[0], dtype=np.int32)
+        z = confidence_quantile(confidence)
+        for start in range(0, X.shape[0], self.BLOCK_ROWS):
+            block = X[start:start + self.BLOCK_ROWS]
+            totals, used = self._adaptive_votes(block, max(1, block_size), z)
+            proba[start:start + len(block)] = totals / used[:, None]
+            trees_used[start:start + len(block)] = used
+        return proba, trees_used
+
+    def _adaptive_votes(self, X, block_size, z):
+        """Per-row vote totals and number of trees used; see predict_proba_adaptive."""
+        n_rows, n_classes = X.shape[0], len(self.classes_)
+        totals = np.zeros((n_rows, n_classes))
+        # Per-row sums of the per-tree outer products, for the variance of any class margin
+        squares = np.zeros((n_rows, n_classes, n_classes)) if z is not None else None
+        used = np.zeros(n_rows, dtype=np.int32)
+        active = np.arange(n_rows)
+        stop = 0
+        while stop < self.n_trees:
+            first = stop
+            stop = min(first + block_size, self.n_trees)
+            if z is None:
+                # Without a confidence bound nothing can settle before a majority of the trees has voted
+                stop = max(stop, self.n_trees // 2 + 1)
+            roots = self.roots[first:stop]
+            if len(active) == 1:
+                leaves = self._walk_one(X[active[0]], roots)
+            else:
+                leaves = self._traverse(X[active], roots)
+            votes = self.value[leaves]
+            totals[active] += votes.sum(axis=1)
+            if squares is not None:
+                squares[active] += np.einsum('rti,rtj->rij', votes, votes)
+            used[active] = stop
+            if stop == self.n_trees:
+                break
+            done = settled(totals[active], stop, self.n_trees, None if squares is None else squares[active], z)
+            active = active[~done]
+            if not len(active):
+                break
+        return totals, used
+
+    def contributions(self, X, weights, leaves=None):
+        """
+        Decision-path feature contributions to weights . proba for each row, where weights
+        has one row of class weights per input row (one-hot for a single class's probability).
+        Every step from a node to its child is credited to the node's split feature with the
+        change in the weighted node value, averaged over trees. leaves may carry apply()
+        output computed elsewhere. Returns (bias, contributions) with
+        bias + contributions.sum(axis=1) equal to the weighted probability.
+        """
+        X = self._prepare(X)
+        leaves = self.apply(X) if leaves is None else leaves
+        weights = np.asarray(weights, dtype=np.float64)
+        bias = weights @ self.value[self.roots].mean(axis=0)
+        path = self.path_table()
+        contributions = np.empty((X.shape[0], self.n_features))
+        # Rows sharing a weight vector (e.g. the same predicted class) share one delta table
+        distinct, group = np.unique(weights, axis=0, return_inverse=True)
+        group = group.ravel()
+        for g, w in enumerate(distinct):
+            rows = np.flatnonzero(group == g)
+            table = path
+            # A delta column costs one pass over every node; small batches compute deltas on their paths only
+            if len(rows) * self.n_trees * 256 >= len(path):
+                node_value = self.value @ w
+                table = np.empty(len(path), dtype=self.PATH_DTYPE + [('delta', np.float64)])
+                table['parent'], table['feature'] = path['parent'], path['feature']
+                table['delta'] = node_value - node_value[path['parent']]
+            for start in range(0, len(rows), self.BLOCK_ROWS):
+                block = rows[start:start + self.BLOCK_ROWS]
+                contributions[block] = self._path_contributions(leaves[block], table, w)
+        return bias, contributions
+
+    def path_table(self):
+        """
+        Per-node (parent, split feature of the parent) records for walking from a leaf up
+        to its root with one gather per step. Roots are their own parent.
+        """
+        if getattr(self, '_path', None) is None:
+            parent = np.arange(len(self.feature), dtype=np.int32)
+            internal = np.flatnonzero(~self.is_leaf)
+            parent[self.children[2 * internal]] = internal
+            parent[self.children[2 * internal + 1]] = internal
+            path = np.empty(len(parent), dtype=self.PATH_DTYPE)
+            path['parent'] = parent
+            path['feature'] = self.feature[parent]
+            self._path = path
+        return self._path
+
+    def _path_contributions(self, leaves, path, weights):
+        """
+        Walks every (row, tree) pair from its leaf up to the root, summing the change in
+        weighted node value per split feature. A 'delta' field in path holds those changes
+        precomputed; keeping it in the same record saves a second random gather per step.
+        """
+        n_rows = len(leaves)
+        node = leaves.ravel()
+        row_offset = np.repeat(np.arange(n_rows, dtype=np.int64) * self.n_features, self.n_trees)
+        totals = np.zeros(n_rows * self.n_features)
+        with_delta = 'delta' in path.dtype.names
+        while len(node):
+            # Mirror of _traverse: a root steps to itself and adds a zero delta
+            for _ in range(self.LEVELS_PER_CHECK):
+                step = path[node]
+                if with_delta:
+                    change = step['delta']
+                else:
+                    change = (self.value[node] - self.value[step['parent']]) @ weights
+                totals += np.bincount(row_offset + step['feature'], weights=change, minlength=totals.size)
+                node = step['parent']
+            keep = path['parent'][node] != node
+            node, row_offset = node[keep], row_offset[keep]
+        return totals.reshape(n_rows, self.n_features) / self.n_trees
+
+    def benchmark(self, forest, X, batch_sizes=(1, 64, 10_000), repeats=5):
+        """
+        Times this engine against forest.predict_proba on the first rows of X for each
+        batch size and checks that both give the same probabilities.
+        """
+        results = []
+        for batch_size in batch_sizes:
+            batch = X[:batch_size]
+            expected = forest.predict_proba(batch)
+            if not np.allclose(expected, self.predict_proba(batch), rtol=0, atol=1e-12):
+                raise AssertionError(f"FlatForest diverges from the forest at batch size {batch_size}")
+            timings = {}
+            for name, fn in [('sklearn', forest.predict_proba), ('flat', self.predict_proba)]:
+                runs = []
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    fn(batch)
+                    runs.append(time.perf_counter() - start)
+                timings[name] = float(np.median(runs))
+            results.append({
+                'batch_size': batch.shape[0],
+                'sklearn_ms': timings['sklearn'] * 1000.0,
+                'flat_ms': timings['flat'] * 1000.0,
+                'speedup': timings['sklearn'] / timings['flat'],
+            })
+            self.logger.info(f"batch={batch.shape[0]:>6}  sklearn={timings['sklearn'] * 1000:.2f} ms  "
+                             f"flat={timings['flat'] * 1000:.2f} ms  x{results[-1]['speedup']:.1f}")
+        return results
+
+    def early_exit_report(self, X, y, block_sizes=(5, 10, 20), confidences=(None, 0.999, 0.99, 0.95),
+                          single_rows=200):
+        """
+        Accuracy against labels y and latency of every early-exit setting on a holdout X,
+        each next to full-forest scoring, for choosing a setting. agreement is the share of
+        rows labelled as the full forest labels them (always 1.0 without a confidence bound).
+        single_ms times the first single_rows rows scored one at a time, as the live form
+        and API do (the full forest through predict_proba_one); batch_us is the per-row cost
+        of scoring X in one call.
+        """
+        X = self._prepare(X)
+        y = np.asarray(y)
+        single = X[:single_rows]
+
+        def timed(score, score_one):
+            start = time.perf_counter()
+            proba, trees = score(X)
+            batch_us = (time.perf_counter() - start) / len(X) * 1e6
+            # The first single-row call builds the router; that is load cost, not latency
+            score_one(single[:1])
+            start = time.perf_counter()
+            for i in range(len(single)):
+                score_one(single[i:i + 1])
+            single_ms = (time.perf_counter() - start) / max(len(single), 1) * 1000.0
+            return proba, trees, single_ms, batch_us
+
+        full, _, full_single_ms, full_batch_us = timed(lambda rows: (self.predict_proba(rows), None),
+                                                       lambda row: self.predict_proba_one(row[0]))
+        full_labels = full.argmax(axis=1)
+        results = [{'block_size': None, 'confidence': None, 'accuracy': float(np.mean(self.classes_[full_labels] == y)),
+                    'agreement': 1.0, 'mean_trees': float(self.n_trees), 'p95_trees': float(self.n_trees),
+                    'single_ms': full_single_ms, 'batch_us': full_batch_us}]
+        for block_size in block_sizes:
+            for confidence in confidences:
+                score = lambda rows: self.predict_proba_adaptive(rows, block_size, confidence)
+                proba, trees, single_ms, batch_us = timed(score, score)
+                labels = proba.argmax(axis=1)
+                results.append({
+                    'block_size': block_size,
+                    'confidence': confidence,
+                    'accuracy': float(np.mean(self.classes_[labels] == y)),
+                    'agreement': float(np.mean(labels == full_labels)),
+                    'mean_trees': float(trees.mean()),
+                    'p95_trees': float(np.percentile(trees, 95)),
+                    'single_ms': single_ms,
+                    'batch_us': batch_us,
+                })
+        for r in results:
+            setting = 'full forest' if r['block_size'] is None else \
+                f"block={r['block_size']:<3} confidence={r['confidence'] if r['confidence'] is not None else 'exact'}"
+            self.logger.info(f"{setting:<34} accuracy={r['accuracy']:.4f} agreement={r['agreement']:.4f} "
+                             f"trees mean={r['mean_trees']:.1f} p95={r['p95_trees']:.0f}  "
+                             f"single={r['single_ms']:.2f} ms (full {full_single_ms:.2f})  "
+                             f"batch={r['batch_us']:.1f} us/row (full {full_batch_us:.1f})")
+        return results
+
+class FlatBooster(ClassifierMixin, BaseEstimator):
+    """
+    Array-backed inference for a fitted HistGradientBoostingClassifier, laid out like
+    FlatForest: every predictor's nodes go into one set of contiguous arrays, and all
+    trees are walked at once. sklearn calls into an OpenMP loop once per tree and class,
+    which dominates the cost of a single row; for batches beyond a handful of rows
+    sklearn is faster (see CSATInference.BOOSTER_MAX_BATCH).
+
+    Splits follow sklearn's raw-data rules: NaN goes to the side learned for missing
+    values, categorical nodes test the category against the left bitset, and negative or
+    never-seen categories are treated as missing. The booster encodes categorical columns
+    again internally and moves them to the front; _encode repeats that. The predictors,
+    baseline, internal encoder and known categories are read from the booster's private
+    fitted state.
+    """
+    # Categories are binned into at most 256 codes, one bit each in sklearn's bitsets
+    N_CODES = 256
+
+    def __init__(self, booster):
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.INFO)
+
+        self.classes_ = booster.classes_
+        self.n_features = booster.n_features_in_
+        self.n_features_in_ = self.n_features
+        self.baseline = booster._baseline_prediction.ravel().astype(np.float64)
+        self.order, self.categories = None, []
+        if booster._preprocessor is not None:
+            is_categorical = booster.is_categorical_
+            self.order = np.concatenate([np.flatnonzero(is_categorical), np.flatnonzero(~is_categorical)])
+            self.categories = [c[~np.isnan(c)] for c in booster._preprocessor.named_transformers_['encoder'].categories_]
+        known_bitsets, f_idx_map = booster._bin_mapper.make_known_categories_bitsets()
+        known = self._unpack(known_bitsets)
+
+        predictors = [(k, predictor) for iteration in booster._predictors for k, predictor in enumerate(iteration)]
+        self.n_trees = len(predictors)
+        sizes = np.array([len(predictor.nodes) for _, predictor in predictors])
+        self.roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int32)
+        # Column k sums the trees that add to class k's raw score
+        self.tree_class = np.zeros((self.n_trees, len(self.baseline)))
+        self.tree_class[np.arange(self.n_trees), [k for k, _ in predictors]] = 1.0
+
+        # Row 0 of categorical_left is unused, so cat_row 0 marks a numeric split
+        categorical_left = [np.zeros((1, self.N_CODES), dtype=bool)]
+        features, thresholds, missing_left, cat_rows, left, right, values = [], [], [], [], [], [], []
+        for root, (_, predictor) in zip(self.roots, predictors):
+            nodes = predictor.nodes
+            is_leaf = nodes['is_leaf'].astype(bool)
+            index = np.arange(len(nodes)) + root
+            features.append(np.where(is_leaf, 0, nodes['feature_idx']).astype(np.int32))
+            thresholds.append(nodes['num_threshold'].astype(np.float64))
+            missing_left.append(nodes['missing_go_to_left'].astype(bool))
+            # Leaves point to themselves so finished (row, tree) pairs can keep stepping harmlessly
+            left.append(np.where(is_leaf, index, nodes['left'].astype(np.int64) + root))
+            right.append(np.where(is_leaf, index, nodes['right'].astype(np.int64) + root))
+            values.append(nodes['value'].astype(np.float64))
+
+            rows = np.zeros(len(nodes), dtype=np.int32)
+            split = np.flatnonzero(nodes['is_categorical'].astype(bool) & ~is_leaf)
+            if len(split):
+                goes_left = self._unpack(predictor.raw_left_cat_bitsets)[nodes['bitset_idx'][split]]
+                seen = known[f_idx_map[nodes['feature_idx'][split]]]
+                # Unknown categories take the missing-value side
+                unknown_left = ~seen & nodes['missing_go_to_left'][split].astype(bool)[:, None]
+                rows[split] = sum(len(t) for t in categorical_left) + np.arange(len(split))
+                categorical_left.append(goes_left & seen | unknown_left)
+            cat_rows.append(rows)
+
+        self.feature = np.concatenate(features)
+        self.threshold = np.concatenate(thresholds)
+        self.missing_left = np.concatenate(missing_left)
+        self.cat_row = np.concatenate(cat_rows)
+        self.categorical_left = np.concatenate(categorical_left)
+        # children[2 * node] is the left child, children[2 * node + 1] the right one
+        self.children = np.column_stack([np.concatenate(left), np.concatenate(right)]).ravel().astype(np.int32)
+        self.is_leaf = self.children[0::2] == np.arange(len(self.feature))
+        self.value = np.concatenate(values)
+        self.categorical_nodes = np.flatnonzero(self.cat_row)
+        self.max_depth = max(predictor.get_max_depth() for _, predictor in predictors)
+        # _went_right holds one flag per row and node; keep a block of it at about 16 MB
+        self.block_rows = max(1, 2 ** 24 // len(self.feature))
+
+    @classmethod
+    def _unpack(cls, bitsets):
+        """(n, 8) uint32 bitsets as an (n, N_CODES) boolean table."""
+        codes = np.arange(cls.N_CODES)
+        return ((bitsets[:, codes // 32] >> (codes % 32).astype(np.uint32)) & 1).astype(bool)
+
+    def get_params(self, deep=True):
+        # Built from a booster rather than from hyperparameters, so there is nothing to clone
+        return {}
+
+    def fit(self, X, y):
+        raise NotImplementedError("FlatBooster is built from a fitted booster; it cannot be trained")
+
+    def __sklearn_is_fitted__(self):
+        return True
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.missing_left, self.cat_row,
+                                      self.categorical_left, self.children, self.value))
+
+    def _encode(self, X):
+        """Categorical columns first, each value replaced by its position among the training categories."""
+        if self.order is None:
+            return X
+        X = X[:, self.order]
+        for j, categories in enumerate(self.categories):
+            values = X[:, j]
+            position = np.minimum(np.searchsorted(categories, values), len(categories) - 1)
+            X[:, j] = np.where(categories[position] == values, position, np.nan)
+        return X
+
+    def _went_right(self, X):
+        """Split outcome of every node for every row, shape (n_rows, n_nodes)."""
+        x = X[:, self.feature]
+        went_left = x <= self.threshold
+        missing = np.isnan(x)
+        if len(self.categorical_nodes):
+            values = x[:, self.categorical_nodes]
+            codes = np.clip(np.nan_to_num(values, nan=0.0), 0, self.N_CODES - 1).astype(np.intp)
+            went_left[:, self.categorical_nodes] = self.categorical_left[self.cat_row[self.categorical_nodes], codes]
+            missing[:, self.categorical_nodes] |= values < 0
+        return ~np.where(missing, self.missing_left, went_left)
+
+    def _traverse(self, X):
+        """
+        Leaves of every row in every tree, shape (n_rows, n_trees). Boosted trees are
+        small, so deciding every node up front and then stepping max_depth levels is
+        cheaper than gathering features level by level.
+        """
+        n_rows, n_nodes = X.shape[0], len(self.feature)
+        went_right = self._went_right(X).ravel()
+        node = np.tile(self.roots, (n_rows, 1))
+        row_offset = np.arange(n_rows, dtype=np.int64)[:, None] * n_nodes
+        for _ in range(self.max_depth):
+            node = self.children[2 * node + went_right[row_offset + node]]
+        return node
+
+    def decision_function(self, X):
+        """Raw scores per class (one column for two classes), as the booster's _raw_predict."""
+        if sp.issparse(X):
+            X = X.toarray()
+        X = self._encode(np.asarray(X, dtype=np.float64))
+        raw = np.empty((X.shape[0], len(self.baseline)))
+        for start in range(0, X.shape[0], self.block_rows):
+            leaves = self._traverse(X[start:start + self.block_rows])
+            raw[start:start + len(leaves)] = self.baseline + self.value[leaves] @ self.tree_class
+        return raw
+
+    def predict_proba(self, X):
+        raw = self.decision_function(X)
+        if raw.shape[1] == 1:
+            positive = 1.0 / (1.0 + np.exp(-raw[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+        raw = np.exp(raw - raw.max(axis=1, keepdims=True))
+        return raw / raw.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.classes_.take(self.predict_proba(X).argmax(axis=1))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the flattened forest against sklearn.")
+    parser.add_argument('data_path', help="CSV of raw tickets to score")
+    parser.add_argument('--model', default='models/csat_model.pkl')
+    parser.add_argument('--float32-thresholds', action='store_true')
+    parser.add_argument('--early-exit', action='store_true',
+                        help="report accuracy and latency of early-exit settings on held-out labelled rows instead")
+    parser.add_argument('--holdout', default=None,
+                        help="labelled CSV the model never saw, for --early-exit; by default the test split "
+                             "CSATPredictor.run holds out of data_path")
+    parser.add_argument('--rows', type=int, default=10_000)
+    args = parser.parse_args()
+
+    from src.csat_pipelining import engineer_features, TARGET_COL
+    pipeline = joblib.load(args.model)
+    if args.early_exit:
+        if args.holdout is not None:
+            df = engineer_features(pd.read_csv(args.holdout)).dropna(subset=[TARGET_COL])
+        else:
+            df = engineer_features(pd.read_csv(args.data_path)).dropna(subset=[TARGET_COL])
+            # The same split as CSATPredictor.run, so the model never trained on these rows
+            _, df = train_test_split(df, test_size=0.2, random_state=42)
+        df = df.head(args.rows)
+    else:
+        df = engineer_features(pd.read_csv(args.data_path, nrows=args.rows))
+    X = pipeline[:-1].transform(df)
+
+    forest = pipeline[-1]
+    engine = FlatForest(forest, float32_thresholds=args.float32_thresholds)
+    engine.logger.info(f"Flattened {engine.n_trees} trees, {len(engine.feature)} nodes, {engine.nbytes / 1e6:.1f} MB")
+    if args.early_exit:
+        engine.logger.info(f"Early-exit report on {len(df):,} held-out rows")
+        engine.early_exit_report(X, df[TARGET_COL])
+    else:
+        engine.benchmark(forest, X)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,209 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import time
+import warnings
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score
+from sklearn.tree._tree import Tree
+from src.artifact import ModelArtifact
+from src.csat_pipelining import CSATPredictor, TARGET_COL
+
+class IncrementalTrainer:
+    """
+    Folds new tickets into a saved model without a full refit.
+
+    The fitted preprocessor is frozen: new categories fall into the one-hot encoder's
+    handle_unknown='ignore' bucket and unseen words are outside the TF-IDF vocabulary,
+    so the feature space, and with it every existing tree, stays valid. Each update
+    trains one generation of `trees_per_generation` trees on the new rows only and
+    appends it to the forest; the oldest trees are dropped so the forest never exceeds
+    `max_trees`. Retrain cost is therefore proportional to the new data.
+
+    The lineage (version, generations and their tree counts) is kept in a JSON sidecar
+    next to the model, and every version is also kept under models/versions/.
+    """
+    LINEAGE_FILE = 'csat_model.lineage.json'
+    VERSIONS_DIR = 'versions'
+
+    def __init__(self, model_dir='models', trees_per_generation=10, max_trees=100, keep_versions=7, random_state=42):
+        self.model_dir = model_dir
+        self.trees_per_generation = trees_per_generation
+        self.max_trees = max_trees
+        self.keep_versions = keep_versions
+        self.random_state = random_state
+        self.predictor = CSATPredictor(data_path=None, model_dir=model_dir)
+        self.lineage_path = os.path.join(model_dir, self.LINEAGE_FILE)
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.INFO)
+
+    @staticmethod
+    def _signature(path):
+        stat = os.stat(path)
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    @staticmethod
+    def _forest(model):
+        """The model's forest; generations can only be appended to a tree forest."""
+        classifier = model[-1]
+        if not ModelArtifact.is_forest(classifier):
+            raise ValueError(f"Incremental updates need a forest model, not {type(classifier).__name__}; "
+                             "retrain it in full instead")
+        return classifier
+
+    def load_lineage(self, model):
+        """Reads the lineage sidecar, or starts one if the model was replaced by a full refit."""
+        n_trees = len(self._forest(model).estimators_)
+        signature = self._signature(self.predictor.model_path)
+        if os.path.exists(self.lineage_path):
+            with open(self.lineage_path) as f:
+                lineage = json.load(f)
+            if lineage.get('model_signature') == signature:
+                return lineage
+            self.logger.info("Model changed since the last incremental update; starting a new lineage.")
+        return {
+            'version': 1,
+            'model_signature': signature,
+            'generations': [{'id': 0, 'trees': n_trees, 'rows': None, 'source': 'full refit',
+                             'trained_at': time.strftime('%Y-%m-%dT%H:%M:%S')}],
+        }
+
+    def _pad_classes(self, tree_estimator, tree_classes, all_classes):
+        """
+        Re-indexes a tree trained on a subset of the classes onto the full class list,
+        with zero probability for the classes it never saw.
+        """
+        columns = np.searchsorted(all_classes, tree_classes)
+        state = tree_estimator.tree_.__getstate__()
+        values = np.zeros((state['values'].shape[0], 1, len(all_classes)))
+        values[:, :, columns] = state['values']
+        state['values'] = values
+        tree = Tree(tree_estimator.n_features_in_, np.array([len(all_classes)], dtype=np.intp), 1)
+        tree.__setstate__(state)
+        tree_estimator.tree_ = tree
+        tree_estimator.n_classes_ = len(all_classes)
+        tree_estimator.classes_ = np.arange(len(all_classes), dtype=np.float64)
+        return tree_estimator
+
+    def update(self, new_df, source=None):
+        """
+        Trains a generation on the engineered frame new_df, appends it to the saved forest
+        and saves the result as a new version. Returns the updated pipeline.
+        """
+        model = joblib.load(self.predictor.model_path)
+        forest = self._forest(model)
+        lineage = self.load_lineage(model)
+
+        new_df = new_df.dropna(subset=[TARGET_COL])
+        unknown = set(new_df[TARGET_COL].unique()) - set(forest.classes_)
+        if unknown:
+            raise ValueError(f"New rows contain CSAT classes the model was not trained on: {sorted(unknown)}")
+
+        start = time.perf_counter()
+        X = model[:-1].transform(new_df)
+        generation = clone(forest).set_params(n_estimators=self.trees_per_generation,
+                                              random_state=self.random_state + lineage['version'])
+        generation.fit(X, new_df[TARGET_COL])
+        new_trees = [self._pad_classes(t, generation.classes_, forest.classes_) for t in generation.estimators_]
+
+        # Sliding window: drop the oldest trees beyond max_trees
+        trees = list(forest.estimators_) + new_trees
+        dropped = max(len(trees) - self.max_trees, 0)
+        forest.estimators_ = trees[dropped:]
+        forest.n_estimators = len(forest.estimators_)
+        self._drop_oldest(lineage, dropped)
+        lineage['generations'].append({
+            'id': lineage['generations'][-1]['id'] + 1 if lineage['generations'] else 0,
+            'trees': len(new_trees),
+            'rows': int(len(new_df)),
+            'source': source,
+            'trained_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        })
+        self.logger.info(f"Trained generation on {len(new_df)} rows in {time.perf_counter() - start:.2f}s; "
+                         f"forest has {forest.n_estimators} trees ({dropped} retired)")
+
+        self.predictor.model = model
+        self.predictor.save_model()
+        # No held-out rows here: insights go stale, the drift reference follows the newest data
+        self.predictor.save_sidecars(new_df)
+        lineage['version'] += 1
+        lineage['model_signature'] = self._signature(self.predictor.model_path)
+        with open(self.lineage_path, 'w') as f:
+            json.dump(lineage, f, indent=2)
+        self._archive(lineage['version'])
+        return model
+
+    @staticmethod
+    def _drop_oldest(lineage, n_trees):
+        while n_trees > 0 and lineage['generations']:
+            oldest = lineage['generations'][0]
+            taken = min(oldest['trees'], n_trees)
+            oldest['trees'] -= taken
+            n_trees -= taken
+            if oldest['trees'] == 0:
+                lineage['generations'].pop(0)
+
+    def _archive(self, version):
+        """Keeps a copy of each version for rollback, pruning all but the newest keep_versions."""
+        versions_dir = os.path.join(self.model_dir, self.VERSIONS_DIR)
+        os.makedirs(versions_dir, exist_ok=True)
+        shutil.copy2(self.predictor.model_path, os.path.join(versions_dir, f"csat_model-v{version:04d}.pkl"))
+        archived = sorted(f for f in os.listdir(versions_dir) if f.startswith('csat_model-v'))
+        for name in archived[:-self.keep_versions]:
+            os.remove(os.path.join(versions_dir, name))
+
+    def compare_with_full_refit(self, history_df, new_df, holdout_df):
+        """
+        Scores the incremental model and a from-scratch refit on history + new rows against
+        the same holdout. Call after update(). Returns accuracies and fit times.
+        """
+        incremental = joblib.load(self.predictor.model_path)
+        y_holdout = holdout_df[TARGET_COL]
+
+        full = pd.concat([history_df, new_df], ignore_index=True).dropna(subset=[TARGET_COL])
+        pipeline = self.predictor.build_pipeline()
+        start = time.perf_counter()
+        pipeline.fit(full, full[TARGET_COL])
+        full_fit_s = time.perf_counter() - start
+
+        report = {
+            'incremental_accuracy': accuracy_score(y_holdout, incremental.predict(holdout_df)),
+            'full_refit_accuracy': accuracy_score(y_holdout, pipeline.predict(holdout_df)),
+            'full_refit_seconds': full_fit_s,
+            'holdout_rows': int(len(holdout_df)),
+        }
+        self.logger.info(f"Holdout accuracy: incremental {report['incremental_accuracy']:.4f}, "
+                         f"full refit {report['full_refit_accuracy']:.4f}")
+        return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Fold new tickets into the saved model.")
+    parser.add_argument('new_data', help="CSV with only the new tickets")
+    parser.add_argument('--model-dir', default='models')
+    parser.add_argument('--trees', type=int, default=10, help="trees trained per generation")
+    parser.add_argument('--max-trees', type=int, default=100)
+    parser.add_argument('--history', help="CSV the current model was trained on; enables the full-refit comparison")
+    parser.add_argument('--holdout', help="CSV of labelled tickets for the full-refit comparison")
+    args = parser.parse_args()
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        new_df = CSATPredictor(args.new_data).feature_engineering(pd.read_csv(args.new_data))
+    trainer = IncrementalTrainer(args.model_dir, trees_per_generation=args.trees, max_trees=args.max_trees)
+    trainer.update(new_df, source=os.path.basename(args.new_data))
+
+    if args.history and args.holdout:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            history_df = CSATPredictor(args.history).feature_engineering(pd.read_csv(args.history))
+            holdout_df = CSATPredictor(args.holdout).feature_engineering(pd.read_csv(args.holdout))
+        print(json.dumps(trainer.compare_with_full_refit(history_df, new_df, holdout_df), indent=2))
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,195 @@
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import os
+import time
+import warnings
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+from sklearn.preprocessing import OrdinalEncoder
+from src.csat_pipelining import NUMERIC_FEATURES, CATEGORICAL_FEATURES, TEXT_FEATURE, TARGET_COL, category_encoder
+
+# (classifier, X, y, column slices); set by _init_worker in the parent before the pool
+# starts, so forked workers inherit the evaluation matrix instead of receiving a copy
+_shared = None
+
+def _init_worker(shared):
+    global _shared
+    _shared = shared
+
+def _permuted_score(column, index, repeat, seed):
+    """Worker entry point: accuracy with one original column's output features shuffled across rows."""
+    classifier, X, y, slices = _shared
+    rows = np.random.default_rng([seed, index, repeat]).permutation(X.shape[0])
+    X_permuted = X.copy()
+    X_permuted[:, slices[column]] = X[np.ix_(rows, slices[column])]
+    proba = classifier.predict_proba(X_permuted)
+    return column, repeat, accuracy_score(y, classifier.classes_.take(proba.argmax(axis=1)))
+
+def column_slices(preprocessor):
+    """
+    Maps each original input column to the indices of the features it produces, for
+    preprocessors built by CSATPredictor.build_pipeline. Every branch there is separable
+    by column (per-column imputer/scaler or passthrough, one one-hot block or one ordinal
+    code per column, and TF-IDF on a single column), so shuffling those features permutes
+    exactly that input column. Returns None for other preprocessors.
+    """
+    try:
+        encoder = category_encoder(preprocessor)
+        offsets = preprocessor.output_indices_
+        if isinstance(encoder, OrdinalEncoder):
+            widths = [1] * len(encoder.categories_)
+        else:
+            widths = [len(categories) for categories in encoder.categories_]
+    except (AttributeError, KeyError):
+        return None
+    # SimpleImputer drops columns that were entirely missing in training
+    if offsets['num'].stop - offsets['num'].start != len(NUMERIC_FEATURES):
+        return None
+    slices = {}
+    start = offsets['num'].start
+    for i, column in enumerate(NUMERIC_FEATURES):
+        slices[column] = np.array([start + i])
+    start = offsets['cat'].start
+    for column, width in zip(CATEGORICAL_FEATURES, widths):
+        slices[column] = np.arange(start, start + width)
+        start += width
+    slices[TEXT_FEATURE] = np.arange(offsets['txt'].start, offsets['txt'].stop)
+    if start != offsets['cat'].stop:
+        return None
+    return slices
+
+class ModelInsights:
+    """
+    Computes what the Model Insights page shows, once per training run, and stores it in
+    a JSON sidecar next to the model: test-set accuracy, the per-class report, the
+    confusion matrix and permutation importance per original input column. Importance
+    is the expensive part; with n_repeats=0 it is skipped and left empty.
+
+    The importance tasks (one per column and repeat) run across a process pool that
+    shares the transformed evaluation matrix through fork. Each task shuffles the
+    column's slice of that matrix and re-runs only the classifier.
+    """
+    SIDECAR_FILE = 'csat_model.insights.json'
+    N_REPEATS = 5
+
+    def __init__(self, model_dir='models', n_repeats=N_REPEATS, max_rows=5_000, n_workers=None, random_state=42):
+        self.model_dir = model_dir
+        self.n_repeats = n_repeats
+        self.max_rows = max_rows
+        self.n_workers = n_workers or os.cpu_count()
+        self.random_state = random_state
+        self.sidecar_path = os.path.join(model_dir, self.SIDECAR_FILE)
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.INFO)
+
+    def permutation_importance(self, pipeline, X_test, y_test):
+        """Mean and std accuracy drop per original column over n_repeats shuffles; empty when n_repeats is 0."""
+        if not self.n_repeats:
+            return {}
+        start = time.perf_counter()
+        if len(X_test) > self.max_rows:
+            X_test = X_test.sample(self.max_rows, random_state=self.random_state)
+            y_test = y_test.loc[X_test.index]
+        preprocessor, classifier = pipeline[:-1], pipeline[-1]
+        slices = column_slices(pipeline[0])
+        if slices is None:
+            self.logger.info("Preprocessor is not column-separable; skipping permutation importance.")
+            return {}
+
+        X = preprocessor.transform(X_test)
+        X = (X.toarray() if sp.issparse(X) else np.asarray(X)).astype(np.float32)
+        y = np.asarray(y_test)
+        baseline = accuracy_score(y, classifier.classes_.take(classifier.predict_proba(X).argmax(axis=1)))
+
+        tasks = [(column, index, repeat, self.random_state)
+                 for index, column in enumerate(slices) for repeat in range(self.n_repeats)]
+        n_jobs = getattr(classifier, 'n_jobs', None)
+        if n_jobs is not None:
+            # The pool already uses every core; nested forest threads would only contend
+            classifier.n_jobs = 1
+        try:
+            shared = (classifier, X, y, slices)
+            _init_worker(shared)
+            context = mp.get_context('fork') if 'fork' in mp.get_all_start_methods() else mp.get_context('spawn')
+            with context.Pool(self.n_workers, initializer=_init_worker, initargs=(shared,)) as pool:
+                results = pool.starmap(_permuted_score, tasks)
+        finally:
+            if n_jobs is not None:
+                classifier.n_jobs = n_jobs
+
+        drops = {column: [] for column in slices}
+        for column, _, score in results:
+            drops[column].append(baseline - score)
+        importance = {column: {'mean': float(np.mean(d)), 'std': float(np.std(d))} for column, d in drops.items()}
+        self.logger.info(f"Permutation importance ({len(slices)} columns x {self.n_repeats} repeats on "
+                         f"{len(y):,} rows) took {time.perf_counter() - start:.1f}s")
+        return dict(sorted(importance.items(), key=lambda item: item[1]['mean'], reverse=True))
+
+    def compute(self, pipeline, X_test, y_test, y_pred=None):
+        start = time.perf_counter()
+        y_pred = pipeline.predict(X_test) if y_pred is None else y_pred
+        labels = np.unique(np.concatenate([np.asarray(y_test), np.asarray(y_pred)]))
+        report = classification_report(y_test, y_pred, labels=labels, output_dict=True, zero_division=0)
+        insights = {
+            'model_signature': self._signature(),
+            'computed_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'test_rows': int(len(X_test)),
+            'accuracy': accuracy_score(y_test, y_pred),
+            'macro_avg': report['macro avg'],
+            'weighted_avg': report['weighted avg'],
+            'per_class': {str(label): report[str(label)] for label in labels},
+            'confusion_matrix': {'labels': [str(label) for label in labels],
+                                 'matrix': confusion_matrix(y_test, y_pred, labels=labels).tolist()},
+            'permutation_importance': self.permutation_importance(pipeline, X_test, y_test),
+        }
+        self.logger.info(f"Model insights computed in {time.perf_counter() - start:.1f}s")
+        return insights
+
+    def _signature(self):
+        model_path = os.path.join(self.model_dir, 'csat_model.pkl')
+        if not os.path.exists(model_path):
+            return None
+        stat = os.stat(model_path)
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    def save(self, insights):
+        os.makedirs(self.model_dir, exist_ok=True)
+        tmp_path = f"{self.sidecar_path}.tmp-{os.getpid()}"
+        with open(tmp_path, 'w') as f:
+            json.dump(insights, f, indent=2)
+        os.replace(tmp_path, self.sidecar_path)
+        self.logger.info(f"Model insights saved to '{self.sidecar_path}'")
+
+    def load(self):
+        """Returns the saved insights, with 'stale' set when the model has been replaced since."""
+        if not os.path.exists(self.sidecar_path):
+            raise FileNotFoundError(f"Model insights not found at {self.sidecar_path}. Please train the model first.")
+        with open(self.sidecar_path) as f:
+            insights = json.load(f)
+        insights['stale'] = insights.get('model_signature') != self._signature()
+        return insights
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute the model insights sidecar for a saved model.")
+    parser.add_argument('data_path', help="labelled CSV to evaluate on")
+    parser.add_argument('--model-dir', default='models')
+    parser.add_argument('--repeats', type=int, default=ModelInsights.N_REPEATS)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    from src.csat_pipelining import engineer_features
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        df = engineer_features(pd.read_csv(args.data_path)).dropna(subset=[TARGET_COL])
+    insights = ModelInsights(args.model_dir, n_repeats=args.repeats, n_workers=args.workers)
+    pipeline = joblib.load(os.path.join(args.model_dir, 'csat_model.pkl'))
+    insights.save(insights.compute(pipeline, df, df[TARGET_COL]))
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main()
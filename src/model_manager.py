@@ -0,0 +1,246 @@
+import argparse
+import logging
+import os
+import threading
+import time
+import numpy as np
+from src.artifact import ModelArtifact
+from src.csat_pipelining import NUMERIC_FEATURES, CATEGORICAL_FEATURES, TEXT_FEATURE, category_encoder
+from src.inference import CSATInference
+
+# Used when the preprocessor does not expose what it was fitted on
+FALLBACK_RECORDS = [
+    {'channel_name': 'Inbound', 'category': 'Returns', 'Sub-category': 'Reverse Pickup Enquiry',
+     'Product_category': 'Electronics', 'Tenure Bucket': '0-30', 'Agent Shift': 'Morning', 'Manager': 'Unknown',
+     'Item_price': 1000.0, 'connected_handling_time': 300.0, 'response_time_minutes': 30.0,
+     'Customer Remarks': 'Very helpful agent'},
+    {column: None for column in NUMERIC_FEATURES + CATEGORICAL_FEATURES + [TEXT_FEATURE]},
+]
+
+def warmup_records(pipeline, n_records=8):
+    """
+    Synthetic records built from what the pipeline was fitted on: numeric medians scaled up
+    and down, categories cycled per column, remarks made of vocabulary terms, plus one
+    record with every input missing. Falls back to FALLBACK_RECORDS for other preprocessors.
+    """
+    try:
+        preprocessor = pipeline[0]
+        num = preprocessor.named_transformers_['num']
+        if hasattr(num, 'named_steps'):
+            medians = num.named_steps['imputer'].statistics_
+        else:
+            # Passed-through numerics ('hist_gb') keep no medians; scale the fallback record instead
+            medians = [FALLBACK_RECORDS[0][column] for column in NUMERIC_FEATURES]
+        categories = category_encoder(preprocessor).categories_
+        terms = list(preprocessor.named_transformers_['txt'].get_feature_names_out())
+    except (AttributeError, KeyError, TypeError):
+        return list(FALLBACK_RECORDS)
+    if len(medians) != len(NUMERIC_FEATURES):
+        return list(FALLBACK_RECORDS)
+
+    records = []
+    for i in range(n_records - 1):
+        record = {column: float(median) * (0.5 + i / 4) for column, median in zip(NUMERIC_FEATURES, medians)}
+        for column, values in zip(CATEGORICAL_FEATURES, categories):
+            record[column] = values[i % len(values)]
+        record[TEXT_FEATURE] = ' '.join(terms[i::max(n_records, 1)][:3])
+        records.append(record)
+    records.append({column: None for column in NUMERIC_FEATURES + CATEGORICAL_FEATURES + [TEXT_FEATURE]})
+    return records
+
+class ModelManager:
+    """
+    Serves a CSATInference and swaps in retrained models without a restart.
+
+    A background thread polls the model directory. It follows the pickle named by the
+    pointer file (csat_model.current) when one exists, else model_name, together with
+    its memory-mapped artifact. Once a new file version has been stable for one poll,
+    a candidate engine is loaded, validated and warmed up on synthetic records off the
+    request path, then published with a single reference assignment. Callers that
+    already hold the old engine finish on it. A candidate that fails to load or
+    validate is logged and remembered, and the current model keeps serving.
+
+    Attribute access (predict, predict_batch, explain_batch, model_version, ...) is
+    forwarded to the active engine, so the manager can stand in for CSATInference.
+    """
+    POINTER_FILE = 'csat_model.current'
+
+    def __init__(self, model_dir='models', model_name='csat_model.pkl', poll_interval=5.0, **engine_kwargs):
+        self.model_dir = model_dir
+        self.default_model_name = model_name
+        self.poll_interval = poll_interval
+        self.engine_kwargs = engine_kwargs
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.INFO)
+
+        self._engine = None
+        self._signature = None
+        self._pending = None
+        # Signature -> error for candidates that failed; retried only once the files change again
+        self.failed = {}
+        self.swaps = 0
+        self.loaded_at = None
+        self.last_check = None
+        self._swap_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # The first model is loaded synchronously so requests never see an empty manager
+        signature = self._current_signature()
+        if signature is None:
+            self.logger.error(f"No model to serve in {model_dir}. Please train the model first.")
+            raise FileNotFoundError(f"Model not found in {model_dir}")
+        self._swap_in(signature)
+        if self._engine is None:
+            raise ValueError(f"Model in {model_dir} failed validation: {self.failed[signature]}")
+
+    def __getattr__(self, name):
+        # Only reached for attributes the manager does not define itself
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self._engine, name)
+
+    @property
+    def engine(self):
+        """The active CSATInference; hold on to it to keep using one version for a sequence of calls."""
+        return self._engine
+
+    @property
+    def active_version(self):
+        return self._engine.model_version
+
+    def resolve_model_name(self):
+        """Pickle to serve: the pointer file's target when present, else the default name."""
+        pointer = os.path.join(self.model_dir, self.POINTER_FILE)
+        try:
+            with open(pointer) as f:
+                name = f.readline().strip()
+        except FileNotFoundError:
+            return self.default_model_name
+        return name or self.default_model_name
+
+    def _current_signature(self):
+        """(model name, pickle stat, artifact stat) or None when the pickle is missing."""
+        name = self.resolve_model_name()
+        model_path = os.path.join(self.model_dir, name)
+        try:
+            stat = os.stat(model_path)
+        except FileNotFoundError:
+            return None
+        meta_path = os.path.join(ModelArtifact.dir_for(model_path), ModelArtifact.META_FILE)
+        artifact = os.stat(meta_path).st_mtime_ns if os.path.exists(meta_path) else None
+        return name, stat.st_mtime_ns, stat.st_size, artifact
+
+    def check(self):
+        """One poll: swaps in a new model version once it has been stable for one poll. Returns True on a swap."""
+        self.last_check = time.time()
+        signature = self._current_signature()
+        if signature is None or signature == self._signature or signature in self.failed:
+            self._pending = None
+            return False
+        if signature != self._pending:
+            # Files may still be being written; wait for the next poll to see the same version
+            self._pending = signature
+            return False
+        self._pending = None
+        return self._swap_in(signature)
+
+    def _swap_in(self, signature):
+        start = time.perf_counter()
+        try:
+            candidate = CSATInference(model_dir=self.model_dir, model_name=signature[0], **self.engine_kwargs)
+            warmup_ms = self._validate(candidate)
+        except Exception as e:
+            self.failed[signature] = str(e)
+            active = self._engine.model_version if self._engine is not None else None
+            self.logger.error(f"Rejected model candidate {signature[0]}: {e}; still serving version {active}")
+            return False
+
+        with self._swap_lock:
+            previous = self._engine
+            self._engine = candidate
+            self._signature = signature
+            self.loaded_at = time.time()
+            if previous is not None:
+                self.swaps += 1
+        self.logger.info(f"Serving model version {candidate.model_version} "
+                         f"(loaded and warmed in {time.perf_counter() - start:.2f}s; warm batch {warmup_ms:.1f} ms)")
+        return True
+
+    def _validate(self, candidate):
+        """Scores warmup records on every serving path and checks the outputs; returns the warm batch latency."""
+        records = warmup_records(candidate.model)
+        for record in records:
+            candidate.predict(record)
+        # Repeat the records to also warm the large-batch path
+        batch = records * max(1, (CSATInference.FLAT_MAX_BATCH * 2) // len(records))
+        start = time.perf_counter()
+        result = candidate.predict_batch(batch, return_proba=True)
+        warm_ms = (time.perf_counter() - start) * 1000.0
+        if len(result.labels) != len(batch):
+            raise ValueError(f"scored {len(result.labels)} of {len(batch)} warmup records")
+        if result.probabilities is not None:
+            proba = result.probabilities
+            if not np.isfinite(proba).all() or not np.allclose(proba.sum(axis=1), 1.0):
+                raise ValueError("warmup probabilities are not valid distributions")
+        current = self._engine
+        if current is not None and hasattr(current.model, 'classes_') and hasattr(candidate.model, 'classes_'):
+            if not np.array_equal(current.model.classes_, candidate.model.classes_):
+                self.logger.warning(f"Candidate predicts classes {list(candidate.model.classes_)}, "
+                                    f"current model {list(current.model.classes_)}")
+        if candidate.drift_monitor is not None:
+            # Warmup records are not traffic
+            candidate.drift_monitor.reset()
+        return warm_ms
+
+    def start(self):
+        """Starts the background watcher; returns self so it can be chained after the constructor."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, daemon=True, name='model-manager')
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check()
+            except Exception as e:
+                # The watcher must survive anything a half-written model directory throws at it
+                self.logger.error(f"Model check failed: {e}")
+
+    def status(self):
+        return {
+            'active_version': self.active_version,
+            'model_name': self._signature[0],
+            'loaded_at': self.loaded_at,
+            'swaps': self.swaps,
+            'last_check': self.last_check,
+            'pending': self._pending is not None,
+            'failed_candidates': [{'model_name': s[0], 'error': e} for s, e in self.failed.items()],
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch a model directory and report each hot swap.")
+    parser.add_argument('--model-dir', default='models')
+    parser.add_argument('--poll-interval', type=float, default=5.0)
+    parser.add_argument('--use-artifact', action='store_true')
+    args = parser.parse_args()
+
+    manager = ModelManager(args.model_dir, poll_interval=args.poll_interval, use_artifact=args.use_artifact).start()
+    try:
+        while True:
+            time.sleep(args.poll_interval)
+            logging.info(f"Active version {manager.active_version}, {manager.swaps} swaps, "
+                         f"{len(manager.failed)} rejected candidates")
+    except KeyboardInterrupt:
+        manager.stop()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from src.compiled_scorer import _is_missing, _to_float
+from src.csat_pipelining import NUMERIC_FEATURES, CATEGORICAL_FEATURES, TEXT_FEATURE
+
+class PredictionCache:
+    """
+    Bounded LRU cache of per-record predictions with an optional TTL.
+
+    Keys are a blake2b digest of the record's model inputs after the same normalisation
+    CSATInference.prepare applies: numerics coerced to float, missing categoricals as
+    None, missing remarks as ''. Categoricals keep their type, since the encoders tell
+    5 and '5' apart. The loaded model version is part of the key. Columns
+    the model never reads do not affect the key, so payloads that differ only in ids or
+    timestamps share an entry. Thread safe.
+    """
+
+    def __init__(self, max_size=10_000, ttl=None):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.max_size = max_size
+        # Seconds an entry stays valid; None keeps entries until they are evicted
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _canonical(numeric, categorical, text):
+        numeric = [None if v != v else v for v in map(_to_float, numeric)]
+        # numpy scalars from frame rows key the same as the Python values in dict records
+        categorical = [None if _is_missing(v) else v.item() if isinstance(v, np.generic) else v for v in categorical]
+        categorical = [None if v is None else (type(v).__name__, str(v)) for v in categorical]
+        text = '' if _is_missing(text) else str(text)
+        return numeric, categorical, text
+
+    @staticmethod
+    def _digest(model_version, canonical):
+        payload = json.dumps([model_version, *canonical], separators=(',', ':'))
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).digest()
+
+    def record_key(self, record, model_version):
+        """Key for one dict record."""
+        canonical = self._canonical([record.get(c) for c in NUMERIC_FEATURES],
+                                    [record.get(c) for c in CATEGORICAL_FEATURES],
+                                    record.get(TEXT_FEATURE))
+        return self._digest(model_version, canonical)
+
+    def frame_keys(self, df, model_version):
+        """Keys for every row of a DataFrame, in row order."""
+        n_num, n_cat = len(NUMERIC_FEATURES), len(CATEGORICAL_FEATURES)
+        columns = df.reindex(columns=NUMERIC_FEATURES + CATEGORICAL_FEATURES + [TEXT_FEATURE])
+        return [self._digest(model_version, self._canonical(row[:n_num], row[n_num:n_num + n_cat], row[-1]))
+                for row in columns.itertuples(index=False, name=None)]
+
+    def get(self, key):
+        """Returns the cached value or None, counting a hit or a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            expires = time.monotonic() + self.ttl if self.ttl is not None else None
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
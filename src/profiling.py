@@ -0,0 +1,278 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+import numpy as np
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator, TransformerMixin
+
+# Shared no-op returned by Profiler.stage while profiling is off
+_NULL_STAGE = nullcontext()
+
+def rss_mb():
+    """Current resident set size of this process in MB."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except (OSError, ValueError, AttributeError):
+        return peak_rss_mb()
+
+def peak_rss_mb():
+    """Highest resident set size this process has reached, in MB."""
+    import resource
+    # kB on Linux, bytes on macOS
+    scale = 1e6 if sys.platform == 'darwin' else 1e3
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = np.zeros(len(self.buckets) + 1, dtype=np.int64)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[np.searchsorted(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile."""
+        if not self.count:
+            return None
+        idx = int(np.searchsorted(np.cumsum(self.counts), self.count * q / 100.0))
+        return self.buckets[idx] if idx < len(self.buckets) else float('inf')
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'start', 'rss_start', 'peak')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.rss_start = self.peak = rss_mb()
+        self.start = time.perf_counter()
+        self.profiler._open(self)
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        self.profiler._close(self, seconds, max(self.peak, rss_mb()))
+
+class Profiler:
+    """
+    Stage timings, peak memory, counters and latency histograms for training and inference.
+
+    Off by default; PROFILER below is enabled with enable() or CSAT_PROFILE=1. While off,
+    stage() returns a shared no-op context manager and observe()/count() return at once,
+    so instrumented code pays one attribute check per call. While on, a background thread
+    samples RSS every sample_interval seconds and credits the peak to every open stage.
+    Stages are keyed by dotted names and accumulate over repeated calls.
+    """
+    LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+    BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384, 65536)
+
+    def __init__(self, enabled=False, sample_interval=0.01):
+        self.enabled = enabled
+        self.sample_interval = sample_interval
+        self._lock = threading.Lock()
+        self._open_stages = set()
+        self._sampler = None
+        self.reset()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}
+            self.histograms = {}
+            self.counters = {}
+
+    def stage(self, name):
+        """Context manager timing one stage; a shared no-op while profiling is off."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS_MS):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(buckets)
+            histogram.observe(value)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def _open(self, stage):
+        with self._lock:
+            self._open_stages.add(stage)
+            if self._sampler is None or not self._sampler.is_alive():
+                self._sampler = threading.Thread(target=self._sample, daemon=True)
+                self._sampler.start()
+
+    def _close(self, stage, seconds, peak):
+        with self._lock:
+            self._open_stages.discard(stage)
+            record = self.stages.setdefault(stage.name, {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0,
+                                                         'peak_rss_mb': 0.0, 'max_rss_growth_mb': 0.0})
+            record['calls'] += 1
+            record['seconds'] += seconds
+            record['max_seconds'] = max(record['max_seconds'], seconds)
+            record['peak_rss_mb'] = max(record['peak_rss_mb'], peak)
+            record['max_rss_growth_mb'] = max(record['max_rss_growth_mb'], peak - stage.rss_start)
+
+    def _sample(self):
+        # Exits once no stage is open; the next stage restarts it
+        while True:
+            time.sleep(self.sample_interval)
+            current = rss_mb()
+            with self._lock:
+                if not self._open_stages:
+                    self._sampler = None
+                    return
+                for stage in self._open_stages:
+                    stage.peak = max(stage.peak, current)
+
+    @contextmanager
+    def timed_branches(self, column_transformer, prefix):
+        """
+        Times each branch of an unfitted ColumnTransformer as '<prefix>.<branch>' while it
+        is fitted inside the block. The fitted branches are unwrapped again on exit, so
+        nothing of the profiler ends up in the saved model. A no-op while profiling is off.
+        """
+        if not self.enabled:
+            yield
+            return
+        specs = column_transformer.transformers
+        column_transformer.transformers = [
+            (name, transformer if isinstance(transformer, str) else TimedBranch(transformer, f"{prefix}.{name}"), columns)
+            for name, transformer, columns in specs]
+        try:
+            yield
+        finally:
+            column_transformer.transformers = specs
+            fitted = getattr(column_transformer, 'transformers_', [])
+            for i, (name, transformer, columns) in enumerate(fitted):
+                if isinstance(transformer, TimedBranch):
+                    fitted[i] = (name, transformer.transformer, columns)
+
+    def time_branches(self, column_transformer, prefix):
+        """
+        Wraps each branch of a fitted ColumnTransformer in a TimedBranch, so every transform
+        records '<prefix>.<branch>' from the real pass. For long-lived inference engines;
+        does nothing while profiling is off.
+        """
+        if not self.enabled:
+            return
+        fitted = getattr(column_transformer, 'transformers_', [])
+        for i, (name, transformer, columns) in enumerate(fitted):
+            if not isinstance(transformer, (str, TimedBranch)):
+                fitted[i] = (name, TimedBranch(transformer, f"{prefix}.{name}"), columns)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'stages': {name: dict(record) for name, record in self.stages.items()},
+                'counters': dict(self.counters),
+                'histograms': {name: {'buckets': list(h.buckets), 'counts': h.counts.tolist(), 'sum': h.sum,
+                                      'count': h.count, 'p50': h.percentile(50), 'p99': h.percentile(99)}
+                               for name, h in self.histograms.items()},
+            }
+
+    def to_prometheus(self, namespace='csat'):
+        """Renders the snapshot in the Prometheus text exposition format."""
+        snap = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {namespace}_{name} {help_text}")
+            lines.append(f"# TYPE {namespace}_{name} {kind}")
+            lines.extend(f"{namespace}_{sample}" for sample in samples)
+
+        stages = sorted(snap['stages'].items())
+        if stages:
+            metric('stage_seconds_total', 'counter', "Wall time spent in each stage.",
+                   [f'stage_seconds_total{{stage="{n}"}} {r["seconds"]:.6f}' for n, r in stages])
+            metric('stage_calls_total', 'counter', "Times each stage ran.",
+                   [f'stage_calls_total{{stage="{n}"}} {r["calls"]}' for n, r in stages])
+            metric('stage_peak_rss_bytes', 'gauge', "Peak resident memory seen during each stage.",
+                   [f'stage_peak_rss_bytes{{stage="{n}"}} {int(r["peak_rss_mb"] * 1e6)}' for n, r in stages])
+        for name, value in sorted(snap['counters'].items()):
+            safe = name.replace('.', '_')
+            metric(f'{safe}_total', 'counter', f"Counter {name}.", [f'{safe}_total {value}'])
+        for name, h in sorted(snap['histograms'].items()):
+            samples, cumulative = [], 0
+            for bound, n in zip(h['buckets'] + ['+Inf'], h['counts']):
+                cumulative += n
+                samples.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+            samples += [f'{name}_sum {h["sum"]:.6f}', f'{name}_count {h["count"]}']
+            metric(name, 'histogram', f"Histogram {name}.", samples)
+        return '\n'.join(lines) + '\n'
+
+    def export(self, json_path=None, prom_path=None):
+        """Writes the snapshot as JSON and/or Prometheus text."""
+        for path in (json_path, prom_path):
+            if path and os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+        if json_path:
+            with open(json_path, 'w') as f:
+                json.dump(self.snapshot(), f, indent=2)
+        if prom_path:
+            with open(prom_path, 'w') as f:
+                f.write(self.to_prometheus())
+
+class TimedBranch(TransformerMixin, BaseEstimator):
+    """
+    Stands in for one ColumnTransformer branch and records each fit_transform/transform
+    call as the PROFILER stage `stage`, plus the size of its output. Other attributes are
+    delegated to the wrapped transformer, as RemarkVectorCache does for the text branch.
+    """
+
+    def __init__(self, transformer, stage):
+        self.transformer = transformer
+        self.stage = stage
+
+    def __getattr__(self, name):
+        # Only reached for attributes the wrapper does not define itself
+        if name in ('transformer', 'stage') or name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.transformer, name)
+
+    def fit(self, X, y=None):
+        with PROFILER.stage(self.stage):
+            self.transformer.fit(X, y)
+        return self
+
+    def fit_transform(self, X, y=None):
+        with PROFILER.stage(self.stage):
+            output = self.transformer.fit_transform(X, y)
+        self._count(output)
+        return output
+
+    def transform(self, X):
+        with PROFILER.stage(self.stage):
+            output = self.transformer.transform(X)
+        self._count(output)
+        return output
+
+    def _count(self, output):
+        nbytes = output.data.nbytes if sp.issparse(output) else np.asarray(output).nbytes
+        PROFILER.count(f"{self.stage}.output_bytes", int(nbytes))
+
+# Process-wide profiler used by the training and inference code
+PROFILER = Profiler(enabled=os.environ.get('CSAT_PROFILE') == '1')
@@ -0,0 +1,392 @@
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+import numpy as np
+from src.csat_pipelining import NUMERIC_FEATURES, CATEGORICAL_FEATURES, TEXT_FEATURE
+from src.profiling import PROFILER
+
+INPUT_COLUMNS = NUMERIC_FEATURES + CATEGORICAL_FEATURES + [TEXT_FEATURE]
+
+def check_record(record):
+    """
+    Returns the model inputs of a record, absent ones as None, or raises ValueError when
+    one of them is not a scalar. Other fields (ids, timestamps) are dropped, as
+    CSATInference ignores them. Filling the gaps here means a record scores the same
+    whichever other records share its micro-batch.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("Each record must be a JSON object")
+    inputs = {column: record.get(column) for column in INPUT_COLUMNS}
+    for key, value in inputs.items():
+        if value is not None and not isinstance(value, (str, int, float)):
+            raise ValueError(f"Field '{key}' must be a string, number or null")
+    return inputs
+
+class MicroBatcher:
+    """
+    Groups concurrently submitted records into one predict_batch call.
+    A batch is flushed when it reaches max_batch records or when the oldest record
+    has waited max_wait_ms. At most max_queue records may be waiting; beyond that
+    submit() raises QueueFull so the caller can shed load.
+    """
+
+    def __init__(self, engine, max_batch=64, max_wait_ms=5.0, max_queue=4096, stats_window=1000):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.batch_stats = deque(maxlen=stats_window)
+        self.records_scored = 0
+        self.rejected = 0
+        self._task = None
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.INFO)
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, records):
+        """Queues records and waits for their (label, confidence) results, in order."""
+        loop = asyncio.get_running_loop()
+        if self.queue.qsize() + len(records) > self.queue.maxsize:
+            self.rejected += len(records)
+            raise asyncio.QueueFull()
+        futures = []
+        for record in records:
+            future = loop.create_future()
+            self.queue.put_nowait((record, future))
+            futures.append(future)
+        return await asyncio.gather(*futures)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._score(batch)
+
+    async def _score(self, batch):
+        records = [record for record, _ in batch]
+        start = time.perf_counter()
+        try:
+            # Scoring is CPU bound; run it off the event loop so requests keep queueing
+            result = await asyncio.to_thread(self.engine.predict_batch, records)
+        except Exception as e:
+            if len(batch) > 1:
+                # Rescore one by one so only the records that cannot be scored fail
+                self.logger.warning(f"Batch of {len(batch)} failed ({e}); rescoring records one at a time")
+                for item in batch:
+                    await self._score([item])
+                return
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        self.batch_stats.append((len(batch), elapsed_ms))
+        self.records_scored += len(batch)
+
+        confidence = result.confidence if result.confidence is not None else [None] * len(batch)
+        trees_used = result.trees_used if result.trees_used is not None else [None] * len(batch)
+        for (_, future), label, conf, trees in zip(batch, result.labels, confidence, trees_used):
+            if not future.done():
+                future.set_result((label.item() if hasattr(label, 'item') else label,
+                                   None if conf is None else float(conf), None if trees is None else int(trees)))
+
+    def stats(self):
+        sizes = np.array([s for s, _ in self.batch_stats]) if self.batch_stats else np.zeros(1)
+        timings = np.array([t for _, t in self.batch_stats]) if self.batch_stats else np.zeros(1)
+        return {
+            'records_scored': self.records_scored,
+            'rejected': self.rejected,
+            'queue_depth': self.queue.qsize(),
+            'batches': len(self.batch_stats),
+            'batch_size_mean': float(sizes.mean()),
+            'batch_ms_p50': float(np.percentile(timings, 50)),
+            'batch_ms_p99': float(np.percentile(timings, 99)),
+        }
+
+class BadRequest(ValueError):
+    """A request that cannot be parsed; answered with `status` and the connection closed."""
+    status = 400
+
+class PayloadTooLarge(BadRequest):
+    """A body over the server's max_body_bytes; it is not read."""
+    status = 413
+
+class ScoringServer:
+    """
+    Minimal asyncio HTTP/1.1 JSON server in front of CSATInference.
+
+    POST /predict   body: one record or a list of records -> {"predictions": [...]}
+    GET  /health    -> {"status": "ok", "model": <path>, "version": <active model version>}
+    GET  /stats     -> per-batch timing, queue and prediction cache statistics
+    GET  /metrics   -> stage timings and latency histograms in Prometheus text (with --profile)
+    GET  /drift     -> input and prediction drift against the training profile (with --monitor-drift)
+    """
+
+    # Largest request body read; a list of a few thousand records fits comfortably
+    MAX_BODY_BYTES = 1024 * 1024
+
+    def __init__(self, engine, host='127.0.0.1', port=8000, max_body_bytes=MAX_BODY_BYTES, **batcher_kwargs):
+        self.engine = engine
+        self.host = host
+        # port=0 binds a free port; serve() stores the one it got
+        self.port = port
+        self.max_body_bytes = max_body_bytes
+        self.batcher_kwargs = batcher_kwargs
+        self.batcher = None
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.INFO)
+
+    async def serve(self):
+        self.batcher = MicroBatcher(self.engine, **self.batcher_kwargs)
+        self.batcher.start()
+        server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        self.logger.info(f"Scoring server listening on http://{self.host}:{self.port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except BadRequest as e:
+                    # The rest of the stream cannot be framed, so answer and close
+                    self._write_response(writer, e.status, {'error': str(e)}, keep_alive=False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, body, keep_alive = request
+                status, payload = await self._route(method, path, body)
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        headers = {}
+        try:
+            method, path, version = request_line.decode('latin-1').split()
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get('content-length', 0))
+            if length < 0:
+                raise ValueError(f"negative Content-Length {length}")
+        except ValueError as e:
+            raise BadRequest(f"Malformed request: {e}") from e
+        if length > self.max_body_bytes:
+            raise PayloadTooLarge(f"Body of {length} bytes exceeds the limit of {self.max_body_bytes}")
+        body = await reader.readexactly(length) if length else b''
+        keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+        return method, path, body, keep_alive
+
+    async def _route(self, method, path, body):
+        if method == 'GET' and path == '/health':
+            health = {'status': 'ok', 'model': self.engine.model_path, 'version': self.engine.model_version}
+            status = getattr(self.engine, 'status', None)
+            if status is not None:
+                # Served through a ModelManager: report swaps and rejected candidates too
+                health['manager'] = status()
+            return 200, health
+        if method == 'GET' and path == '/stats':
+            stats = self.batcher.stats()
+            if self.engine.cache is not None:
+                stats['cache'] = self.engine.cache_stats()
+            return 200, stats
+        if method == 'GET' and path == '/metrics':
+            if not PROFILER.enabled:
+                return 404, {'error': "Profiling is off; start the server with --profile"}
+            return 200, PROFILER.to_prometheus()
+        if method == 'GET' and path == '/drift':
+            report = self.engine.drift_report()
+            if report is None:
+                return 404, {'error': "Drift monitoring is off; start the server with --monitor-drift"}
+            return 200, report
+        if method == 'POST' and path == '/predict':
+            try:
+                data = json.loads(body)
+            except ValueError:
+                return 400, {'error': 'Body must be JSON'}
+            records = data if isinstance(data, list) else [data]
+            if not records or not all(isinstance(r, dict) for r in records):
+                return 400, {'error': 'Body must be a record or a non-empty list of records'}
+            try:
+                records = [check_record(r) for r in records]
+            except ValueError as e:
+                return 400, {'error': str(e)}
+            try:
+                results = await self.batcher.submit(records)
+            except asyncio.QueueFull:
+                return 503, {'error': 'Server busy, retry later'}
+            except Exception as e:
+                self.logger.error(f"Prediction error: {e}")
+                return 500, {'error': str(e)}
+            predictions = []
+            for label, conf, trees in results:
+                prediction = {'csat_score': label, 'confidence': conf}
+                if trees is not None:
+                    # Early-exit mode: trees the record was scored with (0 for a prediction cache hit)
+                    prediction['trees_used'] = trees
+                predictions.append(prediction)
+            return 200, {'predictions': predictions}
+        return 404, {'error': f"No route for {method} {path}"}
+
+    @staticmethod
+    def _write_response(writer, status, payload, keep_alive):
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large',
+                   500: 'Internal Server Error', 503: 'Service Unavailable'}
+        # Strings are pre-rendered text (the Prometheus metrics); everything else is JSON
+        text = isinstance(payload, str)
+        body = payload.encode() if text else json.dumps(payload).encode()
+        head = (f"HTTP/1.1 {status} {reasons[status]}\r\n"
+                f"Content-Type: {'text/plain; version=0.0.4' if text else 'application/json'}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode() + body)
+
+async def run_load_test(records, host='127.0.0.1', port=8000, concurrency=32, requests=2000):
+    """
+    Local load generator: `concurrency` keep-alive clients post single records
+    round-robin from `records` until `requests` have completed.
+    Returns throughput and latency percentiles.
+    """
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+
+    async def client():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for i in remaining:
+                body = json.dumps(records[i % len(records)]).encode()
+                start = time.perf_counter()
+                writer.write(f"POST /predict HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+                await writer.drain()
+                status = int((await reader.readline()).split()[1])
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b''):
+                        break
+                    if line.lower().startswith(b'content-length'):
+                        length = int(line.split(b':')[1])
+                await reader.readexactly(length)
+                latencies.append((time.perf_counter() - start) * 1000.0)
+                if status != 200:
+                    errors += 1
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'concurrency': concurrency,
+        'throughput_rps': len(latencies) / elapsed,
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-batching CSAT scoring server.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    serve = sub.add_parser('serve', help="start the HTTP scoring server")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8000)
+    serve.add_argument('--model-dir', default='models')
+    serve.add_argument('--max-batch', type=int, default=64)
+    serve.add_argument('--max-wait-ms', type=float, default=5.0)
+    serve.add_argument('--max-queue', type=int, default=4096)
+    serve.add_argument('--max-body-bytes', type=int, default=ScoringServer.MAX_BODY_BYTES,
+                       help="larger request bodies are refused with 413")
+    serve.add_argument('--cache-size', type=int, default=0, help="per-record prediction cache entries (0 disables)")
+    serve.add_argument('--profile', action='store_true', help="record stage timings and serve them at /metrics")
+    serve.add_argument('--cache-ttl', type=float, default=None, help="seconds a cached prediction stays valid")
+    serve.add_argument('--watch', type=float, default=None, metavar='SECONDS',
+                       help="poll the model directory this often and hot-swap retrained models")
+    serve.add_argument('--early-exit', action='store_true',
+                       help="stop scoring each record once the forest's vote is settled "
+                            "(single records only get faster with --exit-confidence)")
+    serve.add_argument('--exit-block', type=int, default=10, help="trees evaluated between early-exit checks")
+    serve.add_argument('--exit-confidence', type=float, default=None,
+                       help="also stop once the leading class is this likely to hold (default: exact labels only)")
+    serve.add_argument('--monitor-drift', action='store_true',
+                       help="sketch scored traffic against the training profile and serve it at /drift")
+
+    load = sub.add_parser('loadtest', help="fire concurrent requests at a running server")
+    load.add_argument('data_path', help="CSV of raw tickets to replay")
+    load.add_argument('--host', default='127.0.0.1')
+    load.add_argument('--port', type=int, default=8000)
+    load.add_argument('--concurrency', type=int, default=32)
+    load.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        from src.inference import CSATInference
+        if args.profile:
+            PROFILER.enable()
+        engine_kwargs = dict(cache_size=args.cache_size, cache_ttl=args.cache_ttl, monitor_drift=args.monitor_drift,
+                             early_exit=args.early_exit, exit_block=args.exit_block,
+                             exit_confidence=args.exit_confidence)
+        if args.watch:
+            from src.model_manager import ModelManager
+            engine = ModelManager(args.model_dir, poll_interval=args.watch, **engine_kwargs).start()
+        else:
+            engine = CSATInference(model_dir=args.model_dir, **engine_kwargs)
+        server = ScoringServer(engine, args.host, args.port, max_body_bytes=args.max_body_bytes,
+                               max_batch=args.max_batch, max_wait_ms=args.max_wait_ms, max_queue=args.max_queue)
+        asyncio.run(server.serve())
+    else:
+        import pandas as pd
+        from src.csat_pipelining import engineer_features
+        df = engineer_features(pd.read_csv(args.data_path, nrows=5000))[INPUT_COLUMNS]
+        # JSON has no NaN; missing values travel as null
+        records = json.loads(df.to_json(orient='records'))
+        print(json.dumps(asyncio.run(run_load_test(records, args.host, args.port, args.concurrency, args.requests)), indent=2))
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,176 @@
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import resource
+import sys
+import time
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.feature_extraction import FeatureHasher
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score, classification_report
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer
+from src.chunked_features import ChunkedFeatureEngine
+from src.csat_pipelining import (CSATPredictor, NUMERIC_FEATURES, CATEGORICAL_FEATURES, TEXT_FEATURE,
+                                 TARGET_COL)
+
+# The CSAT survey scale. partial_fit must know every class before it sees the first chunk.
+CSAT_CLASSES = np.array([1, 2, 3, 4, 5])
+
+def numeric_block(X):
+    """Stateless numeric encoding: log1p of the clipped value plus a missing-value indicator."""
+    values = np.asarray(X, dtype=np.float64)
+    missing = np.isnan(values)
+    scaled = np.log1p(np.clip(np.where(missing, 0.0, values), 0.0, None))
+    return np.hstack([scaled, missing.astype(np.float64)])
+
+def categorical_tokens(X):
+    """Turns each row into 'column=value' tokens for FeatureHasher."""
+    frame = pd.DataFrame(X).astype(object)
+    columns = [str(c) for c in frame.columns]
+    return [[f"{c}={v}" for c, v in zip(columns, row) if v is not None and v == v]
+            for row in frame.itertuples(index=False)]
+
+class StreamingTrainer:
+    """
+    Out-of-core training backend. Every transformer is stateless (hashing for the
+    categorical columns and Customer Remarks, a fixed log transform for numerics), so
+    nothing has to see the whole dataset, and an SGD logistic-regression classifier is
+    updated with partial_fit one CSV chunk at a time. Memory is bounded by chunk_size.
+
+    Every holdout_every-th row (by file position) is held out of training and scored in
+    a final streaming pass. The saved model is an ordinary Pipeline, so CSATInference
+    loads it unchanged.
+    """
+
+    def __init__(self, data_path, chunk_size=100_000, n_workers=1, epochs=1, holdout_every=5,
+                 text_features=2 ** 16, categorical_features=2 ** 12, random_state=42):
+        self.data_path = data_path
+        self.chunk_size = chunk_size
+        self.n_workers = n_workers
+        self.epochs = epochs
+        self.holdout_every = holdout_every
+        self.text_features = text_features
+        self.categorical_features = categorical_features
+        self.random_state = random_state
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.INFO)
+
+    def build_pipeline(self):
+        preprocessor = ColumnTransformer(
+            transformers=[
+                ('num', FunctionTransformer(numeric_block), NUMERIC_FEATURES),
+                ('cat', Pipeline(steps=[
+                    ('tokens', FunctionTransformer(categorical_tokens)),
+                    ('hash', FeatureHasher(n_features=self.categorical_features, input_type='string'))
+                ]), CATEGORICAL_FEATURES),
+                ('txt', HashingVectorizer(n_features=self.text_features, stop_words='english',
+                                          alternate_sign=False), TEXT_FEATURE)
+            ],
+            remainder='drop',
+            sparse_threshold=1.0
+        )
+        # Averaged SGD: a single pass with plain SGD oscillates badly on the imbalanced classes
+        classifier = SGDClassifier(loss='log_loss', alpha=1e-4, average=True, random_state=self.random_state)
+        return Pipeline(steps=[('preprocessor', preprocessor), ('classifier', classifier)])
+
+    def _chunks(self):
+        engine = ChunkedFeatureEngine(self.data_path, chunk_size=self.chunk_size, n_workers=self.n_workers,
+                                      columns=NUMERIC_FEATURES + CATEGORICAL_FEATURES + [TEXT_FEATURE, TARGET_COL])
+        for chunk in engine.iter_chunks():
+            chunk = chunk.dropna(subset=[TARGET_COL])
+            holdout = chunk.index % self.holdout_every == 0 if self.holdout_every else np.zeros(len(chunk), bool)
+            yield chunk, holdout
+
+    def fit(self):
+        """Streams the CSV epochs times and returns the fitted pipeline."""
+        pipeline = self.build_pipeline()
+        preprocessor, classifier = pipeline.named_steps['preprocessor'], pipeline.named_steps['classifier']
+        fitted, rows = False, 0
+        start = time.perf_counter()
+        for epoch in range(self.epochs):
+            for chunk, holdout in self._chunks():
+                train = chunk[~holdout]
+                if not len(train):
+                    continue
+                if not fitted:
+                    # Stateless: fitting only records the input columns
+                    preprocessor.fit(train)
+                    fitted = True
+                classifier.partial_fit(preprocessor.transform(train), train[TARGET_COL].astype(int),
+                                       classes=CSAT_CLASSES)
+                rows += len(train)
+            self.logger.info(f"Epoch {epoch + 1}/{self.epochs} done: {rows:,} rows seen "
+                             f"in {time.perf_counter() - start:.1f}s")
+        if not fitted:
+            raise ValueError(f"No labelled training rows found in {self.data_path}")
+        return pipeline
+
+    def evaluate(self, pipeline):
+        """Scores the held-out rows in one more streaming pass. Returns (accuracy, report)."""
+        y_true, y_pred = [], []
+        for chunk, holdout in self._chunks():
+            test = chunk[holdout]
+            if len(test):
+                y_true.append(test[TARGET_COL].astype(int).to_numpy())
+                y_pred.append(pipeline.predict(test))
+        y_true, y_pred = np.concatenate(y_true), np.concatenate(y_pred)
+        return accuracy_score(y_true, y_pred), classification_report(y_true, y_pred, zero_division=0)
+
+def _train_and_score(backend, data_path, chunk_size, holdout_every, queue):
+    """Child-process body for compare_backends, so each backend's peak RSS is measured alone."""
+    import warnings
+    warnings.simplefilter('ignore', UserWarning)
+    start = time.perf_counter()
+    if backend == 'streaming':
+        trainer = StreamingTrainer(data_path, chunk_size=chunk_size, holdout_every=holdout_every)
+        accuracy, _ = trainer.evaluate(trainer.fit())
+    else:
+        predictor = CSATPredictor(data_path)
+        df = predictor.load_features().dropna(subset=[TARGET_COL])
+        holdout = df.index % holdout_every == 0
+        pipeline = predictor.build_pipeline()
+        pipeline.fit(df[~holdout], df.loc[~holdout, TARGET_COL])
+        accuracy = accuracy_score(df.loc[holdout, TARGET_COL], pipeline.predict(df[holdout]))
+    # ru_maxrss is kB on Linux and bytes on macOS
+    scale = 1e6 if sys.platform == 'darwin' else 1e3
+    queue.put({
+        'backend': backend,
+        'seconds': time.perf_counter() - start,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        'accuracy': accuracy,
+    })
+
+def compare_backends(data_path, chunk_size=100_000, holdout_every=5):
+    """Trains the forest and the streaming backend on the same rows and holdout, each in its own process."""
+    ctx = mp.get_context('spawn')
+    report = []
+    for backend in ('forest', 'streaming'):
+        queue = ctx.Queue()
+        process = ctx.Process(target=_train_and_score, args=(backend, data_path, chunk_size, holdout_every, queue))
+        process.start()
+        report.append(queue.get())
+        process.join()
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Out-of-core streaming training backend.")
+    parser.add_argument('data_path')
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    parser.add_argument('--compare', action='store_true', help="compare time, peak memory and accuracy with the forest")
+    args = parser.parse_args()
+
+    if args.compare:
+        for row in compare_backends(args.data_path, args.chunk_size):
+            print(json.dumps(row))
+        return
+    predictor = CSATPredictor(args.data_path, backend='streaming', chunk_size=args.chunk_size)
+    predictor.run()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main()
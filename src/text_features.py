@@ -0,0 +1,113 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+def _factorize(raw_documents):
+    """(codes, uniques) for a batch of documents, uniques in order of first appearance."""
+    return pd.factorize(np.asarray(raw_documents, dtype=object), use_na_sentinel=False)
+
+class DedupTfidfVectorizer(TfidfVectorizer):
+    """
+    TfidfVectorizer that tokenizes each distinct document once per call.
+
+    Customer Remarks are mostly empty or short repeated phrases, so a batch holds far
+    fewer distinct strings than rows. The term counts of the distinct strings are
+    scattered back to every row before document frequencies and TF-IDF weights are
+    computed, so fit, transform and the vocabulary are identical to TfidfVectorizer.
+    """
+
+    def _count_vocab(self, raw_documents, fixed_vocab):
+        # CountVectorizer routes every fit and transform through this counting step
+        codes, uniques = _factorize(raw_documents)
+        vocabulary, counts = super()._count_vocab(uniques, fixed_vocab)
+        return vocabulary, counts[codes]
+
+class RemarkVectorCache:
+    """
+    Bounded LRU of remark -> vectorized row in front of a fitted text vectorizer, for
+    long-lived inference engines. Each batch is deduplicated, only remarks not seen
+    recently are vectorized (once each), and rows are scattered back by index. Output
+    matches the wrapped vectorizer's transform. Other attributes are delegated, so the
+    wrapper can stand in for the vectorizer inside a fitted ColumnTransformer. Thread safe.
+    """
+
+    def __init__(self, vectorizer, max_size=10_000):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.vectorizer = vectorizer
+        self.max_size = max_size
+        self._rows = OrderedDict()
+        self._lock = threading.Lock()
+        self._n_features = None
+        self.hits = 0
+        self.misses = 0
+
+    def __getattr__(self, name):
+        # Only reached for attributes the wrapper does not define itself
+        if name == 'vectorizer' or name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.vectorizer, name)
+
+    def transform(self, raw_documents):
+        codes, uniques = _factorize(raw_documents)
+        if not len(uniques):
+            return self.vectorizer.transform(uniques)
+
+        rows = [None] * len(uniques)
+        with self._lock:
+            for i, remark in enumerate(uniques):
+                row = self._rows.get(remark)
+                if row is not None:
+                    self._rows.move_to_end(remark)
+                    rows[i] = row
+        missing = [i for i, row in enumerate(rows) if row is None]
+
+        if missing:
+            X = sp.csr_matrix(self.vectorizer.transform(uniques[missing]))
+            self._n_features = X.shape[1]
+            for j, i in enumerate(missing):
+                start, stop = X.indptr[j], X.indptr[j + 1]
+                rows[i] = (X.indices[start:stop].copy(), X.data[start:stop].copy())
+            with self._lock:
+                for i in missing:
+                    self._rows[uniques[i]] = rows[i]
+                while len(self._rows) > self.max_size:
+                    self._rows.popitem(last=False)
+        with self._lock:
+            self.hits += len(uniques) - len(missing)
+            self.misses += len(missing)
+
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(indices) for indices, _ in rows], out=indptr[1:])
+        unique_matrix = sp.csr_matrix((np.concatenate([data for _, data in rows]),
+                                       np.concatenate([indices for indices, _ in rows]), indptr),
+                                      shape=(len(rows), self._n_features), dtype=rows[0][1].dtype)
+        return unique_matrix[codes]
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'size': len(self._rows), 'max_size': self.max_size, 'hits': self.hits, 'misses': self.misses,
+                    'hit_rate': self.hits / lookups if lookups else 0.0}
+
+def install_remark_cache(preprocessor, max_size=10_000):
+    """
+    Puts a RemarkVectorCache in front of the 'txt' branch of a fitted ColumnTransformer.
+    Returns the cache, or None when the preprocessor has no 'txt' branch.
+    """
+    transformers = getattr(preprocessor, 'transformers_', None)
+    for i, (name, transformer, columns) in enumerate(transformers or []):
+        if name == 'txt':
+            if isinstance(transformer, RemarkVectorCache):
+                transformer = transformer.vectorizer
+            cache = RemarkVectorCache(transformer, max_size)
+            transformers[i] = (name, cache, columns)
+            return cache
+    return None
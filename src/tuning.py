@@ -0,0 +1,180 @@
+import argparse
+import json
+import logging
+import math
+import multiprocessing as mp
+import os
+import time
+import warnings
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import ParameterSampler, train_test_split
+from src.csat_pipelining import CSATPredictor, TARGET_COL
+
+# Keys under preprocessor__ change the feature matrix; the rest only change the forest.
+SEARCH_SPACE = {
+    'preprocessor__txt__max_features': [100, 250, 500],
+    'classifier__n_estimators': [50, 100, 200],
+    'classifier__max_depth': [None, 20, 40],
+    'classifier__min_samples_leaf': [1, 2, 5],
+    'classifier__max_features': ['sqrt', 0.2],
+}
+
+# Cached (X_train, y_train, X_val, y_val) per preprocessor config; set by _init_worker
+# in the parent before the pool starts, so forked workers inherit it copy-on-write
+_splits = {}
+
+def _init_worker(splits):
+    global _splits
+    _splits = splits
+
+def _fit_candidate(key, params, n_rows, seed):
+    """Worker entry point: fits one forest on the first n_rows of a fixed permutation and scores it."""
+    X_train, y_train, X_val, y_val = _splits[key]
+    # The same permutation at every rung, so each rung's rows contain the previous rung's
+    rows = np.random.default_rng(seed).permutation(X_train.shape[0])[:n_rows]
+    forest = RandomForestClassifier(random_state=42, n_jobs=1,
+                                    **{k[len('classifier__'):]: v for k, v in params.items()
+                                       if k.startswith('classifier__')})
+    start = time.perf_counter()
+    forest.fit(X_train[rows], y_train[rows])
+    return accuracy_score(y_val, forest.predict(X_val)), time.perf_counter() - start
+
+class HyperparameterSearch:
+    """
+    Random search over SEARCH_SPACE with successive halving over training rows.
+
+    The ColumnTransformer is fitted once per preprocessor config on the training split, and
+    its float32 output (the dtype the forest converts to anyway) is cached. Every classifier
+    candidate then reuses it. Rung i trains the surviving candidates on
+    min_rows * factor**i rows in parallel, and only the best 1/factor advance. When
+    time_budget seconds run out, the pool is terminated. The best candidate from the
+    highest rung reached is refitted as a full pipeline and saved like CSATPredictor.run().
+    """
+    REPORT_FILE = 'csat_model.tuning.json'
+
+    def __init__(self, data_path, model_dir='models', cache_dir=None, n_candidates=24, factor=3,
+                 min_rows=5_000, time_budget=600, n_workers=None, random_state=42):
+        self.predictor = CSATPredictor(data_path, model_dir=model_dir, cache_dir=cache_dir)
+        self.n_candidates = n_candidates
+        self.factor = factor
+        self.min_rows = min_rows
+        self.time_budget = time_budget
+        self.n_workers = n_workers or os.cpu_count()
+        self.random_state = random_state
+        self.splits = {}
+        self.history = []
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.INFO)
+
+    @staticmethod
+    def _preprocessor_key(params):
+        return tuple(sorted((k, v) for k, v in params.items() if k.startswith('preprocessor__')))
+
+    def candidates(self):
+        grid_size = math.prod(len(v) for v in SEARCH_SPACE.values())
+        sampler = ParameterSampler(SEARCH_SPACE, min(self.n_candidates, grid_size), random_state=self.random_state)
+        return [dict(params) for params in sampler]
+
+    def prepare(self, df, candidates):
+        """Splits df like CSATPredictor.run() and caches the transformed matrices per preprocessor config."""
+        df = df.dropna(subset=[TARGET_COL])
+        self.train_df, self.val_df = train_test_split(df, test_size=0.2, random_state=42)
+        for key in dict.fromkeys(self._preprocessor_key(c) for c in candidates):
+            start = time.perf_counter()
+            preprocessor = self.predictor.build_pipeline(dtype=np.float32).set_params(**dict(key))[:-1]
+            X_train = preprocessor.fit_transform(self.train_df)
+            X_val = preprocessor.transform(self.val_df)
+            self.splits[key] = (X_train, self.train_df[TARGET_COL].to_numpy(), X_val, self.val_df[TARGET_COL].to_numpy())
+            self.logger.info(f"Cached features for {dict(key)}: {X_train.shape} in {time.perf_counter() - start:.1f}s")
+
+    def _run_rung(self, pool, alive, n_rows, deadline):
+        """Fits every alive candidate on n_rows rows. Returns the finished ones and whether time ran out."""
+        pending = [(params, pool.apply_async(_fit_candidate, (self._preprocessor_key(params), params,
+                                                              n_rows, self.random_state)))
+                   for params in alive]
+        finished = []
+        for params, result in pending:
+            try:
+                score, seconds = result.get(timeout=max(deadline - time.monotonic(), 0))
+            except mp.TimeoutError:
+                return finished, True
+            finished.append({'params': params, 'rows': n_rows, 'accuracy': score, 'fit_seconds': seconds})
+        return finished, False
+
+    def search(self):
+        """Runs the halving rounds. Returns the best entry of the highest rung reached."""
+        df = self.predictor.load_features()
+        candidates = self.candidates()
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            self.prepare(df, candidates)
+        n_train = len(self.train_df)
+
+        deadline = time.monotonic() + self.time_budget
+        context = mp.get_context('fork') if 'fork' in mp.get_all_start_methods() else mp.get_context('spawn')
+        pool = context.Pool(self.n_workers, initializer=_init_worker, initargs=(self.splits,))
+        best, alive, rung = None, candidates, 0
+        try:
+            while alive:
+                n_rows = min(self.min_rows * self.factor ** rung, n_train)
+                results, out_of_time = self._run_rung(pool, alive, n_rows, deadline)
+                self.history.extend({**r, 'rung': rung} for r in results)
+                if results:
+                    results.sort(key=lambda r: r['accuracy'], reverse=True)
+                    best = results[0]
+                    self.logger.info(f"Rung {rung}: {len(results)}/{len(alive)} candidates on {n_rows:,} rows, "
+                                     f"best accuracy {best['accuracy']:.4f}")
+                if out_of_time:
+                    self.logger.info(f"Time budget of {self.time_budget}s exhausted during rung {rung}")
+                    break
+                if n_rows == n_train or len(results) == 1:
+                    break
+                alive = [r['params'] for r in results[:math.ceil(len(results) / self.factor)]]
+                rung += 1
+        finally:
+            pool.terminate()
+            pool.join()
+
+        if best is None:
+            raise ValueError(f"No candidate finished within the {self.time_budget}s budget; raise time_budget.")
+        return best
+
+    def fit_best(self, best):
+        """Refits the winning config as a full pipeline on the training split and saves it for CSATInference."""
+        pipeline = self.predictor.build_pipeline().set_params(**best['params'])
+        pipeline.fit(self.train_df, self.train_df[TARGET_COL])
+        y_pred = pipeline.predict(self.val_df)
+        accuracy = accuracy_score(self.val_df[TARGET_COL], y_pred)
+        self.logger.info(f"Best params {best['params']}: validation accuracy {accuracy:.4f}")
+
+        self.predictor.model = pipeline
+        self.predictor.save_model()
+        self.predictor.save_sidecars(self.train_df, self.val_df, self.val_df[TARGET_COL], y_pred)
+        report = {'best_params': best['params'], 'validation_accuracy': accuracy, 'history': self.history}
+        with open(os.path.join(self.predictor.model_dir, self.REPORT_FILE), 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune the CSAT forest with successive halving.")
+    parser.add_argument('--data', default=os.path.join("data", "_e_Commerce_Customer_support_data.csv"))
+    parser.add_argument('--model-dir', default='models')
+    parser.add_argument('--cache-dir', default=os.path.join("data", "cache"))
+    parser.add_argument('--candidates', type=int, default=24)
+    parser.add_argument('--factor', type=int, default=3, help="keep the best 1/factor of candidates per rung")
+    parser.add_argument('--min-rows', type=int, default=5_000, help="training rows in the first rung")
+    parser.add_argument('--budget', type=float, default=600, help="seconds for the whole search")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    search = HyperparameterSearch(args.data, model_dir=args.model_dir, cache_dir=args.cache_dir,
+                                  n_candidates=args.candidates, factor=args.factor, min_rows=args.min_rows,
+                                  time_budget=args.budget, n_workers=args.workers)
+    report = search.fit_best(search.search())
+    print(json.dumps({k: report[k] for k in ('best_params', 'validation_accuracy')}, indent=2, default=str))
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,64 @@
+import warnings
+import pytest
+from benchmarks.synthetic_data import SyntheticTicketGenerator
+from src.csat_pipelining import CSATPredictor, engineer_features, TARGET_COL
+
+# Small enough to fit every backend in a few seconds
+N_ROWS = 2_000
+N_TREES = 20
+
+@pytest.fixture(autouse=True)
+def _quiet_date_parsing():
+    # The synthetic export's day-first dates make pandas warn about format inference
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', message='Parsing dates', category=UserWarning)
+        warnings.filterwarnings('ignore', message='Could not infer format', category=UserWarning)
+        yield
+
+@pytest.fixture(scope='session')
+def raw_frame():
+    """Raw tickets with the columns of the DeepCSAT export."""
+    return SyntheticTicketGenerator(seed=0).generate(N_ROWS)
+
+@pytest.fixture(scope='session')
+def frame(raw_frame):
+    """The engineered frame CSATPredictor trains on."""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        df = engineer_features(raw_frame.copy())
+    return df.dropna(subset=[TARGET_COL]).reset_index(drop=True)
+
+@pytest.fixture(scope='session')
+def split(frame):
+    return frame.iloc[:1_500], frame.iloc[1_500:]
+
+@pytest.fixture
+def csv_path(tmp_path, raw_frame):
+    path = tmp_path / 'tickets.csv'
+    raw_frame.to_csv(path, index=False)
+    return str(path)
+
+def fit_pipeline(train, backend='forest', **kwargs):
+    """A small pipeline as CSATPredictor.build_pipeline builds it for backend."""
+    pipeline = CSATPredictor(None, backend=backend, **kwargs).build_pipeline()
+    if backend == 'forest':
+        pipeline.set_params(classifier__n_estimators=N_TREES, classifier__n_jobs=1)
+    else:
+        pipeline.set_params(classifier__max_iter=N_TREES)
+    return pipeline.fit(train, train[TARGET_COL])
+
+@pytest.fixture(scope='session')
+def forest_pipeline(split):
+    return fit_pipeline(split[0])
+
+@pytest.fixture(scope='session')
+def booster_pipeline(split):
+    return fit_pipeline(split[0], backend='hist_gb')
+
+@pytest.fixture(scope='session')
+def model_dir(tmp_path_factory, forest_pipeline):
+    """forest_pipeline saved by CSATPredictor.save_model, as training saves it."""
+    predictor = CSATPredictor(None, model_dir=str(tmp_path_factory.mktemp('models')))
+    predictor.model = forest_pipeline
+    predictor.save_model()
+    return predictor.model_dir
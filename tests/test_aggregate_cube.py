@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+from src.aggregate_cube import AggregateCube, CSAT_LEVELS
+from src.csat_pipelining import TARGET_COL, SURVEY_DATE_COL
+
+def _expected(df, by):
+    """The summary numbers computed straight from the ticket rows with a pandas group-by."""
+    df = df.assign(**{by: df[by].astype(object).fillna('Unknown')})
+    grouped = df.groupby(by)
+    expected = pd.DataFrame({'tickets': grouped.size(), 'csat_mean': grouped[TARGET_COL].mean()})
+    for level in CSAT_LEVELS:
+        expected[f'share_{level}'] = grouped[TARGET_COL].apply(lambda s: (s == level).sum() / s.notna().sum())
+    return expected
+
+def _check_summary(cube, df, by):
+    summary = AggregateCube.summarize(cube.cells, by=by)
+    expected = _expected(df, by)
+    summary.index = summary.index.astype(object)
+    summary = summary.loc[expected.index]
+    np.testing.assert_array_equal(summary['tickets'], expected['tickets'])
+    np.testing.assert_allclose(summary[expected.columns[1:]], expected[expected.columns[1:]], rtol=1e-12)
+
+def test_cube_matches_groupby(frame, tmp_path):
+    cube = AggregateCube()
+    # Adding in two parts must sum to the same cells as one pass
+    cube.add(frame.iloc[:900])
+    cube.add(frame.iloc[900:])
+    assert cube.cells['tickets'].sum() == len(frame)
+    cube.save(str(tmp_path / 'cube.npz'))
+    loaded = AggregateCube.load(str(tmp_path / 'cube.npz'))
+    for by in ('channel_name', 'Agent Shift', 'Manager'):
+        _check_summary(cube, frame, by)
+        _check_summary(loaded, frame, by)
+
+def test_filters_and_percentiles_match_rows(frame):
+    cube = AggregateCube()
+    cube.add(frame)
+    days = pd.to_datetime(frame[SURVEY_DATE_COL]).dt.normalize()
+    start, end = days.quantile(0.25), days.quantile(0.75)
+    shift = frame['Agent Shift'].dropna().iloc[0]
+    rows = frame[(frame['Agent Shift'] == shift) & days.between(start, end)]
+
+    summary = AggregateCube.summarize(cube.filter({'Agent Shift': [shift]}, start=start, end=end))
+    assert summary['tickets'].iloc[0] == len(rows)
+    np.testing.assert_allclose(summary['csat_mean'].iloc[0], rows[TARGET_COL].mean(), rtol=1e-12)
+    # Percentiles come from a log-binned histogram, so they are within one bin (about 9%) of the exact value
+    minutes = rows['response_time_minutes'].dropna()
+    for q in (50, 90):
+        exact = np.percentile(minutes, q)
+        assert abs(summary[f'rt_p{q}'].iloc[0] - exact) <= 0.1 * exact + 1.0
+
+def test_add_csv_matches_engineered_frame(csv_path, frame):
+    cube = AggregateCube()
+    assert cube.add_csv(csv_path, chunk_size=500, n_workers=1)
+    # The same file is never counted twice
+    assert not cube.add_csv(csv_path)
+    rated = cube.cells[['rated', 'csat_sum']].sum()
+    assert rated['rated'] == frame[TARGET_COL].notna().sum()
+    assert rated['csat_sum'] == frame[TARGET_COL].sum()
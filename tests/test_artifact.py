@@ -0,0 +1,47 @@
+import json
+import os
+import numpy as np
+import pytest
+from src.artifact import ModelArtifact, StaleArtifactError
+from src.csat_pipelining import TARGET_COL
+from src.forest_engine import FlatForest
+
+@pytest.fixture
+def artifact_dir(tmp_path, forest_pipeline):
+    artifact = ModelArtifact(str(tmp_path / 'csat_model'))
+    artifact.save(forest_pipeline)
+    return artifact.artifact_dir
+
+def _edit_meta(artifact_dir, edit):
+    path = os.path.join(artifact_dir, ModelArtifact.META_FILE)
+    with open(path) as f:
+        meta = json.load(f)
+    edit(meta)
+    with open(path, 'w') as f:
+        json.dump(meta, f)
+
+def test_memory_mapped_forest_matches_pipeline(artifact_dir, forest_pipeline, split):
+    test = split[1].drop(columns=[TARGET_COL])
+    loaded = ModelArtifact(artifact_dir).load()
+    forest = loaded[-1]
+    assert isinstance(forest, FlatForest) and isinstance(forest.feature, np.memmap)
+    np.testing.assert_allclose(loaded.predict_proba(test), forest_pipeline.predict_proba(test), atol=1e-12)
+    np.testing.assert_array_equal(loaded.predict(test), forest_pipeline.predict(test))
+
+def test_booster_artifact_matches_pipeline(tmp_path, booster_pipeline, split):
+    artifact = ModelArtifact(str(tmp_path / 'csat_model'))
+    artifact.save(booster_pipeline)
+    test = split[1].drop(columns=[TARGET_COL])
+    np.testing.assert_allclose(artifact.load().predict_proba(test), booster_pipeline.predict_proba(test))
+
+@pytest.mark.parametrize('edit', [
+    lambda meta: meta.update(sklearn_version='0.24.2'),
+    lambda meta: meta['schema'].update(feature_version=meta['schema']['feature_version'] + 1),
+    lambda meta: meta['schema']['numeric'].pop(),
+    lambda meta: meta.update(artifact_version=meta['artifact_version'] + 1),
+    lambda meta: meta['arrays']['threshold'].update(dtype='<f4'),
+], ids=['sklearn_series', 'feature_version', 'schema', 'artifact_version', 'array_header'])
+def test_mismatched_artifact_is_refused(artifact_dir, edit):
+    _edit_meta(artifact_dir, edit)
+    with pytest.raises(StaleArtifactError):
+        ModelArtifact(artifact_dir).load()
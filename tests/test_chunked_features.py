@@ -0,0 +1,16 @@
+import pytest
+from src.chunked_features import ChunkedFeatureEngine
+from src.csat_pipelining import NUMERIC_FEATURES, CATEGORICAL_FEATURES, TEXT_FEATURE, TARGET_COL
+
+@pytest.mark.parametrize('columns', [None, NUMERIC_FEATURES + CATEGORICAL_FEATURES + [TEXT_FEATURE, TARGET_COL]])
+def test_chunked_output_matches_engineer_features(csv_path, columns):
+    engine = ChunkedFeatureEngine(csv_path, chunk_size=300, n_workers=2, columns=columns)
+    assert engine.verify()
+
+def test_chunks_with_all_missing_columns(tmp_path, raw_frame):
+    # The first chunk has no prices, remarks or cities, so its dtypes differ from the rest
+    df = raw_frame.copy()
+    df.loc[:299, ['Item_price', 'Customer Remarks', 'Customer_City']] = None
+    path = tmp_path / 'gaps.csv'
+    df.to_csv(path, index=False)
+    assert ChunkedFeatureEngine(str(path), chunk_size=300, n_workers=2).verify()
@@ -0,0 +1,26 @@
+import numpy as np
+from src.compiled_scorer import CompiledScorer
+from src.csat_pipelining import TARGET_COL
+
+def test_compiled_scorer_matches_pipeline(forest_pipeline, split):
+    test = split[1].drop(columns=[TARGET_COL]).head(200)
+    scorer = CompiledScorer(forest_pipeline)
+    assert scorer.verify(forest_pipeline, test) <= 1e-9
+    labels = [scorer.predict(record)[0] for record in test.to_dict('records')]
+    np.testing.assert_array_equal(labels, forest_pipeline.predict(test))
+
+def test_compiled_scorer_matches_booster_pipeline(booster_pipeline, split):
+    test = split[1].drop(columns=[TARGET_COL]).head(200)
+    scorer = CompiledScorer(booster_pipeline)
+    assert scorer.verify(booster_pipeline, test) <= 1e-9
+    proba, trees_used = scorer.predict_proba_adaptive(test.to_dict('records')[0])
+    assert trees_used is None
+    np.testing.assert_allclose(proba, booster_pipeline.predict_proba(test.head(1))[0], atol=1e-9)
+
+def test_compiled_scorer_handles_missing_and_unknown_values(forest_pipeline, booster_pipeline, split):
+    test = split[1].drop(columns=[TARGET_COL]).head(20).copy()
+    test['Item_price'] = np.nan
+    test['channel_name'] = 'never seen'
+    test['Customer Remarks'] = ''
+    for pipeline in (forest_pipeline, booster_pipeline):
+        assert CompiledScorer(pipeline).verify(pipeline, test) <= 1e-9
@@ -0,0 +1,61 @@
+import json
+import numpy as np
+import pytest
+from src.csat_pipelining import TARGET_COL
+from src.drift_monitor import DriftMonitor
+
+@pytest.fixture(scope='module')
+def scored(forest_pipeline, frame):
+    X = frame.drop(columns=[TARGET_COL])
+    return X, forest_pipeline.predict(X)
+
+@pytest.fixture(scope='module')
+def reference(forest_pipeline, scored):
+    X, labels = scored
+    # JSON round trip, as for_model reads it back
+    return json.loads(json.dumps(DriftMonitor.build_reference(forest_pipeline, X, labels)))
+
+def _report(reference, X, labels):
+    monitor = DriftMonitor(reference)
+    monitor.observe_frame(X, labels)
+    return monitor.report()
+
+def test_identical_traffic_raises_no_alerts(reference, scored):
+    report = _report(reference, *scored)
+    assert report['ready'] and report['drifted'] == []
+    assert all(stats['psi'] < 1e-6 for stats in report['numeric'].values())
+    assert all(stats['unknown_rate'] == 0 for stats in report['categorical'].values())
+    assert report['predictions']['psi'] < 1e-6
+
+def test_shifted_numeric_column_alerts(reference, scored):
+    X, labels = scored
+    shifted = X.assign(response_time_minutes=X['response_time_minutes'] * 3 + 500,
+                       Item_price=X['Item_price'] * 3 + 500)
+    report = _report(reference, shifted, labels)
+    assert report['numeric']['response_time_minutes']['psi'] >= DriftMonitor.PSI_ALERT
+    assert report['numeric']['response_time_minutes']['above_range_rate'] > 0
+    # Item_price has too few present values (under min_rows) to be flagged, however far it moved
+    assert report['numeric']['Item_price']['psi'] >= DriftMonitor.PSI_ALERT
+    assert report['drifted'] == ['response_time_minutes']
+
+def test_unseen_categories_alert(reference, scored):
+    X, labels = scored
+    unseen = X.copy()
+    unseen.loc[unseen.index[::20], 'channel_name'] = 'Carrier pigeon'
+    stats = _report(reference, unseen, labels)['categorical']['channel_name']
+    assert stats['unknown_rate'] >= DriftMonitor.UNKNOWN_ALERT
+    assert stats['top_unknown'][0] == ['Carrier pigeon', len(unseen.index[::20])]
+    assert 'channel_name' in _report(reference, unseen, labels)['drifted']
+
+def test_scalar_and_frame_paths_agree(reference, scored):
+    X, labels = scored
+    X = X.assign(response_time_minutes=X['response_time_minutes'] * 3)
+    by_frame = _report(reference, X, labels)
+    monitor = DriftMonitor(reference)
+    for record, label in zip(X.to_dict('records'), labels):
+        monitor.observe_record(record, label)
+    assert monitor.report() == dict(by_frame, since=monitor.report()['since'])
+    # Nothing is flagged before min_rows rows
+    monitor.reset()
+    monitor.observe_frame(X.head(100), labels[:100])
+    assert monitor.report()['drifted'] == [] and not monitor.report()['ready']
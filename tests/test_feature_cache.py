@@ -0,0 +1,63 @@
+import os
+import numpy as np
+import pandas as pd
+import src.csat_pipelining as csat_pipelining
+from src.csat_pipelining import (CSATPredictor, engineer_features, NUMERIC_FEATURES, CATEGORICAL_FEATURES,
+                                 TEXT_FEATURE, TARGET_COL, SURVEY_DATE_COL, FEATURE_VERSION)
+from src.feature_cache import FeatureCache
+
+COLUMNS = NUMERIC_FEATURES + CATEGORICAL_FEATURES + [TEXT_FEATURE, TARGET_COL, SURVEY_DATE_COL]
+
+def _count_builds(monkeypatch):
+    builds = []
+    original = CSATPredictor._engineer_source
+    def counting(self, columns=None):
+        builds.append(columns)
+        return original(self, columns)
+    monkeypatch.setattr(CSATPredictor, '_engineer_source', counting)
+    return builds
+
+def test_cached_frame_matches_fresh_features(csv_path, tmp_path, monkeypatch):
+    builds = _count_builds(monkeypatch)
+    predictor = CSATPredictor(csv_path, cache_dir=str(tmp_path / 'cache'))
+    built = predictor.load_features()
+    cached = predictor.load_features()
+    assert len(builds) == 1
+
+    fresh = engineer_features(pd.read_csv(csv_path))
+    assert list(cached.columns) == COLUMNS and len(cached) == len(fresh)
+    for col in NUMERIC_FEATURES + [TARGET_COL]:
+        # Numerics are stored as float32 or a narrow integer type
+        np.testing.assert_allclose(cached[col].to_numpy(np.float64), fresh[col].to_numpy(np.float64),
+                                   rtol=1e-6, equal_nan=True)
+    for col in CATEGORICAL_FEATURES + [TEXT_FEATURE]:
+        expected = fresh[col].astype(object).where(fresh[col].notna(), None)
+        assert cached[col].astype(object).where(cached[col].notna(), None).tolist() == expected.tolist()
+    np.testing.assert_array_equal(cached[SURVEY_DATE_COL].to_numpy(), fresh[SURVEY_DATE_COL].to_numpy())
+    # Dates come back as datetime64[ns] whatever resolution pandas parsed them at
+    pd.testing.assert_frame_equal(cached, built.reset_index(drop=True), check_categorical=False, check_dtype=False)
+
+def test_cache_rebuilds_when_source_changes(csv_path, tmp_path, monkeypatch):
+    builds = _count_builds(monkeypatch)
+    cache_dir = str(tmp_path / 'cache')
+    CSATPredictor(csv_path, cache_dir=cache_dir).load_features()
+    cache = FeatureCache(cache_dir, version=FEATURE_VERSION)
+    old_entry = cache.entry_dir(csv_path, COLUMNS)
+
+    pd.read_csv(csv_path).iloc[:-1].to_csv(csv_path, index=False)
+    assert cache.load(csv_path, COLUMNS) is None
+    rebuilt = CSATPredictor(csv_path, cache_dir=cache_dir).load_features()
+    assert len(builds) == 2 and len(rebuilt) == len(pd.read_csv(csv_path))
+    # The entry for the old source content is pruned
+    assert not os.path.exists(old_entry)
+
+def test_cache_rebuilds_when_feature_version_changes(csv_path, tmp_path, monkeypatch):
+    builds = _count_builds(monkeypatch)
+    cache_dir = str(tmp_path / 'cache')
+    CSATPredictor(csv_path, cache_dir=cache_dir).load_features()
+    assert FeatureCache(cache_dir, version=FEATURE_VERSION + 1).load(csv_path, COLUMNS) is None
+
+    monkeypatch.setattr(csat_pipelining, 'FEATURE_VERSION', FEATURE_VERSION + 1)
+    CSATPredictor(csv_path, cache_dir=cache_dir).load_features()
+    CSATPredictor(csv_path, cache_dir=cache_dir).load_features()
+    assert len(builds) == 2
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+from src.csat_pipelining import TARGET_COL
+from src.forest_engine import FlatForest, FlatBooster
+
+@pytest.fixture(scope='module')
+def data():
+    X, y = make_classification(n_samples=1_500, n_features=20, n_informative=8, n_classes=5, random_state=0)
+    # Sparse-looking columns, like the one-hot and TF-IDF blocks of the CSAT matrix
+    X[:, 10:] = np.where(X[:, 10:] > 0.5, X[:, 10:], 0.0)
+    return X[:1_000], y[:1_000], X[1_000:]
+
+@pytest.fixture(scope='module')
+def forest(data):
+    X_train, y_train, _ = data
+    return RandomForestClassifier(n_estimators=20, random_state=0, n_jobs=1).fit(X_train, y_train)
+
+def test_flat_forest_matches_sklearn(forest, data):
+    X = data[2]
+    flat = FlatForest(forest)
+    np.testing.assert_allclose(flat.predict_proba(X), forest.predict_proba(X), atol=1e-12)
+    np.testing.assert_array_equal(flat.predict(X), forest.predict(X))
+
+def test_flat_forest_single_row_and_sparse(forest, data):
+    X = data[2]
+    flat = FlatForest(forest)
+    np.testing.assert_allclose(flat.predict_proba(X[:1]), forest.predict_proba(X[:1]), atol=1e-12)
+    np.testing.assert_allclose(flat.predict_proba(sp.csr_matrix(X)), forest.predict_proba(X), atol=1e-12)
+
+def test_flat_forest_float32_thresholds_match_sklearn(forest, data):
+    X = data[2].astype(np.float32)
+    flat = FlatForest(forest, float32_thresholds=True)
+    assert flat.threshold.dtype == np.float32
+    np.testing.assert_allclose(flat.predict_proba(X), forest.predict_proba(X), atol=1e-12)
+
+def test_flat_forest_apply_matches_tree_leaves(forest, data):
+    X = data[2][:50]
+    flat = FlatForest(forest)
+    expected = forest.apply(X) + flat.roots
+    np.testing.assert_array_equal(flat.apply(X), expected)
+
+def test_walk_one_matches_traverse(forest, data):
+    X = data[2][:50].astype(np.float32)
+    flat = FlatForest(forest)
+    for roots in (flat.roots, flat.roots[5:12], flat.roots[-1:]):
+        for x in X:
+            np.testing.assert_array_equal(flat._walk_one(x, roots), flat._traverse(x[None, :], roots))
+
+def test_predict_proba_one_matches_sklearn(forest, data):
+    flat = FlatForest(forest)
+    for x in data[2][:20]:
+        np.testing.assert_allclose(flat.predict_proba_one(x), forest.predict_proba(x[None, :])[0], atol=1e-12)
+
+def test_adaptive_exact_mode_matches_full_forest(forest, data):
+    X = data[2]
+    flat = FlatForest(forest)
+    full = forest.predict_proba(X)
+    for block_size in (1, 3, 10):
+        proba, trees_used = flat.predict_proba_adaptive(X, block_size)
+        np.testing.assert_array_equal(proba.argmax(axis=1), full.argmax(axis=1))
+        assert trees_used.min() > flat.n_trees // 2 and trees_used.max() <= flat.n_trees
+        everything = trees_used == flat.n_trees
+        np.testing.assert_allclose(proba[everything], full[everything], atol=1e-12)
+    # A single row takes the one-call full walk
+    proba, trees_used = flat.predict_proba_adaptive(X[:1])
+    np.testing.assert_allclose(proba, full[:1], atol=1e-12)
+    assert trees_used.tolist() == [flat.n_trees]
+
+def test_adaptive_confidence_uses_fewer_trees(forest, data):
+    X = data[2]
+    flat = FlatForest(forest)
+    exact = flat.predict_proba_adaptive(X, 2)[1]
+    proba, trees_used = flat.predict_proba_adaptive(X, 2, confidence=0.95)
+    assert trees_used.mean() < exact.mean()
+    # Single rows stop early too, on the same trees as in a batch
+    for i in range(10):
+        one, used = flat.predict_proba_adaptive(X[i:i + 1], 2, confidence=0.95)
+        assert used[0] == trees_used[i]
+        np.testing.assert_allclose(one[0], proba[i], atol=1e-12)
+
+def test_flat_booster_matches_sklearn(booster_pipeline, split):
+    test = split[1].drop(columns=[TARGET_COL]).copy()
+    # Missing numerics and categories the encoder never saw take the learned missing-value branches
+    test.loc[test.index[::7], 'Item_price'] = np.nan
+    test.loc[test.index[::5], 'channel_name'] = 'never seen'
+    X = booster_pipeline[:-1].transform(test)
+    booster = booster_pipeline[-1]
+    flat = FlatBooster(booster)
+    np.testing.assert_allclose(flat.decision_function(X), booster.decision_function(X), atol=1e-9)
+    np.testing.assert_allclose(flat.predict_proba(X), booster.predict_proba(X), atol=1e-12)
+    np.testing.assert_array_equal(flat.predict(X), booster.predict(X))
+    np.testing.assert_allclose(flat.predict_proba(X[:1]), booster.predict_proba(X[:1]), atol=1e-12)
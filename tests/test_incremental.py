@@ -0,0 +1,63 @@
+import json
+import os
+import joblib
+import numpy as np
+import pytest
+from src.csat_pipelining import CSATPredictor, TARGET_COL
+from src.incremental import IncrementalTrainer
+from tests.conftest import N_TREES
+
+@pytest.fixture
+def trainer(tmp_path, forest_pipeline):
+    predictor = CSATPredictor(None, model_dir=str(tmp_path))
+    predictor.model = forest_pipeline
+    predictor.save_model()
+    return IncrementalTrainer(str(tmp_path), trees_per_generation=5, max_trees=N_TREES + 5, keep_versions=1)
+
+def test_two_windows_slide_the_forest(trainer, frame, split):
+    first, second = frame.iloc[:700], frame.iloc[700:1_400]
+    # The second window has no unhappy tickets, so its trees never see classes 1 to 3
+    second = second[second[TARGET_COL] >= 4]
+
+    trainer.update(first, source='week-1')
+    model = trainer.update(second, source='week-2')
+
+    forest = model[-1]
+    assert len(forest.estimators_) == N_TREES + 5
+    for tree in forest.estimators_[-5:]:
+        assert tree.n_classes_ == len(forest.classes_)
+        # Padded columns for the classes the window never had stay at zero
+        np.testing.assert_array_equal(tree.tree_.value[:, 0, :3], 0.0)
+    proba = model.predict_proba(split[1])
+    assert proba.shape == (len(split[1]), len(forest.classes_))
+    np.testing.assert_allclose(proba.sum(axis=1), 1.0)
+
+    with open(trainer.lineage_path) as f:
+        lineage = json.load(f)
+    assert lineage['version'] == 3
+    assert [(g['id'], g['trees'], g['source']) for g in lineage['generations']] == \
+        [(0, N_TREES - 5, 'full refit'), (1, 5, 'week-1'), (2, 5, 'week-2')]
+    assert lineage['model_signature'] == trainer._signature(trainer.predictor.model_path)
+    # keep_versions=1 keeps only the newest archived version, a copy of the saved model
+    versions_dir = os.path.join(trainer.model_dir, trainer.VERSIONS_DIR)
+    assert os.listdir(versions_dir) == ['csat_model-v0003.pkl']
+    archived = joblib.load(os.path.join(versions_dir, 'csat_model-v0003.pkl'))
+    np.testing.assert_allclose(archived.predict_proba(split[1]), proba)
+
+def test_padded_tree_matches_the_window_tree(trainer, frame):
+    model = joblib.load(trainer.predictor.model_path)
+    window = frame[frame[TARGET_COL].isin([2, 5])].head(300)
+    X = model[:-1].transform(window)
+    generation = model[-1].__class__(n_estimators=1, random_state=0).fit(X, window[TARGET_COL])
+    tree = generation.estimators_[0]
+    expected = tree.predict_proba(X)
+    padded = trainer._pad_classes(tree, generation.classes_, model[-1].classes_)
+    proba = padded.predict_proba(X)
+    np.testing.assert_allclose(proba[:, [1, 4]], expected)
+    np.testing.assert_array_equal(proba[:, [0, 2, 3]], 0.0)
+
+def test_unknown_class_is_refused(trainer, frame):
+    window = frame.head(50).copy()
+    window[TARGET_COL] = 6
+    with pytest.raises(ValueError, match='not trained on'):
+        trainer.update(window)
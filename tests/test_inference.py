@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+from src.csat_pipelining import TARGET_COL
+from src.inference import CSATInference
+
+@pytest.mark.parametrize('options', [{}, {'backend': 'flat'}, {'use_artifact': True}, {'cache_size': 100}],
+                         ids=['sklearn', 'flat', 'artifact', 'cache'])
+def test_predict_batch_matches_pipeline(model_dir, forest_pipeline, split, options):
+    test = split[1].drop(columns=[TARGET_COL])
+    engine = CSATInference(model_dir=model_dir, **options)
+    result = engine.predict_batch(test, return_proba=True)
+    np.testing.assert_array_equal(result.labels, forest_pipeline.predict(test))
+    np.testing.assert_allclose(result.probabilities, forest_pipeline.predict_proba(test), atol=1e-12)
+    np.testing.assert_allclose(result.confidence, result.probabilities.max(axis=1))
+    # A second pass is served from the prediction cache when it is on
+    np.testing.assert_array_equal(engine.predict_batch(test).labels, result.labels)
+
+def test_predict_batch_accepts_records(model_dir, forest_pipeline, split):
+    test = split[1].drop(columns=[TARGET_COL]).head(20)
+    engine = CSATInference(model_dir=model_dir)
+    labels = engine.predict_batch(test.to_dict('records')).labels
+    np.testing.assert_array_equal(labels, forest_pipeline.predict(test))
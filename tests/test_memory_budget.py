@@ -0,0 +1,42 @@
+import src.csat_pipelining as csat_pipelining
+from src.csat_pipelining import CSATPredictor, TARGET_COL
+from tests.conftest import N_TREES
+
+RSS_MB = 200.0
+
+def _budgeted(monkeypatch, train, extra_mb):
+    """A predictor whose forest has to fit in extra_mb above a fixed resident set."""
+    monkeypatch.setattr(csat_pipelining, 'rss_mb', lambda: RSS_MB)
+    predictor = CSATPredictor(None, memory_budget_mb=RSS_MB + extra_mb)
+    predictor.model = predictor.build_pipeline()
+    predictor.model.set_params(classifier__n_estimators=N_TREES, classifier__n_jobs=1)
+    predictor.y_train = train[TARGET_COL]
+    return predictor
+
+def _bytes_per_sample(predictor):
+    return 2 * N_TREES * predictor.NODES_PER_SAMPLE * (predictor.NODE_BYTES + 8 * predictor.y_train.nunique())
+
+def test_small_budget_caps_bootstrap_samples(monkeypatch, split):
+    train = split[0]
+    predictor = _budgeted(monkeypatch, train, extra_mb=2.5)
+    # The class floor is larger than this training set
+    predictor.MIN_MAX_SAMPLES = 100
+    predictor._apply_memory_budget(len(train))
+    max_samples = predictor.model[-1].max_samples
+    assert isinstance(max_samples, int) and predictor.MIN_MAX_SAMPLES <= max_samples < len(train)
+    assert max_samples * _bytes_per_sample(predictor) <= 2.5e6 < (max_samples + 1) * _bytes_per_sample(predictor)
+
+    # The fitted forest stays within the estimate the cap was derived from
+    forest = predictor.model.fit(train, train[TARGET_COL])[-1]
+    nodes = sum(tree.tree_.node_count for tree in forest.estimators_)
+    assert nodes * (predictor.NODE_BYTES + 8 * len(forest.classes_)) <= 2.5e6
+
+def test_budget_floor_and_room_to_spare(monkeypatch, split):
+    train = split[0]
+    predictor = _budgeted(monkeypatch, train, extra_mb=0.1)
+    predictor._apply_memory_budget(len(train))
+    assert predictor.model[-1].max_samples == predictor.MIN_MAX_SAMPLES
+
+    predictor = _budgeted(monkeypatch, train, extra_mb=1_000)
+    predictor._apply_memory_budget(len(train))
+    assert predictor.model[-1].max_samples is None
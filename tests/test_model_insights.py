@@ -0,0 +1,22 @@
+from src.csat_pipelining import CSATPredictor, NUMERIC_FEATURES, CATEGORICAL_FEATURES, TEXT_FEATURE, TARGET_COL
+from src.model_insights import ModelInsights
+
+def _insights(tmp_path, pipeline, split, **kwargs):
+    train, test = split
+    predictor = CSATPredictor(None, model_dir=str(tmp_path), n_workers=1, **kwargs)
+    predictor.model = pipeline
+    predictor.save_model()
+    predictor.save_sidecars(train, test, test[TARGET_COL])
+    return ModelInsights(str(tmp_path)).load()
+
+def test_training_skips_importance_by_default(tmp_path, forest_pipeline, split):
+    insights = _insights(tmp_path, forest_pipeline, split)
+    assert insights['permutation_importance'] == {}
+    assert insights['test_rows'] == len(split[1]) and not insights['stale']
+    assert insights['accuracy'] == (forest_pipeline.predict(split[1]) == split[1][TARGET_COL]).mean()
+
+def test_importance_when_asked(tmp_path, forest_pipeline, split):
+    importance = _insights(tmp_path, forest_pipeline, split, insights=True)['permutation_importance']
+    assert set(importance) == set(NUMERIC_FEATURES + CATEGORICAL_FEATURES + [TEXT_FEATURE])
+    means = [value['mean'] for value in importance.values()]
+    assert means == sorted(means, reverse=True)
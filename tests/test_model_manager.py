@@ -0,0 +1,104 @@
+import os
+import time
+import joblib
+import numpy as np
+import pytest
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.pipeline import Pipeline
+from src.csat_pipelining import (CSATPredictor, NUMERIC_FEATURES, CATEGORICAL_FEATURES, TEXT_FEATURE, TARGET_COL,
+                                 category_encoder)
+from src.model_manager import ModelManager, warmup_records, FALLBACK_RECORDS
+
+class NaNClassifier(ClassifierMixin, BaseEstimator):
+    """Loads and scores like a classifier but returns probabilities that are not distributions."""
+    def __init__(self, classes):
+        self.classes_ = np.asarray(classes)
+
+    def predict_proba(self, X):
+        return np.full((X.shape[0], len(self.classes_)), np.nan)
+
+    def predict(self, X):
+        return self.classes_.take(np.zeros(X.shape[0], dtype=int))
+
+@pytest.fixture
+def manager_dir(tmp_path, forest_pipeline):
+    predictor = CSATPredictor(None, model_dir=str(tmp_path))
+    predictor.model = forest_pipeline
+    predictor.save_model()
+    return str(tmp_path)
+
+def _publish(model_dir, name, model=None, raw=None):
+    """Writes a pickle (or raw bytes) under name and points csat_model.current at it."""
+    path = os.path.join(model_dir, name)
+    if raw is None:
+        joblib.dump(model, path)
+    else:
+        with open(path, 'wb') as f:
+            f.write(raw)
+    with open(os.path.join(model_dir, ModelManager.POINTER_FILE), 'w') as f:
+        f.write(name + '\n')
+
+def test_swap_on_new_pointer(manager_dir, booster_pipeline, split):
+    test = split[1].drop(columns=[TARGET_COL]).head(50)
+    manager = ModelManager(manager_dir, poll_interval=0.02)
+    first = manager.engine
+    _publish(manager_dir, 'csat_model-v2.pkl', booster_pipeline)
+    # The new version has to be seen unchanged on two polls before it is loaded
+    assert not manager.check()
+    assert manager.check()
+    assert manager.swaps == 1 and manager.status()['model_name'] == 'csat_model-v2.pkl'
+    assert manager.active_version != first.model_version
+    np.testing.assert_array_equal(manager.predict_batch(test).labels, booster_pipeline.predict(test))
+    # An engine taken before the swap keeps serving the old model
+    assert first.model is not manager.engine.model
+    assert not manager.check()
+
+def test_background_watcher_swaps(manager_dir, booster_pipeline):
+    manager = ModelManager(manager_dir, poll_interval=0.02).start()
+    try:
+        _publish(manager_dir, 'csat_model-v2.pkl', booster_pipeline)
+        deadline = time.time() + 30
+        while manager.swaps == 0 and time.time() < deadline:
+            time.sleep(0.02)
+    finally:
+        manager.stop()
+    assert manager.swaps == 1 and manager.status()['model_name'] == 'csat_model-v2.pkl'
+
+@pytest.mark.parametrize('broken', ['corrupt', 'nan'])
+def test_broken_candidate_keeps_serving(manager_dir, forest_pipeline, split, broken):
+    test = split[1].drop(columns=[TARGET_COL]).head(50)
+    manager = ModelManager(manager_dir, poll_interval=0.02)
+    version = manager.active_version
+    if broken == 'corrupt':
+        _publish(manager_dir, 'csat_model-v2.pkl', raw=b'not a pickle')
+    else:
+        # Loads fine, so only _validate can reject it
+        model = Pipeline([('preprocessor', forest_pipeline[0]), ('classifier', NaNClassifier(forest_pipeline.classes_))])
+        _publish(manager_dir, 'csat_model-v2.pkl', model)
+    assert not manager.check() and not manager.check()
+    assert manager.active_version == version and manager.swaps == 0
+    [failed] = manager.status()['failed_candidates']
+    assert failed['model_name'] == 'csat_model-v2.pkl'
+    if broken == 'nan':
+        assert 'not valid distributions' in failed['error']
+    np.testing.assert_array_equal(manager.predict_batch(test).labels, forest_pipeline.predict(test))
+    # A rejected version is not retried until its files change
+    assert not manager.check() and manager._pending is None
+
+def test_no_valid_model_at_startup(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ModelManager(str(tmp_path))
+    _publish(str(tmp_path), 'csat_model.pkl', raw=b'not a pickle')
+    with pytest.raises(ValueError, match='failed validation'):
+        ModelManager(str(tmp_path))
+
+def test_warmup_records_cover_fitted_inputs(forest_pipeline, booster_pipeline):
+    columns = set(NUMERIC_FEATURES + CATEGORICAL_FEATURES + [TEXT_FEATURE])
+    for pipeline in (forest_pipeline, booster_pipeline):
+        records = warmup_records(pipeline, n_records=8)
+        assert len(records) == 8 and all(set(record) == columns for record in records)
+        assert all(value is None for value in records[-1].values())
+        # Categories are ones the encoder was fitted on; scoring them is covered by every swap above
+        for column, values in zip(CATEGORICAL_FEATURES, category_encoder(pipeline[0]).categories_):
+            assert all(record[column] in list(values) for record in records[:-1])
+    assert warmup_records(object()) == FALLBACK_RECORDS
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+import src.prediction_cache as prediction_cache
+from src.csat_pipelining import TARGET_COL
+from src.inference import CSATInference
+from src.prediction_cache import PredictionCache
+
+RECORD = {'channel_name': 'Email', 'category': 'Returns', 'Item_price': 120.0,
+          'connected_handling_time': None, 'Customer Remarks': 'slow refund'}
+
+def test_keys_tell_types_apart_but_not_numpy_scalars():
+    cache = PredictionCache()
+    key = cache.record_key(dict(RECORD, Manager=5), 'v1')
+    assert key != cache.record_key(dict(RECORD, Manager='5'), 'v1')
+    assert key == cache.record_key(dict(RECORD, Manager=np.int64(5)), 'v1')
+    # Numerics are coerced to float, and fields the model does not read are ignored
+    assert key == cache.record_key(dict(RECORD, Manager=5, Item_price=120, **{'Unique id': 'x'}), 'v1')
+    assert key != cache.record_key(dict(RECORD, Manager=5), 'v2')
+
+def test_frame_keys_match_record_keys():
+    cache = PredictionCache()
+    records = [dict(RECORD, Manager='Jane'), dict(RECORD, category=None, **{'Customer Remarks': None})]
+    assert cache.frame_keys(pd.DataFrame(records), 'v1') == [cache.record_key(r, 'v1') for r in records]
+
+def test_ttl_expires_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(prediction_cache.time, 'monotonic', lambda: now[0])
+    cache = PredictionCache(ttl=10)
+    cache.put(b'k', 'value')
+    now[0] += 5
+    assert cache.get(b'k') == 'value'
+    now[0] += 6
+    assert cache.get(b'k') is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['expirations'], stats['size']) == (1, 1, 1, 0)
+
+def test_lru_eviction():
+    cache = PredictionCache(max_size=2)
+    cache.put(b'a', 1)
+    cache.put(b'b', 2)
+    cache.get(b'a')
+    cache.put(b'c', 3)
+    # b was least recently used
+    assert cache.get(b'b') is None and cache.get(b'a') == 1 and cache.get(b'c') == 3
+    assert cache.stats()['evictions'] == 1 and cache.stats()['size'] == 2
+    with pytest.raises(ValueError):
+        PredictionCache(max_size=0)
+
+def test_inference_cache_hits_and_model_version(model_dir, split):
+    test = split[1].drop(columns=[TARGET_COL]).head(50)
+    engine = CSATInference(model_dir=model_dir, cache_size=100)
+    first = engine.predict_batch(test).labels
+    assert engine.cache.stats()['misses'] == 50
+    np.testing.assert_array_equal(engine.predict_batch(test).labels, first)
+    assert engine.cache.stats()['hits'] == 50
+    engine.model_version = 'other'
+    engine.predict_batch(test.head(5))
+    assert engine.cache.stats()['misses'] == 55
@@ -0,0 +1,75 @@
+import asyncio
+import json
+import numpy as np
+from src.csat_pipelining import TARGET_COL
+from src.inference import CSATInference
+from src.scoring_server import ScoringServer, check_record, INPUT_COLUMNS
+
+async def _exchange(port, raw):
+    """Sends raw request bytes and returns (status, decoded JSON body)."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(raw)
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            if line.lower().startswith(b'content-length'):
+                length = int(line.split(b':')[1])
+        return status, json.loads(await reader.readexactly(length))
+    finally:
+        writer.close()
+
+def _post(body, path='/predict'):
+    return (f"POST {path} HTTP/1.1\r\nHost: test\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode() + body
+
+def _run(engine, requests, **kwargs):
+    """Starts a server on a free port, sends each raw request and returns the responses."""
+    async def scenario():
+        server = ScoringServer(engine, port=0, max_wait_ms=1.0, **kwargs)
+        task = asyncio.create_task(server.serve())
+        while server.port == 0:
+            await asyncio.sleep(0.01)
+        try:
+            return [await _exchange(server.port, raw) for raw in requests]
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    return asyncio.run(scenario())
+
+def _records(split, n):
+    test = split[1].drop(columns=[TARGET_COL]).head(n)[INPUT_COLUMNS]
+    # JSON has no NaN; missing values travel as null
+    return test, json.loads(test.to_json(orient='records'))
+
+def test_predict_matches_engine(model_dir, forest_pipeline, split):
+    test, records = _records(split, 10)
+    # Payloads may carry fields the model does not read
+    records[0]['Unique id'] = 'ticket-1'
+    [(status, body)] = _run(CSATInference(model_dir=model_dir), [_post(json.dumps(records).encode())])
+    assert status == 200
+    labels = [p['csat_score'] for p in body['predictions']]
+    np.testing.assert_array_equal(labels, forest_pipeline.predict(test))
+
+def test_malformed_requests(model_dir, split):
+    _, records = _records(split, 1)
+    bad_field = dict(records[0], category=['a', 'b'])
+    responses = _run(CSATInference(model_dir=model_dir), [
+        _post(b'{"channel_name": '),
+        _post(json.dumps(bad_field).encode()),
+        _post(b'[]'),
+        b"POST /predict HTTP/1.1\r\nContent-Length: abc\r\n\r\n",
+        b"GARBAGE\r\n\r\n",
+        _post(json.dumps(records * 200).encode()),
+    ], max_body_bytes=4096)
+    assert [status for status, _ in responses] == [400, 400, 400, 400, 400, 413]
+    assert all('error' in body for _, body in responses)
+
+def test_check_record_keeps_only_model_inputs():
+    record = check_record({'channel_name': 'Email', 'Unique id': 'x', 'Item_price': 12})
+    assert list(record) == INPUT_COLUMNS
+    assert record['channel_name'] == 'Email' and record['Item_price'] == 12 and record['category'] is None
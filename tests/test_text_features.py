@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from src.csat_pipelining import TEXT_FEATURE, TARGET_COL
+from src.inference import CSATInference
+from src.text_features import DedupTfidfVectorizer, RemarkVectorCache
+
+def _remarks(frame):
+    return frame[TEXT_FEATURE].fillna('').astype(str)
+
+def test_dedup_vectorizer_matches_tfidf(split):
+    train, test = _remarks(split[0]), _remarks(split[1])
+    # The training remarks repeat, or the test says nothing about deduplication
+    assert train.nunique() < len(train)
+    dedup = DedupTfidfVectorizer(max_features=100, stop_words='english').fit(train)
+    plain = TfidfVectorizer(max_features=100, stop_words='english').fit(train)
+    assert dedup.vocabulary_ == plain.vocabulary_
+    np.testing.assert_allclose(dedup.idf_, plain.idf_)
+    np.testing.assert_allclose(dedup.transform(test).toarray(), plain.transform(test).toarray())
+    np.testing.assert_allclose(dedup.fit_transform(train).toarray(), plain.fit_transform(train).toarray())
+
+def test_remark_cache_matches_vectorizer(split):
+    vectorizer = TfidfVectorizer(max_features=100, stop_words='english').fit(_remarks(split[0]))
+    cache = RemarkVectorCache(vectorizer, max_size=50)
+    test = _remarks(split[1])
+    for batch in (test[:200], test[100:300], test[:1]):
+        np.testing.assert_allclose(cache.transform(batch).toarray(), vectorizer.transform(batch).toarray())
+    stats = cache.stats()
+    assert stats['hits'] > 0 and stats['size'] <= 50
+    assert stats['hits'] + stats['misses'] == sum(batch.nunique() for batch in (test[:200], test[100:300], test[:1]))
+    # Attributes of the fitted vectorizer are reachable through the cache
+    assert cache.vocabulary_ is vectorizer.vocabulary_
+    with pytest.raises(ValueError):
+        RemarkVectorCache(vectorizer, max_size=0)
+
+def test_inference_with_remark_cache_matches_pipeline(model_dir, forest_pipeline, split):
+    test = split[1].drop(columns=[TARGET_COL])
+    engine = CSATInference(model_dir=model_dir, text_cache_size=100)
+    assert engine.text_cache is not None
+    for _ in range(2):
+        proba = engine.predict_batch(test, return_proba=True).probabilities
+        np.testing.assert_allclose(proba, forest_pipeline.predict_proba(test), atol=1e-12)
+    assert engine.text_cache.stats()['hits'] > 0